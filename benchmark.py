@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+#! -*- coding: utf-8 -*-
+
+"""
+Benchmark of the hot paths of the transformation models (S and I
+functions, transformation times and temperatures, TTT and CCT data, and
+coupled phase fractions) for representative steels. Reports wall time,
+peak memory and scaling with n and phi_steps, and compares the numerical
+outputs with the reference results stored in `benchmark_reference.npz`
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+from transformation_models_modified import Alloy, TransformationDiagrams, S, I, ResultTable, set_result_cache
+
+reference_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_reference.npz')
+
+# Representative steels (wt.%)
+steels = {
+    'plain_carbon': dict(C=.2, Mn=.6, Si=.2),
+    '4140': dict(C=.4, Mn=.85, Si=.25, Cr=1., Mo=.2),
+    'high_Cr': dict(C=.2, Mn=.5, Si=.4, Ni=.3, Cr=13.),
+}
+
+n_values = [250, 1000, 4000, 16000]
+phi_steps_values = [105, 420, 1680]
+# The coupled model is evaluated on n = 1000 points for every cooling rate
+fractions_phi_steps_values = [26, 105, 420]
+# Maximum number of values of each output stored as reference
+max_stored = 200
+
+
+def get_diagrams(steel):
+    """
+    Creates a new TransformationDiagrams object (without cached kinetic
+    integrals) for the steel
+    """
+    return TransformationDiagrams(Alloy(gs=7, **steels[steel]))
+
+
+def bench_sigmoidal():
+    x = 1./(1. + np.exp(-np.linspace(-13, 13, 100000)))
+    y_S, y_I = S.val(x), I.val(x)
+    return dict(S_val=y_S, S_inv=S.inv(y_S), I_val=y_I, I_inv=I.inv(y_I))
+
+
+def bench_transformation_time(steel):
+    diagrams = get_diagrams(steel)
+    out = {}
+    for name in ['ferrite', 'pearlite', 'bainite']:
+        phase = getattr(diagrams, name)
+        T = np.linspace(phase.Tf, phase.Ts, 1000, endpoint=False)
+        out['ts_' + name] = phase.get_transformation_time(T, 1e-2)
+        out['tf_' + name] = phase.get_transformation_time(T, .99)
+    return out
+
+
+def bench_transformation_temperature(steel, phi_steps):
+    diagrams = get_diagrams(steel)
+    cooling_rates = 10**np.linspace(-2, 3, phi_steps)
+    out = {}
+    for name in ['ferrite', 'pearlite', 'bainite']:
+        phase = getattr(diagrams, name)
+        out['T_' + name] = phase.get_transformation_temperature(900, phase.Tf, cooling_rates, [1e-2, .99])
+    return out
+
+
+def bench_TTT_data(steel):
+    data = get_diagrams(steel).get_TTT_data()
+    return {key + '_' + name: table[key] for name, table in data.items() for key in table.columns}
+
+
+def bench_CCT_data(steel, phi_steps):
+    data = get_diagrams(steel).get_CCT_data(phi_steps=phi_steps)
+    return {key: data[key] for key in data.columns}
+
+
+def bench_transformed_fraction(steel, n):
+    # Linear cooling from 900 to 25 oC at 10 oC/s
+    f = get_diagrams(steel).get_transformed_fraction([0, 87.5], [900, 25], n)
+    return {key: f[key][-1:] for key in ['ferrite', 'pearlite', 'bainite', 'martensite', 'austenite', 'Hv']}
+
+
+def bench_CCT_fractions(steel, phi_steps):
+    f = get_diagrams(steel).get_CCT_fractions(10**np.linspace(-2, 3, phi_steps))
+    return {key: f[key] for key in f.columns}
+
+
+def get_cases(quick=False):
+    """
+    Returns the list of benchmark cases as tuples (benchmark, steel,
+    parameter, function)
+    """
+    ns = n_values[:2] if quick else n_values
+    phis = phi_steps_values[:2] if quick else phi_steps_values
+    fractions_phis = fractions_phi_steps_values[:2] if quick else fractions_phi_steps_values
+
+    cases = [('sigmoidal', '', '', bench_sigmoidal)]
+    for steel in steels:
+        cases.append(('transformation_time', steel, '', lambda steel=steel: bench_transformation_time(steel)))
+        cases.append(('transformation_temperature', steel, 'phi_steps=100',
+                      lambda steel=steel: bench_transformation_temperature(steel, 100)))
+        cases.append(('TTT_data', steel, '', lambda steel=steel: bench_TTT_data(steel)))
+        for phi_steps in phis:
+            cases.append(('CCT_data', steel, 'phi_steps={}'.format(phi_steps),
+                          lambda steel=steel, phi_steps=phi_steps: bench_CCT_data(steel, phi_steps)))
+        for phi_steps in fractions_phis:
+            cases.append(('CCT_fractions', steel, 'phi_steps={}'.format(phi_steps),
+                          lambda steel=steel, phi_steps=phi_steps: bench_CCT_fractions(steel, phi_steps)))
+        for n in ns:
+            cases.append(('transformed_fraction', steel, 'n={}'.format(n),
+                          lambda steel=steel, n=n: bench_transformed_fraction(steel, n)))
+    return cases
+
+
+def run_case(func, repeat=3):
+    """
+    Runs func repeat times and returns its output, the best wall time (s)
+    and the peak memory allocated during one extra run (bytes)
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = func()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return out, min(times), peak
+
+
+def thin(value):
+    """
+    Returns at most max_stored evenly spaced values of value along its
+    last axis
+    """
+    value = np.asarray(value, dtype=float)
+    if value.ndim == 0:
+        return value
+    step = max(1, -(-value.shape[-1]//max_stored))
+    return value[..., ::step]
+
+
+def compare(out, reference, prefix, rtol=1e-6, atol=1e-9):
+    """
+    Compares the outputs of a case with the reference results. Returns
+    the maximum deviation, relative to atol + rtol*|reference|, and the
+    keys missing in the reference
+    """
+    worst = 0.
+    missing = []
+    for key, value in out.items():
+        ref_key = prefix + '/' + key
+        if ref_key not in reference:
+            missing.append(ref_key)
+            continue
+        ref = reference[ref_key]
+        if value.shape != ref.shape or np.any(np.isnan(value) != np.isnan(ref)):
+            return np.inf, missing
+        finite = ~np.isnan(ref)
+        if np.any(finite):
+            dev = np.abs(value[finite] - ref[finite])/(atol + rtol*np.abs(ref[finite]))
+            worst = max(worst, dev.max())
+    return worst, missing
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark and differential check of the transformation models',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Number of timed runs of each case')
+    parser.add_argument('-q', '--quick', action='store_true', help='Skip the largest n and phi_steps')
+    parser.add_argument('-k', '--filter', default=None, help='Run only the benchmarks containing this string')
+    parser.add_argument('-u', '--update', action='store_true', help='Save the outputs as the new reference results')
+    parser.add_argument('-ref', '--reference', default=reference_file, help='Reference results file (.npz)')
+    parser.add_argument('-rtol', '--rtol', type=float, default=1e-6, help='Relative tolerance of the check')
+    parser.add_argument('-atol', '--atol', type=float, default=1e-9, help='Absolute tolerance of the check')
+    parser.add_argument('-o', '--output', default=None, help='Save the report to a CSV file')
+
+    args = parser.parse_args()
+
+    # Results must be computed, not read from a cache
+    set_result_cache(None)
+    # Overflows of the transformation factor far from the transformation
+    # ranges are expected
+    np.seterr(all='ignore')
+
+    reference = {}
+    if not args.update and os.path.exists(args.reference):
+        with np.load(args.reference) as data:
+            reference = dict(data)
+
+    outputs = {}
+    report = dict(benchmark=[], steel=[], parameter=[], time_ms=[], peak_MiB=[], deviation=[], status=[])
+    failed = False
+
+    print('{:<28s} {:<14s} {:<16s} {:>10s} {:>10s} {:>10s}  {}'.format(
+        'benchmark', 'steel', 'parameter', 'time (ms)', 'peak (MiB)', 'deviation', 'status'))
+    for bench, steel, param, func in get_cases(args.quick):
+        if args.filter and args.filter not in bench:
+            continue
+
+        out, wall, peak = run_case(func, args.repeat)
+        out = {key: thin(value) for key, value in out.items()}
+        prefix = '/'.join(item for item in [bench, steel, param] if item)
+        outputs.update({prefix + '/' + key: value for key, value in out.items()})
+
+        if args.update:
+            dev, status = np.nan, 'saved'
+        else:
+            dev, missing = compare(out, reference, prefix, args.rtol, args.atol)
+            if missing:
+                status = 'no reference'
+            elif dev <= 1:
+                status = 'ok'
+            else:
+                status = 'CHANGED'
+                failed = True
+
+        for key, value in zip(report, [bench, steel, param, 1e3*wall, peak/2**20, dev, status]):
+            report[key].append(value)
+        print('{:<28s} {:<14s} {:<16s} {:>10.2f} {:>10.2f} {:>10.3g}  {}'.format(
+            bench, steel, param, 1e3*wall, peak/2**20, dev, status))
+
+    if args.update:
+        if args.filter:
+            # Keeps the reference results of the other benchmarks
+            if os.path.exists(args.reference):
+                with np.load(args.reference) as data:
+                    outputs = dict(data, **outputs)
+        np.savez_compressed(args.reference, **outputs)
+        print('Reference results saved to {}'.format(args.reference))
+
+    if args.output:
+        ResultTable(**report).to_dataframe().to_csv(args.output, index=False)
+
+    if failed:
+        print('Outputs deviate from the reference results by more than the tolerance '
+              '(deviation > 1, relative to atol + rtol*|reference|)')
+        sys.exit(1)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+#! -*- coding: utf-8 -*-
+
+"""
+Build (or verify) the precomputed tables of the S(X) and I(X) functions
+"""
+import sys
+import argparse
+from transformation_models_modified import build_sigmoidal_tables, verify_sigmoidal_tables, \
+    sigmoidal_tables_file
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Script for building the precomputed S(X) and I(X) tables',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('-o', '--output', default=sigmoidal_tables_file, help='Tables file (.npz)')
+    parser.add_argument('-v', '--verify', action='store_true',
+                        help='Rebuild the tables and compare them with the saved ones instead of saving')
+    parser.add_argument('-tol', '--tol', type=float, default=1e-10,
+                        help='Maximum relative deviation accepted by --verify')
+
+    args = parser.parse_args()
+
+    if args.verify:
+        deviations = verify_sigmoidal_tables(args.output)
+        for name, dev in deviations.items():
+            print('{}: maximum relative deviation {:g}'.format(name, dev))
+        if not all(dev <= args.tol for dev in deviations.values()):
+            print('Tables in {} are missing, outdated or inaccurate'.format(args.output))
+            sys.exit(1)
+    else:
+        print('Building tables in {}'.format(args.output))
+        build_sigmoidal_tables(args.output)
@@ -0,0 +1,284 @@
+#! -*- coding: utf-8 -*-
+
+"""
+Content-addressed cache of results (critical temperatures, TTT and CCT
+data). Results are stored under the SHA-256 hash of their parameters
+(composition, grain size, equations and fingerprints of their code,
+model constants) and of the code version, in a LRU memory tier and,
+optionally, in a directory on disk limited in size
+"""
+
+import os
+import copy
+import json
+import pickle
+import hashlib
+import tempfile
+import numpy as np
+from collections import OrderedDict
+
+module_dir = os.path.dirname(os.path.abspath(__file__))
+# Files whose contents define the code version
+versioned_files = ['transformation_models_modified.py', 'sigmoidal_tables.npz']
+
+_code_version = None
+
+
+def get_code_version():
+    """
+    Returns the SHA-256 hash of the model source code and sigmoidal
+    tables. Any change of the model coefficients in the code changes the
+    code version and, therefore, all cache keys
+    """
+    global _code_version
+    if _code_version is None:
+        sha = hashlib.sha256()
+        for fname in versioned_files:
+            path = os.path.join(module_dir, fname)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    sha.update(f.read())
+        _code_version = sha.hexdigest()
+    return _code_version
+
+
+def get_code_fingerprint(code):
+    """
+    Returns the bytes that identify a code object: its bytecode, names,
+    and constants (including the nested code objects)
+    """
+    content = [code.co_code, repr(code.co_names).encode()]
+    for const in code.co_consts:
+        content.append(get_code_fingerprint(const) if hasattr(const, 'co_code') else repr(const).encode())
+    return b'\0'.join(content)
+
+
+def get_function_fingerprint(func):
+    """
+    Returns the SHA-256 hash of the qualified name, code, default
+    arguments, and closure of a function, so that replacing a function
+    by another one with different contents changes the hash. Callables
+    without code (e.g., builtins) are hashed by their repr
+    """
+    sha = hashlib.sha256()
+    sha.update('{}.{}'.format(getattr(func, '__module__', None),
+                              getattr(func, '__qualname__', None)).encode())
+    code = getattr(func, '__code__', None)
+    if code is None:
+        sha.update(repr(func).encode())
+    else:
+        sha.update(get_code_fingerprint(code))
+        sha.update(repr(func.__defaults__).encode())
+        sha.update(repr(func.__kwdefaults__).encode())
+        for cell in func.__closure__ or ():
+            try:
+                sha.update(repr(cell.cell_contents).encode())
+            except ValueError:
+                # Empty cell
+                pass
+    return sha.hexdigest()
+
+
+def canonicalize(value):
+    """
+    Converts value into a JSON serializable object with an unique
+    representation: numbers are converted to the repr of the float,
+    arrays and tuples to lists, and dictionaries are sorted by key
+    """
+    if isinstance(value, dict):
+        return {str(key): canonicalize(value[key]) for key in sorted(value, key=str)}
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item) for item in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if value is None or isinstance(value, str):
+        return value
+    return repr(float(value))
+
+
+def make_key(kind, **params):
+    """
+    Returns the cache key of a result
+
+    Parameters
+    ----------
+    kind : string
+        Kind of result (e.g., 'TTT')
+    **params :
+        Parameters that determine the result
+
+    Returns
+    -------
+    key : string
+        Hexadecimal SHA-256 hash of kind, params, and the code version
+    """
+    content = json.dumps(canonicalize(dict(kind=kind, code_version=get_code_version(), params=params)),
+                         sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache of results with a LRU memory tier and an optional disk tier.
+    Cached values are deep copied when stored and retrieved, so they can
+    be modified by the caller
+
+    Parameters
+    ----------
+    maxsize : int (optional)
+        Maximum number of results kept in memory
+        Default: 256
+    directory : string (optional)
+        Directory of the disk tier. If None, results are only kept in
+        memory
+        Default: None
+    max_bytes : int (optional)
+        Maximum size of the disk tier (bytes). The least recently used
+        files are deleted when it is exceeded
+        Default: 256 MiB
+    """
+
+    def __init__(self, maxsize=256, directory=None, max_bytes=2**28):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # Running total of the size of the disk tier (bytes), updated on
+        # each put and recalculated from the directory on each eviction
+        self.disk_bytes = None
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        return 'ResultCache(maxsize={}, directory={!r}, hits={}, disk_hits={}, misses={})'.format(
+            self.maxsize, self.directory, self.hits, self.disk_hits, self.misses)
+
+    def __len__(self):
+        return len(self.memory)
+
+    def __contains__(self, key):
+        return key in self.memory or (self.directory is not None and os.path.exists(self.get_path(key)))
+
+    def get_path(self, key):
+        """
+        Returns the path of the file of the disk tier for key
+        """
+        return os.path.join(self.directory, key + '.pkl')
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for key, or default if not found
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(self.memory[key])
+
+        if self.directory is not None:
+            path = self.get_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+            else:
+                # Marks the file as recently used
+                os.utime(path)
+                self.disk_hits += 1
+                self._store(key, value)
+                return copy.deepcopy(value)
+
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        """
+        Stores value for key in the memory and disk tiers
+        """
+        value = copy.deepcopy(value)
+        self._store(key, value)
+
+        if self.directory is not None:
+            # Writes to a temporary file and renames it, so that other
+            # processes never read incomplete files
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            path = self.get_path(key)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+
+            # The directory is only scanned when the size limit is
+            # exceeded, so that puts do not depend on the number of files
+            if self.disk_bytes is None:
+                self.evict()
+            else:
+                self.disk_bytes += size - replaced
+                if self.disk_bytes > self.max_bytes:
+                    self.evict()
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the value cached for key. If not found, it is calculated by
+        compute() and stored
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _store(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def evict(self, fraction=.9):
+        """
+        Deletes the least recently used files of the disk tier until its
+        size is not larger than fraction*max_bytes, if it is larger than
+        max_bytes. Freeing some room below the limit avoids scanning the
+        directory again on the next puts. Files written by other
+        processes are included, since the size is calculated from the
+        directory
+        """
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        target = fraction*self.max_bytes if total > self.max_bytes else total
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        self.disk_bytes = total
+
+    def clear(self):
+        """
+        Clears the memory and disk tiers
+        """
+        self.memory.clear()
+        if self.directory is not None:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.pkl'):
+                    os.remove(entry.path)
+            self.disk_bytes = 0
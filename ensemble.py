@@ -0,0 +1,724 @@
+#!/usr/bin/env python3
+#! -*- coding: utf-8 -*-
+
+"""
+Monte Carlo ensembles of heats whose composition and grain size vary
+within the ranges of a specification (e.g., C +/- 0.02, Mn +/- 0.05 wt.%).
+The sampled alloys are stored in an AlloyBatch, so the critical
+temperatures, TTT and CCT times, and final hardness of thousands of heats
+are evaluated in vectorized batches instead of creating one Alloy and
+TransformationDiagrams object per heat. The results are summarized as
+percentile bands, which are drawn as shaded regions over the diagrams of
+the nominal alloy
+"""
+
+import argparse
+import numpy as np
+from transformation_models_modified import Alloy, AlloyBatch, TransformationDiagrams, ResultTable, S, \
+    couple_phase_fractions
+from instrumentation import timed
+from export import write_tables, get_metadata
+
+elements = ['C', 'Si', 'Mn', 'Ni', 'Mo', 'Cr', 'V', 'Co', 'Cu', 'Al', 'W', 'N', 'Nb', 'Ti', 'B']
+phases = ['ferrite', 'pearlite', 'bainite']
+distributions = ['normal', 'uniform']
+
+
+def sample_compositions(nominal, tolerances, samples=1000, gs=7, gs_tolerance=0., distribution='normal',
+                        seed=None):
+    """
+    Samples compositions and grain sizes around the nominal values
+
+    Parameters
+    ----------
+    nominal : dict
+        Nominal composition in wt.%
+    tolerances : dict
+        Tolerance (half width of the specification range, wt.%) of each
+        element. Elements not listed are kept at their nominal content
+    samples : int (optional)
+        Number of samples
+        Default: 1000
+    gs : float (optional)
+        Nominal ASTM grain size number
+        Default: 7
+    gs_tolerance : float (optional)
+        Tolerance of the grain size number
+        Default: 0
+    distribution : string (optional)
+        'normal' (standard deviation tolerance/3, i.e., 99.7% of the
+        samples within the specification) or 'uniform' (evenly
+        distributed within the specification). Contents are clipped at
+        zero
+        Default: 'normal'
+    seed : int (optional)
+        Seed of the random number generator
+        Default: None
+
+    Returns
+    -------
+    gs : array
+        Grain size number of each sample
+    comp : array
+        Compositions with shape (samples, len(elements))
+    elements : list
+        Chemical symbols corresponding to the columns of comp
+    """
+    if distribution not in distributions:
+        raise ValueError('Unknown distribution {!r}. Use one of {}'.format(distribution, distributions))
+
+    rng = np.random.default_rng(seed)
+
+    def draw(value, tolerance):
+        if tolerance == 0:
+            return np.full(samples, float(value))
+        if distribution == 'normal':
+            return rng.normal(value, tolerance/3., samples)
+        return rng.uniform(value - tolerance, value + tolerance, samples)
+
+    names = list(nominal) + [el for el in tolerances if el not in nominal]
+    comp = np.column_stack([draw(nominal.get(el, 0.), tolerances.get(el, 0.)) for el in names])
+    return draw(gs, gs_tolerance), np.maximum(comp, 0.), names
+
+
+def get_percentile_names(percentiles):
+    """
+    Returns the column names ('p5', 'p50', etc.) of the percentiles
+    """
+    return ['p{:g}'.format(p) for p in percentiles]
+
+
+def get_percentile_band(values, percentiles, axis=0):
+    """
+    Percentiles of values along axis. Infinite values (e.g., a phase that
+    never forms) are valid samples, so the percentiles are picked from
+    the samples (inverted CDF) instead of being interpolated between a
+    finite and an infinite value. NaN values are ignored
+    """
+    with np.errstate(invalid='ignore'):
+        return np.nanpercentile(values, percentiles, axis=axis, method='inverted_cdf')
+
+
+def get_TTT_nose(phase, fs=1e-2, dT=1.):
+    """
+    Calculates the temperature and time of the nose (minimum start time)
+    of the TTT curve of a phase transformation whose properties are (N, 1)
+    arrays (see `AlloyBatch.column_view`). The start time of each alloy is
+    evaluated on its own grid from Tf (included) to Ts (excluded), the same
+    as `np.arange(phase.Tf, phase.Ts, dT)` in `sweep.py`
+
+    Returns
+    -------
+    nose_T, nose_t : arrays
+        Temperature and time of the nose of each alloy. NaN if the phase
+        does not form
+    """
+    Ts, Tf = [np.ravel(a) for a in np.broadcast_arrays(phase.Ts, phase.Tf)]
+    nose_T, nose_t = np.full(len(Ts), np.nan), np.full(len(Ts), np.nan)
+    # Number of points of the grid of each alloy
+    size = np.where(Ts > Tf, np.ceil((Ts - Tf)/dT), 0).astype(int)
+    if not np.any(size > 0):
+        return nose_T, nose_t
+    k = np.arange(size.max())
+    T = Tf[:, None] + k*dT
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        ts = phase.get_transformation_time(T, fs)
+    ts = np.where((k < size[:, None]) & ~np.isnan(ts), ts, np.inf)
+    idx = np.argmin(ts, axis=-1)
+    t = ts[np.arange(len(Ts)), idx]
+    valid = np.isfinite(t)
+    nose_T[valid] = T[valid, idx[valid]]
+    nose_t[valid] = t[valid]
+    return nose_T, nose_t
+
+
+def get_transformation_temperatures(phase, cooling_rates, fractions=(1e-2, .99), Tini=900, Tfin=25, dT=.1):
+    """
+    Calculates the temperatures at which the fractions of a phase
+    transformation whose properties are (N, 1) arrays are reached during
+    linear cooling from Tini. The kinetic integral G(T) of each alloy is
+    calculated on the same grid as `KineticIntegral` (from Ts down to Tf,
+    or Tfin if higher, in steps of dT), for all the alloys at once, and
+    inverted for all the cooling rates. The results are therefore equal to
+    those of `phase.get_kinetic_integral(phase.Tf)` for a single alloy
+
+    Returns
+    -------
+    T : array
+        Array with shape (len(fractions), len(cooling_rates), N). NaN if
+        the fraction is not reached above Tf
+    """
+    cooling_rates = np.atleast_1d(np.asarray(cooling_rates, dtype=float))
+    fractions = np.atleast_1d(np.asarray(fractions, dtype=float))
+    target = np.multiply.outer(S(fractions), cooling_rates).ravel()
+
+    Ts, Tf = [np.ravel(a).astype(float) for a in np.broadcast_arrays(phase.Ts, phase.Tf)]
+    Tf = np.maximum(Tf, Tfin)
+    # Number of points of the grid of each alloy above Tf, which is
+    # appended at the end. The shorter grids are padded with Tf
+    size = np.where(Ts > Tf, np.ceil((Ts - Tf)/dT), 0).astype(int)
+    k = np.arange(size.max() + 1)
+    T = np.where(k < size[:, None], Ts[:, None] - k*dT, Tf[:, None])
+
+    # Cumulative trapezoidal rule; the integrand 1/F is zero at Ts and the
+    # padding adds nothing
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        inv_factor = 1./phase.get_transformation_factor(T[:, 1:])
+    inv_factor = np.concatenate([np.zeros((len(T), 1)), inv_factor], axis=-1)
+    step = T[:, :-1] - T[:, 1:]
+    G = np.zeros(T.shape)
+    G[:, 1:] = np.where(step > 0, .5*(inv_factor[:, 1:] + inv_factor[:, :-1])*step, 0.).cumsum(axis=-1)
+
+    Tt = np.empty((len(T), len(target)))
+    for i, (T_i, G_i) in enumerate(zip(T, G)):
+        G0 = np.interp(Tini, T_i[::-1], G_i[::-1])
+        Tt[i] = np.interp(target + G0, G_i, T_i, right=np.nan)
+    return Tt.T.reshape(len(fractions), len(cooling_rates), len(T))
+
+
+def summarize(table, percentiles=(5, 50, 95), by='cooling_rate', exclude=('sample',)):
+    """
+    Summarizes the columns of a table of samples (see
+    `CompositionEnsemble.get_samples`)
+
+    Parameters
+    ----------
+    table : ResultTable object
+        Table with one row per sample (and value of `by`)
+    percentiles : iterable (optional)
+        Percentiles
+        Default: (5, 50, 95)
+    by : string (optional)
+        Column by which the rows are grouped. Columns that take the same
+        value for all the groups of a sample are summarized once, with
+        NaN in the column `by`
+        Default: 'cooling_rate'
+    exclude : iterable (optional)
+        Columns that are not summarized
+        Default: ('sample',)
+
+    Returns
+    -------
+    summary : ResultTable object
+        Table in long format with one row per quantity (and value of
+        `by`). Columns: quantity, `by`, fraction of valid (not NaN)
+        samples, mean, standard deviation, and percentiles
+    """
+    names = get_percentile_names(percentiles)
+    columns = dict(quantity=[], **{by: []}, valid=[], mean=[], std=[], **{name: [] for name in names})
+
+    def add(quantity, value, values):
+        valid = ~np.isnan(values)
+        columns['quantity'].append(quantity)
+        columns[by].append(value)
+        columns['valid'].append(valid.mean() if len(values) else np.nan)
+        finite = values[np.isfinite(values)]
+        columns['mean'].append(finite.mean() if len(finite) else np.nan)
+        columns['std'].append(finite.std() if len(finite) else np.nan)
+        band = get_percentile_band(values, percentiles) if valid.any() else np.full(len(names), np.nan)
+        for name, p in zip(names, band):
+            columns[name].append(p)
+
+    groups = np.unique(table[by]) if by in table else [np.nan]
+    masks = [table[by] == value for value in groups] if by in table else [np.ones(len(table), dtype=bool)]
+    for key in table.columns:
+        if key in exclude or key == by:
+            continue
+        values = np.asarray(table[key], dtype=float)
+        if all(np.array_equal(values[masks[0]], values[mask], equal_nan=True) for mask in masks[1:]):
+            add(key, np.nan, values[masks[0]])
+        else:
+            for value, mask in zip(groups, masks):
+                add(key, value, values[mask])
+
+    return ResultTable(meta=dict(percentiles=list(percentiles)), **columns)
+
+
+class CompositionEnsemble:
+    """
+    Ensemble of alloys sampled around a nominal composition
+
+    Parameters
+    ----------
+    batch : AlloyBatch object
+        Sampled alloys
+    nominal : Alloy object
+        Nominal alloy, whose diagrams are drawn under the percentile bands
+
+    Example
+    -------
+    >>> ensemble = CompositionEnsemble.sample(dict(C=.4, Mn=.85, Cr=1.), dict(C=.02, Mn=.05), samples=2000)
+    >>> summary = summarize(ensemble.get_samples([1, 10, 100]))
+    >>> ax = ensemble.TTT()
+    """
+
+    def __init__(self, batch, nominal):
+        self.batch = batch
+        self.nominal = nominal
+        self.diagrams = TransformationDiagrams(nominal)
+        self.phases = batch.get_phase_transformations()
+        # Parameters of the sampling, stored in the metadata of the results
+        self.meta = {}
+
+    @classmethod
+    def sample(cls, nominal, tolerances, samples=1000, gs=7, gs_tolerance=0., distribution='normal',
+               equations=None, seed=None):
+        """
+        Creates an ensemble by sampling the composition and grain size
+        (see `sample_compositions`)
+        """
+        gs_samples, comp, names = sample_compositions(nominal, tolerances, samples, gs, gs_tolerance,
+                                                      distribution, seed)
+        ensemble = cls(AlloyBatch(gs_samples, comp, names, equations),
+                       Alloy(gs=gs, equations=equations, **nominal))
+        ensemble.meta = dict(nominal=nominal, tolerances=tolerances, gs=gs, gs_tolerance=gs_tolerance,
+                             distribution=distribution, samples=samples, seed=seed)
+        return ensemble
+
+    def __len__(self):
+        return len(self.batch)
+
+    def get_TTT_temperatures(self, dT=1.):
+        """
+        Returns dictionary with the temperature grid of each phase, from
+        the lowest Tf to the highest Ts of the ensemble
+        """
+        return {name: np.arange(np.min(self.phases[name].Tf), np.max(self.phases[name].Ts), dT)
+                for name in phases}
+
+    @timed('ensemble')
+    def get_TTT_noses(self, fs=1e-2, dT=1.):
+        """
+        Calculates the temperature and time of the nose (minimum start
+        time) of the TTT curves of ferrite, pearlite, and bainite of every
+        sample (see `get_TTT_nose`)
+
+        Returns
+        -------
+        noses : dict
+            Dictionary with the arrays nose_T_ferrite, nose_t_ferrite,
+            etc. NaN if the phase does not form
+        """
+        noses = {}
+        for name in phases:
+            noses['nose_T_' + name], noses['nose_t_' + name] = get_TTT_nose(self.phases[name], fs, dT)
+        return noses
+
+    @timed('ensemble')
+    def get_CCT_temperatures(self, cooling_rates, fractions=(1e-2, .99), Tini=900, Tfin=25, dT=.1):
+        """
+        Calculates the temperatures at which the fractions of ferrite,
+        pearlite, and bainite are reached during linear cooling from Tini,
+        for every sample (see `get_transformation_temperatures`)
+
+        Returns
+        -------
+        T : dict
+            Dictionary with one (len(fractions), len(cooling_rates), N)
+            array per phase. NaN if the fraction is not reached above Tfin
+        """
+        return {name: get_transformation_temperatures(self.phases[name], cooling_rates, fractions, Tini, Tfin, dT)
+                for name in phases}
+
+    @timed('ensemble')
+    def get_final_fractions(self, cooling_rates, Tini=900, Tfin=25, n=1000, chunk_size=1024):
+        """
+        Calculates the final (coupled) phase fractions and hardness of
+        every sample after linear cooling from Tini to Tfin (see
+        `TransformationDiagrams.get_CCT_fractions`). The samples and
+        cooling rates are evaluated together, in chunks of at most
+        chunk_size thermal cycles
+
+        Returns
+        -------
+        f : dict
+            Dictionary with the (N, len(cooling_rates)) arrays of the
+            final fractions of ferrite, pearlite, bainite, martensite,
+            austenite, and the Vickers hardness Hv
+        """
+        cooling_rates = np.atleast_1d(np.asarray(cooling_rates, dtype=float))
+        m = len(cooling_rates)
+        T = np.linspace(Tini, Tfin, n)
+        batch = self.batch
+        step = max(1, chunk_size//m)
+
+        final = {}
+        for start in range(0, len(self), step):
+            # One row per sample and cooling rate
+            rows = np.repeat(np.arange(start, min(start + step, len(self))), m)
+            sub = AlloyBatch(batch.gs[rows], batch.comp[rows], batch.elements, batch.equations)
+            phi = np.resize(cooling_rates, len(rows))
+            t = (Tini - T)/phi[:, None]
+            transformations = sub.get_phase_transformations()
+            x = couple_phase_fractions(*[transformations[name].get_sampled_fraction(t, T)
+                                         for name in phases + ['martensite']])[:, -1]
+            f = dict(zip(phases + ['martensite'], x.T))
+            f['austenite'] = 1. - x.sum(axis=-1)
+            f['Hv'] = f['martensite']*sub.Hv_martensite(phi) + f['bainite']*sub.Hv_bainite(phi) + \
+                (f['ferrite'] + f['pearlite'])*sub.Hv_ferrite_pearlite(phi)
+            for key, value in f.items():
+                final.setdefault(key, []).append(value.reshape(-1, m))
+
+        # Rounded like in TransformationDiagrams.get_family_fractions
+        return {key: np.concatenate(value) if key == 'Hv' else np.concatenate(value).round(12) + 0.
+                for key, value in final.items()}
+
+    def get_samples(self, cooling_rates=(1., 10., 100.), Tini=900, Tfin=25, fs=1e-2, ff=.99, n=1000):
+        """
+        Evaluates every sample of the ensemble
+
+        Parameters
+        ----------
+        cooling_rates : iterable (optional)
+            Cooling rates (oC/s) of linear cooling from Tini to Tfin
+            Default: (1, 10, 100)
+        Tini : float (optional)
+            Initial temperature
+            Default: 900
+        Tfin : float (optional)
+            Final temperature
+            Default: 25
+        fs : float (optional)
+            Transformation start phase fraction
+            Default: 1e-2 (1%)
+        ff : float (optional)
+            Transformation finish phase fraction
+            Default: .99 (99%)
+        n : int (optional)
+            Number of points of the temperature grid of the phase fractions
+            Default: 1000
+
+        Returns
+        -------
+        samples : ResultTable object
+            Table with one row per sample and cooling rate (same columns
+            as the tables of `sweep.py`): sample index, composition, grain
+            size, critical temperatures, TTT nose, critical cooling rates
+            (critical_rate_ferrite, etc.), CCT start and finish
+            temperatures and times, final phase fractions, and hardness
+        """
+        cooling_rates = np.atleast_1d(np.asarray(cooling_rates, dtype=float))
+        batch = self.batch
+        m = len(cooling_rates)
+
+        def per_sample(value):
+            return np.repeat(value, m)
+
+        columns = dict(sample=per_sample(np.arange(len(self))))
+        columns.update({el: per_sample(batch.w[el]) for el in batch.elements})
+        columns['gs'] = per_sample(batch.gs)
+        for key in ['Ae1', 'Ae3', 'Bs', 'Ms']:
+            columns[key] = per_sample(getattr(batch, key))
+        columns.update({key: per_sample(value) for key, value in self.get_TTT_noses(fs).items()})
+
+        for name in phases:
+            columns['critical_rate_' + name] = per_sample(self.phases[name].get_critical_cooling_rate(fs, Tini))
+
+        columns['cooling_rate'] = np.tile(cooling_rates, len(self))
+        temperatures = self.get_CCT_temperatures(cooling_rates, [fs, ff], Tini, Tfin)
+        for name in phases:
+            Ts, Tf = [T.T.ravel() for T in temperatures[name]]
+            columns['Ts_' + name] = Ts
+            columns['Tf_' + name] = Tf
+            columns['ts_' + name] = (Tini - Ts)/columns['cooling_rate']
+            columns['tf_' + name] = (Tini - Tf)/columns['cooling_rate']
+
+        columns.update({key: value.ravel() for key, value in
+                        self.get_final_fractions(cooling_rates, Tini, Tfin, n).items()})
+
+        meta = dict(self.meta, Tini=Tini, Tfin=Tfin, fs=fs, ff=ff, n=n)
+        return ResultTable(meta=meta, **columns)
+
+    def get_TTT_bands(self, fs=1e-2, ff=.99, percentiles=(5, 50, 95), dT=1.):
+        """
+        Calculates percentile bands of the TTT start and finish times
+
+        Returns
+        -------
+        bands : ResultTable object
+            Table in long format with one row per phase, fraction, and
+            temperature. Columns: phase, f, T, and the percentiles of the
+            transformation time (p5, p50, etc.). Samples in which the phase
+            does not form at T count as infinite times
+        """
+        names = get_percentile_names(percentiles)
+        columns = dict(phase=[], f=[], T=[], **{name: [] for name in names})
+        for name, T in self.get_TTT_temperatures(dT).items():
+            TTT = self.batch.get_TTT(T, fs, ff)
+            for f, key in [(fs, 'ts_'), (ff, 'tf_')]:
+                t = np.where(np.isnan(TTT[key + name]), np.inf, TTT[key + name])
+                band = get_percentile_band(t, percentiles)
+                columns['phase'].append(np.full(len(T), name))
+                columns['f'].append(np.full(len(T), f))
+                columns['T'].append(T)
+                for p, values in zip(names, band):
+                    columns[p].append(values)
+        return ResultTable(meta=dict(fractions=[fs, ff], percentiles=list(percentiles)),
+                           **{key: np.concatenate(value) for key, value in columns.items()})
+
+    def get_CCT_bands(self, Tini=900, fs=1e-2, ff=.99, phi_min=1e-4, phi_max=1e4, phi_steps=105, Tfin=25,
+                      percentiles=(5, 50, 95)):
+        """
+        Calculates percentile bands of the CCT start and finish
+        temperatures (see `get_CCT_temperatures`)
+
+        Returns
+        -------
+        bands : ResultTable object
+            Table in long format with one row per phase, fraction, and
+            cooling rate. Columns: phase, f, cooling_rate, and the
+            percentiles of the temperature (T_p5, T_p50, etc.) and time
+            (t_p5, etc.; t = (Tini - T)/cooling_rate) at which the fraction
+            is reached. Samples in which the fraction is not reached above
+            Tfin count as -inf temperatures (infinite times)
+        """
+        cooling_rates = np.logspace(np.log10(phi_min), np.log10(phi_max), phi_steps)
+        names = get_percentile_names(percentiles)
+        temperatures = self.get_CCT_temperatures(cooling_rates, [fs, ff], Tini, Tfin)
+
+        columns = dict(phase=[], f=[], cooling_rate=[], **{'T_' + p: [] for p in names},
+                       **{'t_' + p: [] for p in names})
+        for name in phases:
+            for f, T in zip([fs, ff], temperatures[name]):
+                band = get_percentile_band(np.where(np.isnan(T), -np.inf, T), percentiles, axis=-1)
+                columns['phase'].append(np.full(phi_steps, name))
+                columns['f'].append(np.full(phi_steps, f))
+                columns['cooling_rate'].append(cooling_rates)
+                for p, values in zip(names, band):
+                    columns['T_' + p].append(values)
+                    columns['t_' + p].append((Tini - values)/cooling_rates)
+        return ResultTable(meta=dict(fractions=[fs, ff], percentiles=list(percentiles), Tini=Tini, Tfin=Tfin),
+                           **{key: np.concatenate(value) for key, value in columns.items()})
+
+    def get_hardness_bands(self, cooling_rates=None, Tini=900, Tfin=25, n=500, percentiles=(5, 50, 95)):
+        """
+        Calculates percentile bands of the final hardness and phase
+        fractions as a function of the cooling rate
+
+        Returns
+        -------
+        bands : ResultTable object
+            Table with the cooling rates and the percentiles of the
+            hardness (Hv_p5, etc.) and of the final fraction of each phase
+            (martensite_p5, etc.)
+        """
+        if cooling_rates is None:
+            cooling_rates = 10**np.linspace(-2, 3, 16)
+        cooling_rates = np.atleast_1d(np.asarray(cooling_rates, dtype=float))
+        f = self.get_final_fractions(cooling_rates, Tini, Tfin, n)
+        bands = ResultTable(meta=dict(percentiles=list(percentiles), Tini=Tini, Tfin=Tfin),
+                            cooling_rate=cooling_rates)
+        for key in ['Hv', 'ferrite', 'pearlite', 'bainite', 'martensite', 'austenite']:
+            for p, values in zip(get_percentile_names(percentiles), get_percentile_band(f[key], percentiles)):
+                bands['{}_{}'.format(key, p)] = values
+        return bands
+
+    def draw_bands(self, ax, bands, x, y, alpha=.25):
+        """
+        Draws the region between the lowest and highest percentiles of
+        each phase and fraction as a shaded polygon. The infinite times
+        of the samples in which the phase does not form are clipped to the
+        largest finite time drawn
+        """
+        percentiles = bands.meta['percentiles']
+        lo, hi = get_percentile_names([percentiles[0], percentiles[-1]])
+        finite = np.concatenate([bands[x.format(p)][np.isfinite(bands[x.format(p)])] for p in (lo, hi)])
+        xmax = finite.max() if len(finite) else 1.
+
+        for name in phases:
+            for i, f in enumerate(bands.meta['fractions']):
+                sel = (bands['phase'] == name) & (bands['f'] == f)
+                x_lo, x_hi = [np.minimum(bands[x.format(p)][sel], xmax) for p in (lo, hi)]
+                y_lo, y_hi = [bands[y.format(p)][sel] for p in (lo, hi)]
+                valid = np.isfinite(x_lo) & np.isfinite(x_hi) & np.isfinite(y_lo) & np.isfinite(y_hi)
+                if not np.any(valid):
+                    continue
+                label = u'{} {}–{}'.format(name.capitalize(), lo, hi) if i == 0 else None
+                ax.fill(np.concatenate([x_lo[valid], x_hi[valid][::-1]]),
+                        np.concatenate([y_lo[valid], y_hi[valid][::-1]]),
+                        color=self.diagrams.colors_dict[name], alpha=alpha, lw=0, label=label)
+
+    @timed('plotting')
+    def TTT(self, fs=1e-2, ff=.99, percentiles=(5, 95), ax=None, alpha=.25, **kwargs):
+        """
+        Plot the TTT diagram of the nominal alloy with the percentile
+        bands of the ensemble as shaded regions
+
+        Parameters
+        ----------
+        fs : float (optional)
+            Transformation start phase fraction
+            Default: 1e-2 (1%)
+        ff : float (optional)
+            Transformation finish phase fraction
+            Default: .99 (99%)
+        percentiles : iterable (optional)
+            Percentiles of the edges of the bands
+            Default: (5, 95)
+        ax : AxesSubplot object (optional)
+            Axis where to plot the diagram. If None, then a new axis is
+            created
+            Default: None
+        alpha : float (optional)
+            Opacity of the bands
+            Default: .25
+        **kwargs :
+            Optional arguments passed to ax.plot(*args, **kwargs)
+
+        Returns
+        -------
+        ax : AxesSubplot object
+        """
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            fig, ax = plt.subplots(figsize=(6, 6))
+
+        diagrams = self.diagrams
+        diagrams.draw_isopleths(ax, diagrams.get_TTT_isopleths([fs, ff]), **kwargs)
+        self.draw_bands(ax, self.get_TTT_bands(fs, ff, percentiles), '{}', 'T', alpha)
+        diagrams.draw_critical_temperatures(ax)
+        diagrams.format_diagram(ax, 3)
+
+        return ax
+
+    @timed('plotting')
+    def CCT(self, Tini=900, fs=1e-2, ff=.99, phi_min=1e-4, phi_max=1e4, phi_steps=105, percentiles=(5, 95),
+            ax=None, alpha=.25, **kwargs):
+        """
+        Plot the CCT diagram of the nominal alloy with the percentile
+        bands of the ensemble as shaded regions (see `TTT` and
+        `get_CCT_bands`)
+
+        Returns
+        -------
+        ax : AxesSubplot object
+        """
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            fig, ax = plt.subplots(figsize=(6, 6))
+
+        diagrams = self.diagrams
+        diagrams.draw_isopleths(ax, diagrams.get_CCT_isopleths([fs, ff], Tini, phi_min, phi_max, phi_steps),
+                                **kwargs)
+        self.draw_bands(ax, self.get_CCT_bands(Tini, fs, ff, phi_min, phi_max, phi_steps, percentiles=percentiles),
+                        't_{}', 'T_{}', alpha)
+        diagrams.draw_critical_temperatures(ax)
+        diagrams.format_diagram(ax, 3)
+
+        return ax
+
+    @timed('plotting')
+    def plot_hardness(self, cooling_rates=None, Tini=900, Tfin=25, n=500, percentiles=(5, 50, 95), ax=None,
+                      alpha=.25, **kwargs):
+        """
+        Plot the final hardness against the cooling rate: median of the
+        ensemble, band between the lowest and highest percentiles, and
+        hardness of the nominal alloy
+
+        Returns
+        -------
+        ax : AxesSubplot object
+        """
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            fig, ax = plt.subplots()
+
+        bands = self.get_hardness_bands(cooling_rates, Tini, Tfin, n, percentiles)
+        names = get_percentile_names(percentiles)
+        phi = bands['cooling_rate']
+        ax.fill_between(phi, bands['Hv_' + names[0]], bands['Hv_' + names[-1]], color='k', alpha=alpha, lw=0,
+                        label=u'{}–{}'.format(names[0], names[-1]))
+        if len(names) > 2:
+            kw = dict(color='k', label='Median' if 50 in percentiles else names[len(names)//2])
+            kw.update(kwargs)
+            ax.plot(phi, bands['Hv_' + names[len(names)//2]], **kw)
+        nominal = self.diagrams.get_CCT_fractions(phi, Tini, Tfin, n)
+        ax.plot(phi, nominal['Hv'], 'k--', lw=1, label='Nominal')
+
+        ax.set_xscale('log')
+        ax.set_xlabel(u'Cooling rate (°C/s)')
+        ax.set_ylabel('Vickers hardness (HV)')
+        ax.set_title(self.nominal.format_composition())
+        ax.legend()
+
+        return ax
+
+
+def parse_tolerances(items):
+    """
+    Parses tolerances given as 'element=tolerance' strings
+    """
+    tolerances = {}
+    for item in items or []:
+        element, value = item.split('=')
+        tolerances[element.strip()] = float(value)
+    return tolerances
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Monte Carlo ensemble of compositions within specification '
+                                     'ranges: percentile bands of critical temperatures, TTT/CCT times and '
+                                     'hardness',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('-g', '--gs', type=float, default=7, help='Nominal ASTM grain size number')
+    parser.add_argument('-gtol', '--gs-tolerance', type=float, default=0., help='Tolerance of the grain size number')
+    for element in elements:
+        parser.add_argument('-' + element, '--' + element, type=float, default=0.,
+                            help='Nominal {} wt.%%'.format(element))
+    parser.add_argument('-tol', '--tolerances', nargs='+', default=None,
+                        help='Tolerances (wt.%%) as element=value, e.g., C=0.02 Mn=0.05')
+    parser.add_argument('-d', '--distribution', choices=distributions, default='normal',
+                        help='Distribution of the samples within the tolerances')
+    parser.add_argument('-n', '--samples', type=int, default=1000, help='Number of samples')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the random sampling')
+    parser.add_argument('-phi', '--phi', nargs='+', type=float, default=[1., 10., 100.],
+                        help='Cooling rates (oC/s)')
+    parser.add_argument('-Tini', '--Tini', type=float, default=900., help='Initial temperature (oC)')
+    parser.add_argument('-Tfin', '--Tfin', type=float, default=25., help='Final temperature of the cooling (oC)')
+    parser.add_argument('-p', '--percentiles', nargs='+', type=float, default=[5., 50., 95.], help='Percentiles')
+    parser.add_argument('-eq', '--equations', default=None,
+                        help='Equations for Ms, Bs, Ac1 and Ac3: policy (min, max, median) or JSON profile file')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Save the table of samples (.csv, .parquet, .arrow or .npz)')
+    parser.add_argument('-s', '--summary', default=None,
+                        help='Save the summary table (.csv, .parquet, .arrow or .npz)')
+    parser.add_argument('-f', '--figure', default=None,
+                        help='Save the TTT, CCT and hardness bands to this file instead of showing them')
+    parser.add_argument('--no-plot', action='store_true', help='Do not plot the bands')
+
+    args = parser.parse_args()
+
+    nominal = {element: getattr(args, element) for element in elements if getattr(args, element) != 0}
+    ensemble = CompositionEnsemble.sample(nominal, parse_tolerances(args.tolerances), args.samples, args.gs,
+                                          args.gs_tolerance, args.distribution, args.equations, args.seed)
+
+    samples = ensemble.get_samples(args.phi, args.Tini, args.Tfin)
+    summary = summarize(samples, args.percentiles)
+    print(summary.to_dataframe().to_string(index=False))
+
+    meta = get_metadata('ensemble', [ensemble.diagrams], **samples.meta)
+    if args.output:
+        write_tables(args.output, [samples], meta=meta)
+    if args.summary:
+        write_tables(args.summary, [summary], meta=meta)
+
+    if not args.no_plot:
+        import matplotlib
+        if args.figure:
+            # Non-interactive backend
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        percentiles = [min(args.percentiles), max(args.percentiles)]
+        fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 6))
+        ensemble.TTT(percentiles=percentiles, ax=ax1)
+        ensemble.CCT(args.Tini, percentiles=percentiles, ax=ax2)
+        ensemble.plot_hardness(Tini=args.Tini, Tfin=args.Tfin, percentiles=args.percentiles, ax=ax3)
+        if args.figure:
+            fig.savefig(args.figure)
+        else:
+            plt.show()
@@ -0,0 +1,394 @@
+#! -*- coding: utf-8 -*-
+
+"""
+Columnar export of TTT, CCT, and phase fraction results to CSV, Parquet,
+Arrow IPC, and NumPy .npz files. The tables are written in chunks (e.g.,
+one per alloy), so large exports never build a full DataFrame in memory.
+Every file starts with a metadata header (alloy compositions, grain size,
+critical temperatures, equations, parameters of the results, and code
+version) and the columns follow fixed schemas:
+
+    TTT             alloy, phase, T, ts, tf
+    CCT             alloy, phase, cooling_rate, Ts, Tf, ts, tf
+    fractions       alloy, t, T, ferrite, pearlite, bainite, martensite,
+                    austenite, Hv
+    CCT_fractions   alloy, cooling_rate, ferrite, pearlite, bainite,
+                    martensite, austenite, Hv
+
+where alloy is the index of the alloy in the metadata header. The format
+is chosen by the extension of the file name: .csv, .parquet,
+.arrow (or .feather, .ipc), or .npz. Parquet and Arrow files require
+pyarrow
+"""
+
+import os
+import json
+import numpy as np
+from cache import get_code_version
+
+fractions_columns = ['ferrite', 'pearlite', 'bainite', 'martensite', 'austenite', 'Hv']
+
+# Column names and types of each kind of result
+schemas = {
+    'TTT': [('alloy', 'int64'), ('phase', 'str'), ('T', 'float64'), ('ts', 'float64'), ('tf', 'float64')],
+    'CCT': [('alloy', 'int64'), ('phase', 'str'), ('cooling_rate', 'float64'), ('Ts', 'float64'),
+            ('Tf', 'float64'), ('ts', 'float64'), ('tf', 'float64')],
+    'fractions': [('alloy', 'int64'), ('t', 'float64'), ('T', 'float64')] +
+                 [(key, 'float64') for key in fractions_columns],
+    'CCT_fractions': [('alloy', 'int64'), ('cooling_rate', 'float64')] +
+                     [(key, 'float64') for key in fractions_columns],
+}
+
+# Key of the metadata in the CSV header, Arrow schema, and .npz file
+metadata_key = 'transformation_diagrams'
+
+
+def get_alloy_metadata(alloy):
+    """
+    Returns the metadata of an alloy: composition, grain size, equations
+    and critical temperatures
+    """
+    return dict(composition=alloy.get_composition(), gs=alloy.gs, equations=alloy.equations,
+                Ae1=alloy.Ae1, Ae3=alloy.Ae3, Bs=alloy.Bs, Ms=alloy.Ms)
+
+
+def get_metadata(kind, diagrams, **params):
+    """
+    Returns the metadata header of an export
+
+    Parameters
+    ----------
+    kind : string
+        Kind of result ('TTT', 'CCT', 'fractions', or 'CCT_fractions')
+    diagrams : list of TransformationDiagrams objects
+        Alloys, in the order of the alloy column
+    **params :
+        Parameters of the results (e.g., fs and ff)
+    """
+    return dict(kind=kind, code_version=get_code_version(), params=params,
+                alloys=[get_alloy_metadata(d.alloy) for d in diagrams])
+
+
+def to_json(meta):
+    """
+    Serializes the metadata (NumPy scalars and arrays are converted to
+    Python objects)
+    """
+    def default(value):
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError('Object of type {} is not JSON serializable'.format(type(value).__name__))
+    return json.dumps(meta, default=default)
+
+
+def get_format(fname):
+    """
+    Returns the format ('csv', 'parquet', 'arrow', or 'npz') corresponding
+    to the extension of fname
+    """
+    ext = os.path.splitext(fname)[1].lower()
+    formats = {'.csv': 'csv', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow',
+               '.npz': 'npz'}
+    if ext not in formats:
+        raise ValueError('Unknown export format {!r}. Use .csv, .parquet, .arrow, or .npz'.format(ext))
+    return formats[ext]
+
+
+def infer_schema(table):
+    """
+    Returns the schema (list of column names and types) of a table
+    """
+    schema = []
+    for key in table:
+        kind = np.asarray(table[key]).dtype.kind
+        schema.append((key, 'str' if kind in 'US' else 'int64' if kind in 'iub' else 'float64'))
+    return schema
+
+
+class TableWriter(object):
+    """
+    Base class of the writers. Chunks (ResultTable objects or dictionaries
+    of arrays) are written by `write`, and the file is finished by
+    `close` (or at the end of a with block)
+
+    Parameters
+    ----------
+    fname : string
+        File name
+    schema : list (optional)
+        Column names and types ('int64', 'float64', or 'str'). If None,
+        it is inferred from the first chunk
+        Default: None
+    meta : dict (optional)
+        Metadata header
+        Default: None
+    """
+
+    def __init__(self, fname, schema=None, meta=None):
+        self.fname = fname
+        self.schema = schema
+        self.meta = dict(meta or {})
+        self.rows = 0
+        self.opened = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.close()
+        else:
+            self.finish()
+
+    def write(self, table):
+        """
+        Writes a chunk with the columns of the schema
+        """
+        if self.schema is None:
+            self.schema = infer_schema(table)
+        columns = {}
+        for key, dtype in self.schema:
+            value = np.asarray(table[key])
+            columns[key] = value.astype(str) if dtype == 'str' else value.astype(dtype)
+        if not self.opened:
+            self.open()
+            self.opened = True
+        self.write_columns(columns)
+        self.rows += len(next(iter(columns.values()), ()))
+
+    def close(self):
+        """
+        Finishes the file. Files without any chunk contain the header only
+        """
+        if not self.opened and self.schema is not None:
+            self.open()
+            self.opened = True
+        self.finish()
+
+    def open(self):
+        pass
+
+    def write_columns(self, columns):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+class CSVWriter(TableWriter):
+    """
+    CSV writer. The metadata is written in the first line as a comment
+    (# {JSON}), which can be skipped by readers with comment='#'
+    """
+
+    def open(self):
+        self.file = open(self.fname, 'w', newline='')
+        self.file.write('# {}\n'.format(to_json({metadata_key: self.meta})))
+        self.file.write(','.join(key for key, _ in self.schema) + '\n')
+
+    def write_columns(self, columns):
+        import pandas as pd
+        pd.DataFrame(columns).to_csv(self.file, header=False, index=False)
+
+    def finish(self):
+        if self.opened:
+            self.file.close()
+
+
+class ArrowWriter(TableWriter):
+    """
+    Writer of Parquet (format='parquet') or Arrow IPC (format='arrow')
+    files. The metadata is stored in the schema of the file
+    """
+
+    def __init__(self, fname, schema=None, meta=None, format='parquet'):
+        super(ArrowWriter, self).__init__(fname, schema, meta)
+        self.format = format
+
+    def open(self):
+        import pyarrow as pa
+
+        types = {'int64': pa.int64(), 'float64': pa.float64(), 'str': pa.string()}
+        self.arrow_schema = pa.schema([(key, types[dtype]) for key, dtype in self.schema],
+                                      metadata={metadata_key: to_json(self.meta)})
+        if self.format == 'parquet':
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(self.fname, self.arrow_schema)
+        else:
+            self.writer = pa.ipc.new_file(self.fname, self.arrow_schema)
+
+    def write_columns(self, columns):
+        import pyarrow as pa
+        self.writer.write_table(pa.Table.from_pydict(columns, schema=self.arrow_schema))
+
+    def finish(self):
+        if self.opened:
+            self.writer.close()
+
+
+class NpzWriter(TableWriter):
+    """
+    Writer of NumPy .npz files, with one array per column and the
+    metadata as a JSON string. The .npz format cannot be appended to, so
+    the chunks are kept as arrays (not DataFrames) until the file is
+    closed
+    """
+
+    def open(self):
+        self.chunks = {key: [] for key, _ in self.schema}
+
+    def write_columns(self, columns):
+        for key, value in columns.items():
+            self.chunks[key].append(value)
+
+    def finish(self):
+        if self.opened:
+            arrays = {key: np.concatenate(value) if value else np.array([], dtype=dtype if dtype != 'str' else str)
+                      for (key, dtype), value in zip(self.schema, self.chunks.values())}
+            arrays[metadata_key] = np.array(to_json(self.meta))
+            np.savez_compressed(self.fname, **arrays)
+
+
+def open_writer(fname, schema=None, meta=None):
+    """
+    Returns the writer corresponding to the extension of fname (see
+    `TableWriter`)
+    """
+    fmt = get_format(fname)
+    if fmt == 'csv':
+        return CSVWriter(fname, schema, meta)
+    if fmt == 'npz':
+        return NpzWriter(fname, schema, meta)
+    return ArrowWriter(fname, schema, meta, fmt)
+
+
+def write_tables(fname, tables, schema=None, meta=None):
+    """
+    Writes the chunks of an iterable of tables to a single file
+
+    Returns
+    -------
+    rows : int
+        Number of rows written
+    """
+    with open_writer(fname, schema, meta) as writer:
+        for table in tables:
+            writer.write(table)
+    return writer.rows
+
+
+def read_metadata(fname):
+    """
+    Returns the metadata header of an exported file
+    """
+    fmt = get_format(fname)
+    if fmt == 'csv':
+        with open(fname) as f:
+            return json.loads(f.readline().lstrip('# '))[metadata_key]
+    if fmt == 'npz':
+        with np.load(fname) as data:
+            return json.loads(str(data[metadata_key]))
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        schema = pq.read_schema(fname)
+    else:
+        import pyarrow as pa
+        with pa.memory_map(fname) as source:
+            schema = pa.ipc.open_file(source).schema
+    return json.loads(schema.metadata[metadata_key.encode()])
+
+
+def as_list(diagrams):
+    return list(diagrams) if isinstance(diagrams, (list, tuple)) else [diagrams]
+
+
+def with_alloy(table, i, columns):
+    """
+    Returns a dictionary with the alloy index i and the given columns of
+    table
+    """
+    chunk = dict(alloy=np.full(len(table), i))
+    chunk.update({key: table[key] for key in columns})
+    return chunk
+
+
+def export_TTT(fname, diagrams, fs=1e-2, ff=.99):
+    """
+    Exports the TTT curves of one alloy or a list of alloys
+
+    Parameters
+    ----------
+    fname : string
+        File name (.csv, .parquet, .arrow, or .npz)
+    diagrams : TransformationDiagrams object or list
+        Alloys. They are evaluated one by one while writing
+    fs, ff : float (optional)
+        Transformation start and finish phase fractions
+        Default: 1e-2, .99
+
+    Returns
+    -------
+    rows : int
+        Number of rows written
+    """
+    diagrams = as_list(diagrams)
+    columns = [key for key, _ in schemas['TTT'][1:]]
+    tables = (with_alloy(d.get_TTT_table(fs, ff), i, columns) for i, d in enumerate(diagrams))
+    return write_tables(fname, tables, schemas['TTT'], get_metadata('TTT', diagrams, fs=fs, ff=ff))
+
+
+def export_CCT(fname, diagrams, Tini=900, fs=1e-2, ff=.99, phi_min=1e-4, phi_max=1e4, phi_steps=420):
+    """
+    Exports the CCT curves of one alloy or a list of alloys (see
+    `TransformationDiagrams.get_CCT_data` for the parameters)
+
+    Returns
+    -------
+    rows : int
+        Number of rows written
+    """
+    diagrams = as_list(diagrams)
+    columns = [key for key, _ in schemas['CCT'][1:]]
+    tables = (with_alloy(d.get_CCT_table(Tini, fs, ff, phi_min, phi_max, phi_steps), i, columns)
+              for i, d in enumerate(diagrams))
+    meta = get_metadata('CCT', diagrams, Tini=Tini, fs=fs, ff=ff, phi_min=phi_min, phi_max=phi_max,
+                        phi_steps=phi_steps)
+    return write_tables(fname, tables, schemas['CCT'], meta)
+
+
+def export_fractions(fname, diagrams, t, T=None, n=1000):
+    """
+    Exports the phase fractions and hardness of one alloy or a list of
+    alloys for the thermal cycle T(t) (see
+    `TransformationDiagrams.get_transformed_fraction`)
+
+    Returns
+    -------
+    rows : int
+        Number of rows written
+    """
+    diagrams = as_list(diagrams)
+    columns = [key for key, _ in schemas['fractions'][1:]]
+    tables = (with_alloy(d.get_transformed_fraction(t, T, n), i, columns) for i, d in enumerate(diagrams))
+    return write_tables(fname, tables, schemas['fractions'], get_metadata('fractions', diagrams, n=n))
+
+
+def export_CCT_fractions(fname, diagrams, cooling_rates, Tini=900, Tfin=25, n=1000):
+    """
+    Exports the final phase fractions and hardness of one alloy or a list
+    of alloys after linear cooling (see
+    `TransformationDiagrams.get_CCT_fractions`)
+
+    Returns
+    -------
+    rows : int
+        Number of rows written
+    """
+    diagrams = as_list(diagrams)
+    columns = [key for key, _ in schemas['CCT_fractions'][1:]]
+    tables = (with_alloy(d.get_CCT_fractions(cooling_rates, Tini, Tfin, n), i, columns)
+              for i, d in enumerate(diagrams))
+    meta = get_metadata('CCT_fractions', diagrams, Tini=Tini, Tfin=Tfin, n=n)
+    return write_tables(fname, tables, schemas['CCT_fractions'], meta)
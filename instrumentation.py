@@ -0,0 +1,198 @@
+#! -*- coding: utf-8 -*-
+
+"""
+Opt-in instrumentation of the transformation models. Inside a
+`collect_stats()` block, the time spent and the number of calls of each
+stage (spline initialization, kinetics, coupling, hardness, plotting) and
+event counters are accumulated in a Stats object. Outside, the
+instrumented functions only check whether stats are being collected
+
+Warnings (e.g., extrapolation of the S and I functions) are rate-limited:
+each kind of warning is issued at most once every `warning_interval`
+seconds, and all occurrences are counted in `warning_counts`
+"""
+
+import time
+import warnings
+import functools
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Stats object collecting the timings, None if disabled
+active_stats = None
+
+# Minimum interval (s) between two warnings of the same kind
+warning_interval = 10.
+# Number of occurrences of each kind of warning (always counted)
+warning_counts = defaultdict(int)
+_last_warning = {}
+
+
+class ExtrapolationWarning(RuntimeWarning):
+    """
+    Warning issued when a function is evaluated out of its tabulated
+    domain
+    """
+    pass
+
+
+class Stats:
+    """
+    Timings (inclusive wall time and number of calls) of each stage and
+    event counters
+    """
+
+    def __init__(self):
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    def __repr__(self):
+        return self.report()
+
+    def add_time(self, stage, elapsed):
+        self.times[stage] += elapsed
+        self.calls[stage] += 1
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def reset(self):
+        self.times.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def as_dict(self):
+        """
+        Returns the stats as a dictionary {stage: dict(calls, time)} plus
+        the counters under the key 'counters'
+        """
+        stats = {stage: dict(calls=self.calls[stage], time=self.times[stage]) for stage in self.times}
+        stats['counters'] = dict(self.counters)
+        return stats
+
+    def report(self):
+        """
+        Returns the stats formatted as a table, with the stages sorted by
+        time
+        """
+        lines = ['{:<32s} {:>10s} {:>12s} {:>14s}'.format('stage', 'calls', 'time (ms)', 'per call (us)')]
+        for stage in sorted(self.times, key=self.times.get, reverse=True):
+            lines.append('{:<32s} {:>10d} {:>12.3f} {:>14.2f}'.format(
+                stage, self.calls[stage], 1e3*self.times[stage], 1e6*self.times[stage]/self.calls[stage]))
+        for name in sorted(self.counters):
+            lines.append('{:<32s} {:>10d}'.format(name, self.counters[name]))
+        return '\n'.join(lines)
+
+
+@contextmanager
+def collect_stats(stats=None):
+    """
+    Context manager that enables the instrumentation
+
+    Parameters
+    ----------
+    stats : Stats object (optional)
+        Object in which the stats are accumulated. If None, a new one is
+        created
+        Default: None
+
+    Yields
+    ------
+    stats : Stats object
+
+    Example
+    -------
+    >>> with collect_stats() as stats:
+    ...     diagrams.get_transformed_fraction(t, T)
+    >>> print(stats.report())
+    """
+    global active_stats
+    previous = active_stats
+    active_stats = Stats() if stats is None else stats
+    try:
+        yield active_stats
+    finally:
+        active_stats, stats = previous, active_stats
+        # Stats of nested blocks are also accumulated by the outer one
+        if previous is not None and previous is not stats:
+            for stage in stats.times:
+                previous.times[stage] += stats.times[stage]
+                previous.calls[stage] += stats.calls[stage]
+            for name in stats.counters:
+                previous.counters[name] += stats.counters[name]
+
+
+def timed(stage):
+    """
+    Decorator that accumulates the wall time and number of calls of the
+    decorated function in the stage `stage` when stats are collected
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if active_stats is None:
+                return func(*args, **kwargs)
+            stats = active_stats
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.add_time(stage, time.perf_counter() - t0)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def timer(stage):
+    """
+    Context manager version of `timed`, for timing blocks of code
+    """
+    if active_stats is None:
+        yield
+        return
+    stats = active_stats
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_time(stage, time.perf_counter() - t0)
+
+
+def count(name, n=1):
+    """
+    Increments the counter `name` by n when stats are collected
+    """
+    if active_stats is not None:
+        active_stats.count(name, n)
+
+
+def warn(key, message, category=ExtrapolationWarning, stacklevel=3):
+    """
+    Issues a rate-limited warning. The warnings with the same key are
+    issued at most once every `warning_interval` seconds; the number of
+    occurrences is counted in `warning_counts` (and in the active stats)
+
+    Parameters
+    ----------
+    key : string
+        Kind of warning
+    message : string
+        Warning message
+    category : Warning subclass (optional)
+        Default: ExtrapolationWarning
+    stacklevel : int (optional)
+        Stack level passed to warnings.warn
+        Default: 3 (caller of the function calling warn)
+    """
+    warning_counts[key] += 1
+    count('warning: ' + key)
+
+    now = time.monotonic()
+    last = _last_warning.get(key)
+    if last is None or now - last[0] >= warning_interval:
+        suppressed = warning_counts[key] - last[1] - 1 if last is not None else 0
+        if suppressed > 0:
+            message += ' ({} similar warnings suppressed)'.format(suppressed)
+        _last_warning[key] = (now, warning_counts[key])
+        warnings.warn(message, category, stacklevel=stacklevel)
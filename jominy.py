@@ -0,0 +1,224 @@
+#! -*- coding: utf-8 -*-
+
+"""
+Jominy end-quench test simulation. The transient heat conduction along
+the bar is solved by finite differences and the phase fraction and
+Maynier hardness models are evaluated for all the positions along the
+bar at once
+"""
+
+import numpy as np
+from transformation_models_modified import ResultTable, get_cooling_rate
+from instrumentation import timed
+
+# Distances from the quenched end (mm) at which hardness is usually
+# measured
+standard_distances = np.array([1.5, 3, 5, 7, 9, 11, 13, 15, 20, 25, 30, 35, 40, 45, 50])
+
+
+class JominyTest:
+    """
+    Jominy end-quench test of a steel bar austenitized at Tini and cooled
+    by a water jet at one end
+
+    The temperature along the bar axis is calculated by solving the 1-D
+    transient heat conduction equation with an implicit (backward Euler)
+    finite difference scheme. The quenched end exchanges heat with the
+    water jet (heat transfer coefficient h_jet), while the lateral
+    surface and the opposite end lose heat to the air (h_air, which
+    lumps convection and radiation)
+
+    Parameters
+    ----------
+    diagrams : TransformationDiagrams object
+        Transformation model of the alloy
+    Tini : float (optional)
+        Austenitizing temperature (oC)
+        Default: 900
+    length : float (optional)
+        Length of the bar (m)
+        Default: 0.1
+    diameter : float (optional)
+        Diameter of the bar (m)
+        Default: 0.025
+    h_jet : float (optional)
+        Heat transfer coefficient of the water jet (W/m2/K). The default
+        value gives cooling rates at 700 oC of about 240 oC/s at 1.5 mm
+        and 9 oC/s at 20 mm from the quenched end
+        Default: 1e4
+    h_air : float (optional)
+        Heat transfer coefficient of the lateral surface (W/m2/K)
+        Default: 50
+    T_water : float (optional)
+        Water temperature (oC)
+        Default: 25
+    T_air : float (optional)
+        Air temperature (oC)
+        Default: 25
+    k : float (optional)
+        Thermal conductivity (W/m/K)
+        Default: 30
+    rho : float (optional)
+        Density (kg/m3)
+        Default: 7800
+    cp : float (optional)
+        Specific heat (J/kg/K)
+        Default: 600
+    nx : int (optional)
+        Number of nodes along the bar
+        Default: 201
+    """
+
+    def __init__(self, diagrams, Tini=900, length=.1, diameter=.025, h_jet=1e4, h_air=50,
+                 T_water=25, T_air=25, k=30, rho=7800, cp=600, nx=201):
+        self.diagrams = diagrams
+        self.Tini = Tini
+        self.length = length
+        self.diameter = diameter
+        self.h_jet = h_jet
+        self.h_air = h_air
+        self.T_water = T_water
+        self.T_air = T_air
+        self.k = k
+        self.rho = rho
+        self.cp = cp
+        self.x = np.linspace(0, length, nx)  # Node positions (m)
+
+    @timed('heat conduction')
+    def get_temperature_history(self, t_end=1800, n=1000):
+        """
+        Calculates the temperature at all nodes along the bar
+
+        Parameters
+        ----------
+        t_end : float (optional)
+            Duration of the quench (s)
+            Default: 1800
+        n : int (optional)
+            Number of instants of time, logarithmically spaced between
+            1e-2 s and t_end (plus t = 0), which are also the time steps
+            of the implicit scheme
+            Default: 1000
+
+        Returns
+        -------
+        t, T : tuple
+            Array of times (n) and array of temperatures (nx, n)
+        """
+        from scipy.linalg import solve_banded
+
+        t = np.append(0, np.geomspace(1e-2, t_end, n - 1))
+        nx = len(self.x)
+        dx = self.x[1] - self.x[0]
+
+        # Control volume of each node (half volumes at the ends) and lateral
+        # heat loss per unit volume (4/D is the lateral area per unit volume)
+        vol = np.full(nx, dx)
+        vol[[0, -1]] = dx/2
+        m = self.h_air*4/self.diameter  # W/m3/K
+
+        # Conduction terms of the tridiagonal matrix
+        cond = self.k/dx
+        lower = np.full(nx, -cond)
+        upper = np.full(nx, -cond)
+        diag = np.full(nx, 2*cond)
+        diag[[0, -1]] = cond
+        # Boundary conditions: water jet at x = 0, air at x = length
+        diag[0] += self.h_jet
+        diag[-1] += self.h_air
+        diag += m*vol
+        source = m*vol*self.T_air
+        source[0] += self.h_jet*self.T_water
+        source[-1] += self.h_air*self.T_air
+
+        T = np.empty((nx, n))
+        T[:, 0] = self.Tini
+        ab = np.zeros((3, nx))
+        ab[0, 1:] = upper[:-1]
+        ab[2, :-1] = lower[1:]
+        for i in range(1, n):
+            capacity = self.rho*self.cp*vol/(t[i] - t[i-1])
+            ab[1] = diag + capacity
+            T[:, i] = solve_banded((1, 1), ab, capacity*T[:, i-1] + source)
+
+        return t, T
+
+    def get_hardness_profile(self, distances=None, t_end=1800, n=1000):
+        """
+        Calculates the final phase fractions and hardness along the bar.
+        The coupled phase fraction model is evaluated for all positions
+        at once
+
+        Parameters
+        ----------
+        distances : iterable (optional)
+            Distances from the quenched end (mm)
+            Default: None (`standard_distances`)
+        t_end : float (optional)
+            Duration of the quench (s)
+            Default: 1800
+        n : int (optional)
+            Number of instants of time
+            Default: 1000
+
+        Returns
+        -------
+        profile : ResultTable object
+            Table with the distances (mm), the cooling rates at 700 oC
+            (oC/s), the final phase fractions of ferrite, pearlite,
+            bainite, martensite, austenite, and the Vickers hardness
+        """
+        distances = standard_distances if distances is None else np.asarray(distances, dtype=float)
+        t, T_nodes = self.get_temperature_history(t_end, n)
+
+        # Temperature history at each distance by linear interpolation
+        # between nodes
+        pos = np.interp(distances*1e-3, self.x, np.arange(len(self.x)))
+        i0 = np.minimum(pos.astype(int), len(self.x) - 2)
+        w = (pos - i0)[:, None]
+        T = (1 - w)*T_nodes[i0] + w*T_nodes[i0 + 1]
+
+        phi700 = get_cooling_rate(t, T, 700.)
+        f = self.diagrams.get_sampled_fraction(t, T, phi700)
+
+        return ResultTable(meta=dict(Tini=self.Tini, t_end=t_end), distance=distances, phi700=phi700,
+                           **{key: value[:, -1] for key, value in f.items()})
+
+    @timed('plotting')
+    def plot_hardness_profile(self, distances=None, ax=None, **kwargs):
+        """
+        Plot Jominy hardness profile (hardness vs distance from the
+        quenched end)
+
+        Parameters
+        ----------
+        distances : iterable (optional)
+            Distances from the quenched end (mm)
+            Default: None (`standard_distances`)
+        ax : AxesSubplot object (optional)
+            Axis where to plot the hardness profile. If None, then a new
+            axis is created
+            Default: None
+        **kwargs :
+            Optional arguments passed to ax.plot(*args, **kwargs)
+
+        Returns
+        -------
+        ax : AxesSubplot object
+        """
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            fig, ax = plt.subplots()
+
+        profile = self.get_hardness_profile(distances)
+
+        kw = dict(marker='o', color='k')
+        kw.update(kwargs)
+        ax.plot(profile['distance'], profile['Hv'], **kw)
+
+        ax.set_xlabel('Distance from quenched end (mm)')
+        ax.set_ylabel('Hardness (HV)')
+        ax.set_title(self.diagrams.alloy.format_composition())
+
+        return ax
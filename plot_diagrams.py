@@ -5,8 +5,11 @@
 Plot TTT and CCT diagrams
 """
 import argparse
-import matplotlib.pyplot as plt
-from transformation_models_modified import Alloy, TransformationDiagrams
+import matplotlib
+from transformation_models_modified import Alloy, TransformationDiagrams, select_equations_interactively, \
+    save_equation_profile, set_result_cache
+from cache import ResultCache
+from export import export_TTT
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Script for plotting TTT and CCT diagrams',
@@ -26,23 +29,57 @@ if __name__ == '__main__':
     parser.add_argument('-W', '--W', type=float, default=0., help='Tungsten wt.%%')
     parser.add_argument('-Tini', '--Tini', type=float, default=900.,
                         help='Initial continuous cooling temperature (oC)')
-    parser.add_argument('-e', '--exp', action='store_true', help='Export to .xlsx format')
+    parser.add_argument('-e', '--exp', nargs='?', const='TTT.csv', default=None,
+                        help='Export the TTT data to this file (.csv, .parquet, .arrow, .npz or .xlsx)')
     parser.add_argument('-N', '--N', type=float, default=0., help='Nitrogen wt.%%')
     parser.add_argument('-Nb', '--Nb', type=float, default=0., help='Niobium wt.%%')
     parser.add_argument('-Ti', '--Ti', type=float, default=0., help='Titanium wt.%%')
     parser.add_argument('-Ru', '--Ru', type=float, default=0., help='Ruthenium wt.%%')
     parser.add_argument('-B', '--B', type=float, default=0., help='Boron wt.%%')
     parser.add_argument('-Fe', '--Fe', type=float, default=0., help='Iron wt.%%')
+    parser.add_argument('-fr', '--fractions', nargs='+', type=float, default=None,
+                        help='Transformed fractions (%%) of the isopleths drawn (e.g., 1 10 50 90 99)')
+    parser.add_argument('-eq', '--equations', default=None,
+                        help='Equations for Ms, Bs, Ac1 and Ac3: policy (min, max, median) or JSON profile file')
+    parser.add_argument('-i', '--interactive', action='store_true',
+                        help='Choose the equations for Ms, Bs, Ac1 and Ac3 interactively')
+    parser.add_argument('-s', '--save-equations', default=None,
+                        help='Save the chosen equations to a JSON profile file')
+    parser.add_argument('-cache', '--cache', default=None,
+                        help='Directory of the on-disk cache of critical temperatures, TTT and CCT data')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Save the figure to this file instead of showing it (no GUI needed)')
 
     args = parser.parse_args()
     comp = vars(args)
     gs = comp.pop('gs')
     Tini = comp.pop('Tini')
     export = comp.pop('exp')
+    fractions = comp.pop('fractions')
+    equations = comp.pop('equations')
+    interactive = comp.pop('interactive')
+    save_equations = comp.pop('save_equations')
+    cache = comp.pop('cache')
+    output = comp.pop('output')
+
+    if output:
+        # Non-interactive backend
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    if cache:
+        set_result_cache(ResultCache(directory=cache))
+
     # Los demás argumentos se pasan tal cual al constructor de Alloy (incluso si no se usan)
 
+    if interactive:
+        equations = select_equations_interactively(**comp)
+
     # Defines alloy (grain size gs and composition)
-    alloy = Alloy(gs=gs, **comp)
+    alloy = Alloy(gs=gs, equations=equations, **comp)
+
+    if save_equations:
+        save_equation_profile(save_equations, alloy.equations)
 
     # Initializes diagrams object
     diagrams = TransformationDiagrams(alloy)
@@ -50,17 +87,22 @@ if __name__ == '__main__':
     fig, ax1 = plt.subplots(figsize=(8, 6))
 
     # Plot TTT
-    diagrams.TTT(ax=ax1)
+    diagrams.TTT(ax=ax1, fractions=None if fractions is None else [f/100 for f in fractions])
 
     title = 'TTT'
 
     if export:
         try:
-            fout = '{}_TTT.xlsx'.format(title.strip(' (wt.%)'))
-            print('Exporting data to {}'.format(fout))
-            diagrams.df_TTT.to_excel(fout)
+            print('Exporting data to {}'.format(export))
+            if export.endswith('.xlsx'):
+                diagrams.df_TTT.to_excel(export, index=False)
+            else:
+                export_TTT(export, diagrams)
         except Exception as ex:
             print(ex)
 
     fig.suptitle(title)
-    plt.show()
\ No newline at end of file
+    if output:
+        fig.savefig(output)
+    else:
+        plt.show()
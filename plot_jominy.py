@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+#! -*- coding: utf-8 -*-
+
+"""
+Plot Jominy end-quench hardness profile
+"""
+import argparse
+import matplotlib
+from transformation_models_modified import Alloy, TransformationDiagrams
+from jominy import JominyTest
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Script for plotting the Jominy end-quench hardness profile',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('-g', '--gs', type=float, default=7, help='ASTM grain size number')
+    parser.add_argument('-C', '--C', type=float, default=0., help='Carbon wt.%%')
+    parser.add_argument('-Si', '--Si', type=float, default=0., help='Silicon wt.%%')
+    parser.add_argument('-Mn', '--Mn', type=float, default=0., help='Manganese wt.%%')
+    parser.add_argument('-Ni', '--Ni', type=float, default=0., help='Nickel wt.%%')
+    parser.add_argument('-Mo', '--Mo', type=float, default=0., help='Molybdenum wt.%%')
+    parser.add_argument('-Cr', '--Cr', type=float, default=0., help='Chromium wt.%%')
+    parser.add_argument('-V', '--V', type=float, default=0., help='Vanadium wt.%%')
+    parser.add_argument('-Co', '--Co', type=float, default=0., help='Cobalt wt.%%')
+    parser.add_argument('-Cu', '--Cu', type=float, default=0., help='Copper wt.%%')
+    parser.add_argument('-Al', '--Al', type=float, default=0., help='Aluminium wt.%%')
+    parser.add_argument('-W', '--W', type=float, default=0., help='Tungsten wt.%%')
+    parser.add_argument('-Tini', '--Tini', type=float, default=900., help='Austenitizing temperature (oC)')
+    parser.add_argument('-hjet', '--h_jet', type=float, default=1e4,
+                        help='Heat transfer coefficient of the water jet (W/m2/K)')
+    parser.add_argument('-eq', '--equations', default=None,
+                        help='Equations for Ms, Bs, Ac1 and Ac3: policy (min, max, median) or JSON profile file')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Save the figure to this file instead of showing it (no GUI needed)')
+
+    args = parser.parse_args()
+    comp = vars(args)
+    gs = comp.pop('gs')
+    Tini = comp.pop('Tini')
+    h_jet = comp.pop('h_jet')
+    equations = comp.pop('equations')
+    output = comp.pop('output')
+
+    if output:
+        # Non-interactive backend
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    # Defines alloy (grain size gs and composition)
+    alloy = Alloy(gs=gs, equations=equations, **comp)
+
+    # Initializes diagrams object
+    diagrams = TransformationDiagrams(alloy)
+
+    jominy = JominyTest(diagrams, Tini=Tini, h_jet=h_jet)
+
+    fig, ax = plt.subplots(figsize=(8, 6))
+    jominy.plot_hardness_profile(ax=ax)
+
+    if output:
+        fig.savefig(output)
+    else:
+        plt.show()
@@ -5,8 +5,10 @@
 Plot TTT (or CCT) diagram and transformed fraction
 """
 import argparse
-import matplotlib.pyplot as plt
-from transformation_models_modified import Alloy, TransformationDiagrams
+import matplotlib
+from transformation_models_modified import Alloy, TransformationDiagrams, select_equations_interactively, \
+    save_equation_profile, set_result_cache
+from cache import ResultCache
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Script for plotting phase fraction curves for a given thermal cycle',
@@ -35,6 +37,16 @@ if __name__ == '__main__':
     parser.add_argument('-Ru', '--Ru', type=float, default=0., help='Ruthenium wt.%%')
     parser.add_argument('-B', '--B', type=float, default=0., help='Boron wt.%%')
     parser.add_argument('-Fe', '--Fe', type=float, default=0., help='Iron wt.%%')
+    parser.add_argument('-eq', '--equations', default=None,
+                        help='Equations for Ms, Bs, Ac1 and Ac3: policy (min, max, median) or JSON profile file')
+    parser.add_argument('-i', '--interactive', action='store_true',
+                        help='Choose the equations for Ms, Bs, Ac1 and Ac3 interactively')
+    parser.add_argument('-s', '--save-equations', default=None,
+                        help='Save the chosen equations to a JSON profile file')
+    parser.add_argument('-cache', '--cache', default=None,
+                        help='Directory of the on-disk cache of critical temperatures, TTT and CCT data')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Save the figure to this file instead of showing it (no GUI needed)')
 
     args = parser.parse_args()
 
@@ -43,9 +55,28 @@ if __name__ == '__main__':
     Tini = comp.pop('Tini')
     t = comp.pop('t')
     phi = comp.pop('phi')
+    equations = comp.pop('equations')
+    interactive = comp.pop('interactive')
+    save_equations = comp.pop('save_equations')
+    cache = comp.pop('cache')
+    output = comp.pop('output')
+
+    if output:
+        # Non-interactive backend
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    if cache:
+        set_result_cache(ResultCache(directory=cache))
+
+    if interactive:
+        equations = select_equations_interactively(**comp)
 
     # Defines alloy (grain size gs and composition)
-    alloy = Alloy(gs=gs, **comp)
+    alloy = Alloy(gs=gs, equations=equations, **comp)
+
+    if save_equations:
+        save_equation_profile(save_equations, alloy.equations)
 
     # Initializes diagrams object
     diagrams = TransformationDiagrams(alloy)
@@ -74,4 +105,7 @@ if __name__ == '__main__':
     ax1.set_title('')
     ax2.set_title('')
 
-    plt.show()
+    if output:
+        fig.savefig(output)
+    else:
+        plt.show()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+#! -*- coding: utf-8 -*-
+
+"""
+Sensitivity of the predictions to the choice of the empirical equations
+of the critical temperatures Ms, Bs, Ae1 (Ac1) and Ae3 (Ac3). Every
+combination of the registered equations (or of a chosen subset) is
+evaluated in one batched run. Each transformation only depends on the
+critical temperatures that bound its range (ferrite on Ae3 and Bs,
+pearlite on Ae1 and Bs, bainite on Bs and Ms, and martensite on Ms), so
+its kinetics are calculated once for every distinct pair of equations
+and shared by all the combinations containing it; only the coupling of
+the phase fractions is evaluated for every combination
+"""
+
+import argparse
+import itertools
+import numpy as np
+from transformation_models_modified import Alloy, AlloyBatch, ResultTable, couple_phase_fractions, \
+    critical_temperature_equations, get_critical_temperature_options
+from instrumentation import timed
+from ensemble import get_TTT_nose, get_transformation_temperatures
+from export import write_tables, get_metadata
+
+elements = ['C', 'Si', 'Mn', 'Ni', 'Mo', 'Cr', 'V', 'Co', 'Cu', 'Al', 'W', 'N', 'Nb', 'Ti', 'B']
+kinds = list(critical_temperature_equations)
+phases = ['ferrite', 'pearlite', 'bainite']
+# Critical temperatures bounding the range of each transformation
+phase_temperatures = dict(ferrite=('Ae3', 'Bs'), pearlite=('Ae1', 'Bs'), bainite=('Bs', 'Ms'), martensite=('Ms',))
+
+
+def get_equation_combinations(equations=None):
+    """
+    Returns all the combinations of equations of the critical temperatures
+
+    Parameters
+    ----------
+    equations : dict (optional)
+        Equation names to be combined for each critical temperature
+        ('Ms', 'Bs', 'Ae1', 'Ae3'). Missing critical temperatures take
+        all the registered equations
+        Default: None (all registered equations)
+
+    Returns
+    -------
+    combinations : dict
+        Dictionary with one array of equation names per critical
+        temperature, with one entry per combination
+    """
+    choices = {kind: list(critical_temperature_equations[kind]) for kind in kinds}
+    for kind, names in (equations or {}).items():
+        if kind not in choices:
+            raise ValueError('Unknown critical temperature `{}`. Valid options are: {}'.format(
+                kind, ', '.join(kinds)))
+        for name in names:
+            if name not in critical_temperature_equations[kind]:
+                raise ValueError('Unknown {} equation `{}`. Valid options are: {}'.format(
+                    kind, name, ', '.join(critical_temperature_equations[kind])))
+        choices[kind] = list(names)
+
+    combinations = list(itertools.product(*[choices[kind] for kind in kinds]))
+    return {kind: np.array([combination[i] for combination in combinations]) for i, kind in enumerate(kinds)}
+
+
+class EquationSensitivity:
+    """
+    Evaluation of one alloy with every combination of equations of the
+    critical temperatures
+
+    Parameters
+    ----------
+    gs : float
+        ASTM grain size number
+    equations : dict (optional)
+        Subset of equations of each critical temperature (see
+        `get_equation_combinations`)
+        Default: None (all registered equations, 1260 combinations)
+    **w :
+        Composition in wt.%
+
+    Example
+    -------
+    >>> sensitivity = EquationSensitivity(7, C=.4, Mn=.85, Cr=1.)
+    >>> results = sensitivity.get_results([1, 10, 100])
+    >>> print(rank_equations(results).to_dataframe())
+    """
+
+    def __init__(self, gs, equations=None, **w):
+        self.gs = gs
+        self.w = w
+        # Alloy with the default equations; hardness does not depend on the
+        # critical temperatures
+        self.alloy = Alloy(gs=gs, **w)
+        self.combinations = get_equation_combinations(equations)
+        self.options = {kind: {name: float(value) for name, value in
+                               get_critical_temperature_options(kind, **w).items()} for kind in kinds}
+
+    def __len__(self):
+        return len(self.combinations['Ms'])
+
+    def get_batch(self, selection, repeat=1):
+        """
+        Returns an AlloyBatch with one copy of the alloy per entry of
+        selection, whose critical temperatures are calculated by the
+        selected equations
+
+        Parameters
+        ----------
+        selection : dict
+            Arrays of equation names of some critical temperatures
+        repeat : int (optional)
+            Number of consecutive copies of each entry
+            Default: 1
+        """
+        selection = {kind: np.repeat(names, repeat) for kind, names in selection.items()}
+        size = len(next(iter(selection.values())))
+        comp = np.repeat([list(self.w.values())], size, axis=0)
+        batch = AlloyBatch(self.gs, comp, list(self.w))
+        for kind, names in selection.items():
+            setattr(batch, kind, np.array([self.options[kind][name] for name in names]))
+        return batch
+
+    def get_distinct(self, phase):
+        """
+        Returns the distinct selections of the equations that bound the
+        range of phase (dict of arrays) and the index of the selection of
+        each combination
+        """
+        codes = np.column_stack([np.unique(self.combinations[kind], return_inverse=True)[1]
+                                 for kind in phase_temperatures[phase]])
+        _, first, inverse = np.unique(codes, axis=0, return_index=True, return_inverse=True)
+        return {kind: self.combinations[kind][first] for kind in phase_temperatures[phase]}, inverse.ravel()
+
+    @timed('sensitivity')
+    def get_results(self, cooling_rates=(1., 10., 100.), Tini=900, Tfin=25, fs=1e-2, ff=.99, n=1000,
+                    chunk_size=1024):
+        """
+        Evaluates every combination of equations
+
+        Parameters
+        ----------
+        cooling_rates : iterable (optional)
+            Cooling rates (oC/s) of linear cooling from Tini to Tfin
+            Default: (1, 10, 100)
+        Tini : float (optional)
+            Initial temperature
+            Default: 900
+        Tfin : float (optional)
+            Final temperature
+            Default: 25
+        fs : float (optional)
+            Transformation start phase fraction
+            Default: 1e-2 (1%)
+        ff : float (optional)
+            Transformation finish phase fraction
+            Default: .99 (99%)
+        n : int (optional)
+            Number of points of the temperature grid of the phase fractions
+            Default: 1000
+        chunk_size : int (optional)
+            Maximum number of thermal cycles coupled at once
+            Default: 1024
+
+        Returns
+        -------
+        results : ResultTable object
+            Table with one row per combination and cooling rate: equation
+            of each critical temperature (Ms_equation, etc.), critical
+            temperatures, TTT nose, critical cooling rates, CCT start and
+            finish temperatures and times (same columns as `sweep.py`),
+            final phase fractions, and hardness
+        """
+        cooling_rates = np.atleast_1d(np.asarray(cooling_rates, dtype=float))
+        m = len(cooling_rates)
+        T = np.linspace(Tini, Tfin, n)
+        t = (Tini - T)/cooling_rates[:, None]
+
+        def per_combination(value):
+            return np.repeat(value, m)
+
+        columns = {kind + '_equation': per_combination(self.combinations[kind]) for kind in kinds}
+        for kind in ['Ae1', 'Ae3', 'Bs', 'Ms']:
+            columns[kind] = per_combination([self.options[kind][name] for name in self.combinations[kind]])
+
+        # Kinetics of every distinct range of each transformation, shared by
+        # all the combinations with the same range
+        noses, critical_rates, temperatures, uncoupled = {}, {}, {}, {}
+        for name in phases:
+            selection, inverse = self.get_distinct(name)
+            phase = self.get_batch(selection).get_phase_transformations()[name]
+            nose_T, nose_t = get_TTT_nose(phase, fs)
+            noses['nose_T_' + name] = per_combination(nose_T[inverse])
+            noses['nose_t_' + name] = per_combination(nose_t[inverse])
+            critical_rates['critical_rate_' + name] = per_combination(
+                phase.get_critical_cooling_rate(fs, Tini)[inverse])
+            temperatures[name] = [T_f[:, inverse].T.ravel() for T_f in
+                                  get_transformation_temperatures(phase, cooling_rates, [fs, ff], Tini, Tfin)]
+
+            # Phase fractions with one row per distinct range and cooling rate
+            rows = self.get_batch(selection, m).get_phase_transformations()[name]
+            f = rows.get_sampled_fraction(np.tile(t, (len(phase.Ts), 1)), T)
+            uncoupled[name] = f.reshape(-1, m, n), inverse
+
+        selection, inverse = self.get_distinct('martensite')
+        martensite = self.get_batch(selection).get_phase_transformations()['martensite']
+        uncoupled['martensite'] = martensite.get_sampled_fraction(t[0], T)[:, None, :], inverse
+
+        columns.update(noses)
+        columns.update(critical_rates)
+        columns['cooling_rate'] = np.tile(cooling_rates, len(self))
+        for name in phases:
+            columns['Ts_' + name], columns['Tf_' + name] = temperatures[name]
+            columns['ts_' + name] = (Tini - columns['Ts_' + name])/columns['cooling_rate']
+            columns['tf_' + name] = (Tini - columns['Tf_' + name])/columns['cooling_rate']
+
+        # Coupling of the shared uncoupled fractions for every combination
+        step = max(1, chunk_size//m)
+        x = np.empty((len(self), m, 4))
+        for start in range(0, len(self), step):
+            sel = slice(start, start + step)
+            f = [np.broadcast_to(f[inverse[sel]], (len(inverse[sel]), m, n))
+                 for f, inverse in (uncoupled[name] for name in phases + ['martensite'])]
+            x[sel] = couple_phase_fractions(*f)[..., -1, :]
+
+        # Rounded like in TransformationDiagrams.get_family_fractions
+        for i, name in enumerate(phases + ['martensite']):
+            columns[name] = x[..., i].ravel().round(12) + 0.
+        columns['austenite'] = (1. - x.sum(axis=-1).ravel()).round(12) + 0.
+        Hv = x[..., 3]*self.alloy.Hv_martensite(cooling_rates) + x[..., 2]*self.alloy.Hv_bainite(cooling_rates) + \
+            (x[..., 0] + x[..., 1])*self.alloy.Hv_ferrite_pearlite(cooling_rates)
+        columns['Hv'] = Hv.ravel()
+
+        meta = dict(composition=self.alloy.get_composition(), gs=self.gs, Tini=Tini, Tfin=Tfin, fs=fs, ff=ff, n=n,
+                    combinations=len(self))
+        return ResultTable(meta=meta, **columns)
+
+
+def rank_equations(results, quantities=None, by='cooling_rate'):
+    """
+    Ranks how much the choice of the equation of each critical temperature
+    moves each prediction. For every quantity, the results are grouped by
+    the equation of the critical temperature and averaged over the
+    choices of the other equations (main effect); the effect of the
+    critical temperature is the range of these averages
+
+    Parameters
+    ----------
+    results : ResultTable object
+        Results of `EquationSensitivity.get_results`
+    quantities : iterable (optional)
+        Columns ranked
+        Default: None (all numeric columns)
+    by : string (optional)
+        Column by which the rows are grouped. Quantities that do not
+        depend on it are ranked once, with NaN in the column `by`
+        Default: 'cooling_rate'
+
+    Returns
+    -------
+    ranking : ResultTable object
+        Table in long format with one row per quantity (and value of
+        `by`) and critical temperature that moves it, sorted by rank.
+        Columns: quantity,
+        `by`, critical temperature (kind), rank (1 for the largest
+        effect), effect (range of the averages), share (effect relative to
+        the range of the quantity over all the combinations), and the
+        equations giving the lowest and the highest average
+    """
+    varied = [kind for kind in kinds if len(np.unique(results[kind + '_equation'])) > 1]
+    if quantities is None:
+        quantities = [key for key in results.columns if key != by and not key.endswith('_equation')]
+
+    groups = np.unique(results[by])
+    masks = [results[by] == value for value in groups]
+    columns = dict(quantity=[], **{by: []}, kind=[], rank=[], effect=[], share=[], lowest=[], highest=[])
+
+    def add(quantity, value, mask):
+        values = np.asarray(results[quantity][mask], dtype=float)
+        finite = np.isfinite(values)
+        if not np.any(finite):
+            return
+        total = values[finite].max() - values[finite].min()
+        rows = []
+        for kind in varied:
+            equations = results[kind + '_equation'][mask]
+            names = np.unique(equations)
+            with np.errstate(invalid='ignore'):
+                means = np.array([values[(equations == name) & finite].mean()
+                                  if np.any((equations == name) & finite) else np.nan for name in names])
+            valid = ~np.isnan(means)
+            # Critical temperatures that do not move the quantity are left
+            # out of the ranking
+            if np.any(valid) and means[valid].max() > means[valid].min():
+                rows.append((kind, means[valid].max() - means[valid].min(),
+                             names[np.nanargmin(means)], names[np.nanargmax(means)]))
+        rows.sort(key=lambda row: -row[1])
+        for rank, (kind, effect, lowest, highest) in enumerate(rows, 1):
+            columns['quantity'].append(quantity)
+            columns[by].append(value)
+            columns['kind'].append(kind)
+            columns['rank'].append(rank)
+            columns['effect'].append(effect)
+            columns['share'].append(effect/total if total > 0 else 0.)
+            columns['lowest'].append(lowest)
+            columns['highest'].append(highest)
+
+    for quantity in quantities:
+        values = np.asarray(results[quantity], dtype=float)
+        if all(np.array_equal(values[masks[0]], values[mask], equal_nan=True) for mask in masks[1:]):
+            add(quantity, np.nan, masks[0])
+        else:
+            for value, mask in zip(groups, masks):
+                add(quantity, value, mask)
+
+    return ResultTable(meta=dict(results.meta, varied=varied), **columns)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sensitivity of TTT/CCT characteristic times, final phase '
+                                     'fractions and hardness to the equations of Ms, Bs, Ac1 and Ac3, '
+                                     'evaluating every combination of equations in one batched run',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('-g', '--gs', type=float, default=7, help='ASTM grain size number')
+    for element in elements:
+        parser.add_argument('-' + element, '--' + element, type=float, default=0., help='{} wt.%%'.format(element))
+    for kind in kinds:
+        parser.add_argument('--' + kind, dest='eq_' + kind, nargs='+', default=None,
+                            choices=list(critical_temperature_equations[kind]),
+                            help='Subset of {} equations (default: all)'.format(kind))
+    parser.add_argument('-phi', '--phi', nargs='+', type=float, default=[1., 10., 100.],
+                        help='Cooling rates (oC/s)')
+    parser.add_argument('-Tini', '--Tini', type=float, default=900., help='Initial temperature (oC)')
+    parser.add_argument('-Tfin', '--Tfin', type=float, default=25., help='Final temperature of the cooling (oC)')
+    parser.add_argument('-q', '--quantities', nargs='+', default=None, help='Quantities ranked (default: all)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Save the results of every combination (.csv, .parquet, .arrow or .npz)')
+    parser.add_argument('-r', '--ranking', default=None,
+                        help='Save the ranking table (.csv, .parquet, .arrow or .npz)')
+
+    args = parser.parse_args()
+
+    comp = {element: getattr(args, element) for element in elements if getattr(args, element) != 0}
+    equations = {kind: getattr(args, 'eq_' + kind) for kind in kinds if getattr(args, 'eq_' + kind)}
+    sensitivity = EquationSensitivity(args.gs, equations, **comp)
+
+    results = sensitivity.get_results(args.phi, args.Tini, args.Tfin)
+    ranking = rank_equations(results, args.quantities)
+    print('{} combinations of equations'.format(len(sensitivity)))
+    print(ranking.to_dataframe().to_string(index=False))
+
+    meta = get_metadata('sensitivity', [], **results.meta)
+    if args.output:
+        write_tables(args.output, [results], meta=meta)
+    if args.ranking:
+        write_tables(args.ranking, [ranking], meta=meta)
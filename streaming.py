@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+#! -*- coding: utf-8 -*-
+
+"""
+Incremental tracking of the phase fractions and hardness from a stream of
+temperature samples (e.g., thermocouple readings on a quench line). The
+tracker only keeps the accumulated nucleation time of each diffusional
+transformation and the coupled phase fractions of the last sample, so
+every new sample is processed in constant time. The coroutines at the end
+of the module feed the tracker from a socket or from a file that is being
+written (tail -f)
+"""
+
+import asyncio
+import argparse
+import numpy as np
+from transformation_models_modified import Alloy, TransformationDiagrams, ResultTable, couple_phase_fractions
+
+phases = ['ferrite', 'pearlite', 'bainite', 'martensite']
+
+
+class PhaseFractionTracker:
+    """
+    Incremental phase fraction model. The samples (t, T) are integrated
+    with the same rule as `TransformationDiagrams.get_sampled_fraction`,
+    so the tracked fractions are equal to those calculated from the
+    complete history of samples
+
+    Parameters
+    ----------
+    diagrams : TransformationDiagrams object
+        Transformation model of the alloy
+
+    Example
+    -------
+    >>> tracker = PhaseFractionTracker(TransformationDiagrams(alloy))
+    >>> for t, T in readings:
+    ...     state = tracker.update(t, T)
+    ...     print(state['martensite'], state['Hv'])
+    """
+
+    def __init__(self, diagrams):
+        self.diagrams = diagrams
+        self.diffusional = [diagrams.ferrite, diagrams.pearlite, diagrams.bainite]
+        self.reset()
+
+    def __repr__(self):
+        return 'PhaseFractionTracker(samples={}, t={}, T={})'.format(self.samples, self.t, self.T)
+
+    def reset(self):
+        """
+        Clears the state, to start tracking a new thermal cycle
+        """
+        self.samples = 0
+        self.t = None
+        self.T = None
+        # Accumulated nucleation time (see get_nucleation_time) of ferrite,
+        # pearlite, and bainite
+        self.nucleation_time = np.zeros(3)
+        # Uncoupled and coupled phase fractions of the last sample
+        self.f = np.zeros(4)
+        self.x = np.zeros(4)
+        self.phi700 = None
+        self.cooling_rate = np.nan
+
+    def get_increments(self, T, dt):
+        """
+        Returns the increments dt/F(T) of the nucleation time of the
+        diffusional transformations active at the temperature T
+        """
+        inc = np.zeros(3)
+        for i, phase in enumerate(self.diffusional):
+            if phase.Tf < T < phase.Ts:
+                with np.errstate(divide='ignore', over='ignore'):
+                    inc[i] = dt/phase.get_transformation_factor(T)
+        return inc
+
+    def update(self, t, T):
+        """
+        Advances the model to the new sample
+
+        Parameters
+        ----------
+        t : float
+            Time. Samples not later than the previous one are ignored
+        T : float
+            Temperature at the instant of time t
+
+        Returns
+        -------
+        state : dict
+            Current state (see `get_state`)
+        """
+        t, T = float(t), float(T)
+        if self.samples == 0:
+            # Fraction transformed before t (see get_nucleation_time)
+            self.nucleation_time = self.get_increments(T, t)
+        else:
+            dt = t - self.t
+            if not dt > 0:
+                return self.get_state()
+            if self.samples == 1:
+                # The first sample takes the time increment of the second one
+                self.nucleation_time += self.get_increments(self.T, dt)
+            self.nucleation_time += self.get_increments(T, dt)
+
+            self.cooling_rate = (self.T - T)/dt
+            if self.phi700 is None and self.T > 700. >= T and self.cooling_rate > 0:
+                self.phi700 = self.cooling_rate
+
+        f = np.empty(4)
+        for i, phase in enumerate(self.diffusional):
+            f[i] = phase.get_fraction(self.nucleation_time[i:i+1])[0]
+        f[3] = self.diagrams.martensite.get_sampled_fraction(t, T)
+
+        if self.samples == 0:
+            self.x = f.copy()
+        else:
+            self.x = couple_phase_fractions(*np.stack([self.f, f]).T, x0=self.x)[-1]
+
+        self.f = f
+        self.t, self.T = t, T
+        self.samples += 1
+        return self.get_state()
+
+    def extend(self, t, T):
+        """
+        Advances the model through several samples
+
+        Parameters
+        ----------
+        t : iterable
+            Time
+        T : iterable
+            Temperatures at the instants of time t
+
+        Returns
+        -------
+        states : ResultTable object
+            Table with the state after each sample
+        """
+        states = [self.update(t_, T_) for t_, T_ in zip(t, T)]
+        return ResultTable(**{key: np.array([state[key] for state in states])
+                              for key in (states[0] if states else self.get_state())})
+
+    def get_state(self):
+        """
+        Returns the current state
+
+        Returns
+        -------
+        state : dict
+            Dictionary with the time t, temperature T, phase fractions of
+            ferrite, pearlite, bainite, martensite, and austenite, cooling
+            rate at 700 oC (phi700) and Vickers hardness (Hv). Until the
+            thermal cycle cools below 700 oC, the hardness is predicted
+            with the current cooling rate (NaN if not cooling)
+        """
+        state = dict(t=self.t, T=self.T)
+        state.update(zip(phases, self.x.tolist()))
+        state['austenite'] = float(1. - self.x.sum())
+
+        phi700 = self.phi700 if self.phi700 is not None else self.cooling_rate
+        state['phi700'] = self.phi700 if self.phi700 is not None else np.nan
+        state['Hv'] = np.nan
+        if phi700 > 0:
+            diagrams = self.diagrams
+            state['Hv'] = float(state['martensite']*diagrams.martensite.Hv(phi700) +
+                                state['bainite']*diagrams.bainite.Hv(phi700) +
+                                (state['ferrite'] + state['pearlite'])*diagrams.ferrite.Hv(phi700))
+        return state
+
+
+def parse_sample(line):
+    """
+    Parses a line with a sample 't, T' (separated by comma, semicolon,
+    tab or spaces). Returns None for empty, comment (#) and header lines
+    """
+    if isinstance(line, bytes):
+        line = line.decode(errors='replace')
+    fields = line.replace(',', ' ').replace(';', ' ').split()
+    if len(fields) < 2 or fields[0].startswith('#'):
+        return None
+    try:
+        return float(fields[0]), float(fields[1])
+    except ValueError:
+        return None
+
+
+async def read_lines(reader):
+    """
+    Yields the lines read from an asyncio StreamReader until EOF
+    """
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        yield line.decode(errors='replace')
+
+
+async def tail_lines(fname, follow=True, poll_interval=.1):
+    """
+    Yields the lines of a file. If follow is True, waits for new lines
+    appended to the file (like tail -f) instead of stopping at the end
+
+    Parameters
+    ----------
+    fname : string
+        File name
+    follow : bool (optional)
+        Whether to wait for new lines
+        Default: True
+    poll_interval : float (optional)
+        Time (s) between checks for new lines
+        Default: 0.1
+    """
+    with open(fname, 'r') as f:
+        partial = ''
+        while True:
+            line = f.readline()
+            if line:
+                partial += line
+                if partial.endswith('\n'):
+                    yield partial
+                    partial = ''
+            elif follow:
+                await asyncio.sleep(poll_interval)
+            else:
+                if partial:
+                    yield partial
+                break
+
+
+async def track(tracker, lines):
+    """
+    Feeds the tracker with the samples parsed from an asynchronous
+    iterable of lines (e.g., `read_lines` or `tail_lines`) and yields the
+    state after each sample
+    """
+    async for line in lines:
+        sample = parse_sample(line)
+        if sample is not None:
+            yield tracker.update(*sample)
+
+
+async def track_socket(tracker, host, port):
+    """
+    Connects to a TCP server sending one sample per line and yields the
+    state of the tracker after each sample
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        async for state in track(tracker, read_lines(reader)):
+            yield state
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def main(tracker, source, every=1):
+    """
+    Prints the state of the tracker every `every` samples read from
+    source
+    """
+    keys = ['t', 'T'] + phases + ['austenite', 'Hv']
+    print(' '.join('{:>10s}'.format(key) for key in keys))
+    async for state in source:
+        if tracker.samples % every == 0:
+            print(' '.join('{:>10.4g}'.format(state[key]) for key in keys), flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Live tracking of phase fractions and hardness from a stream of '
+                                     'temperature samples (one "t, T" pair per line)',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('-f', '--file', default=None, help='File with the samples')
+    source.add_argument('--host', default=None, help='Host of the TCP server sending the samples')
+    parser.add_argument('--port', type=int, default=5000, help='Port of the TCP server')
+    parser.add_argument('--follow', action='store_true', help='Keep waiting for new lines appended to the file')
+    parser.add_argument('--every', type=int, default=1, help='Print the state every this number of samples')
+    parser.add_argument('-g', '--gs', type=float, default=7, help='ASTM grain size number')
+    for element in ['C', 'Si', 'Mn', 'Ni', 'Mo', 'Cr', 'V', 'Co', 'Cu', 'Al', 'W', 'N', 'Nb', 'Ti', 'B']:
+        parser.add_argument('-' + element, '--' + element, type=float, default=0., help='{} wt.%%'.format(element))
+    parser.add_argument('-eq', '--equations', default=None,
+                        help='Equations for Ms, Bs, Ac1 and Ac3: policy (min, max, median) or JSON profile file')
+
+    args = parser.parse_args()
+
+    comp = {key: value for key, value in vars(args).items()
+            if key not in ['file', 'host', 'port', 'follow', 'every', 'gs', 'equations']}
+    tracker = PhaseFractionTracker(TransformationDiagrams(Alloy(gs=args.gs, equations=args.equations, **comp)))
+
+    if args.file:
+        stream = track(tracker, tail_lines(args.file, follow=args.follow))
+    else:
+        stream = track_socket(tracker, args.host, args.port)
+
+    try:
+        asyncio.run(main(tracker, stream, args.every))
+    except KeyboardInterrupt:
+        pass
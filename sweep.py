@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+#! -*- coding: utf-8 -*-
+
+"""
+Parameter sweep over composition, grain size, austenitizing temperature
+and cooling rate. The alloys are evaluated in parallel by a pool of
+processes and the results are written as a tidy table, with one row per
+alloy, austenitizing temperature and cooling rate
+"""
+
+import os
+import argparse
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from transformation_models_modified import Alloy, TransformationDiagrams, ResultTable, resolve_equations
+from export import write_tables, get_metadata
+
+elements = ['C', 'Si', 'Mn', 'Ni', 'Mo', 'Cr', 'V', 'Co', 'Cu', 'Al', 'W', 'N', 'Nb', 'Ti', 'B']
+phases = ['ferrite', 'pearlite', 'bainite']
+
+
+def parse_values(values):
+    """
+    Parses the values of a sweep parameter. Each value is either a number
+    or a range 'start:stop:num' of num evenly spaced numbers
+
+    Parameters
+    ----------
+    values : string or list of strings
+        Values
+
+    Returns
+    -------
+    values : array
+        Parsed values
+    """
+    if isinstance(values, str):
+        values = [values]
+
+    parsed = []
+    for value in values:
+        for item in str(value).split(','):
+            if ':' in item:
+                start, stop, num = item.split(':')
+                parsed.extend(np.linspace(float(start), float(stop), int(num)))
+            elif item:
+                parsed.append(float(item))
+    return np.array(parsed)
+
+
+def build_cases(grid, samples=None, seed=None):
+    """
+    Builds the list of cases (alloy and austenitizing temperature) of the
+    sweep
+
+    Parameters
+    ----------
+    grid : dict
+        Values of each parameter ('gs', 'Tini', and the alloying elements)
+    samples : int (optional)
+        If None, all the combinations of the values in grid (full
+        factorial) are evaluated. Otherwise, number of cases sampled
+        uniformly between the minimum and maximum values of each parameter
+        Default: None
+    seed : int (optional)
+        Seed of the random number generator used for sampling
+        Default: None
+
+    Returns
+    -------
+    cases : list
+        List of dictionaries with the parameters of each case
+    """
+    names = list(grid)
+    if samples is None:
+        combinations = itertools.product(*[grid[name] for name in names])
+    else:
+        rng = np.random.default_rng(seed)
+        columns = [rng.uniform(np.min(grid[name]), np.max(grid[name]), samples) for name in names]
+        combinations = zip(*columns)
+
+    return [{name: float(value) for name, value in zip(names, values)} for values in combinations]
+
+
+def evaluate_case(case, cooling_rates, fs=1e-2, ff=.99, Tfin=25, n=1000, equations=None):
+    """
+    Evaluates one case for all the cooling rates
+
+    Parameters
+    ----------
+    case : dict
+        Grain size ('gs'), austenitizing temperature ('Tini'), and
+        composition of the alloy
+    cooling_rates : array
+        Cooling rates (oC/s)
+    fs : float (optional)
+        Transformation start phase fraction
+        Default: 1e-2 (1%)
+    ff : float (optional)
+        Transformation finish phase fraction
+        Default: .99 (99%)
+    Tfin : float (optional)
+        Final temperature of the cooling (oC)
+        Default: 25
+    n : int (optional)
+        Number of points of the temperature grid of the phase fractions
+        Default: 1000
+    equations : None, string or dict (optional)
+        Equations of the critical temperatures (see `Alloy`)
+        Default: None
+
+    Returns
+    -------
+    columns : dict
+        Dictionary of arrays with one entry for each cooling rate. It
+        contains the parameters of the case, the critical temperatures,
+        the TTT nose (temperature and start time) and the CCT start and
+        finish temperatures and times of ferrite, pearlite and bainite,
+        and the final phase fractions and hardness
+    """
+    case = dict(case)
+    gs = case.pop('gs')
+    Tini = case.pop('Tini')
+    alloy = Alloy(gs=gs, equations=equations, **case)
+    diagrams = TransformationDiagrams(alloy)
+    m = len(cooling_rates)
+
+    columns = {key: np.full(m, value) for key, value in case.items()}
+    columns.update(gs=np.full(m, gs), Tini=np.full(m, Tini))
+    for key in ['Ae1', 'Ae3', 'Bs', 'Ms']:
+        columns[key] = np.full(m, getattr(alloy, key))
+
+    for name in phases:
+        phase = getattr(diagrams, name)
+
+        # TTT nose: minimum start time between Tf and Ts
+        T = np.arange(phase.Tf, phase.Ts)
+        nose_T, nose_t = np.nan, np.nan
+        if len(T) > 0:
+            ts = phase.get_transformation_time(T, fs)
+            nose_T, nose_t = T[np.argmin(ts)], np.min(ts)
+        columns['nose_T_' + name] = np.full(m, nose_T)
+        columns['nose_t_' + name] = np.full(m, nose_t)
+
+        # CCT start and finish temperatures and times
+        Ts, Tf = phase.get_kinetic_integral(phase.Tf).get_transformation_temperature(cooling_rates, [fs, ff], Tini)
+        columns['Ts_' + name] = Ts
+        columns['Tf_' + name] = Tf
+        columns['ts_' + name] = (Tini - Ts)/cooling_rates
+        columns['tf_' + name] = (Tini - Tf)/cooling_rates
+
+    f = diagrams.get_CCT_fractions(cooling_rates, Tini, Tfin, n)
+    for key in f.columns:
+        columns[key] = f[key]
+
+    return columns
+
+
+def evaluate_chunk(cases, cooling_rates, **kwargs):
+    """
+    Evaluates a chunk of cases. This is the task run by each process
+
+    Returns
+    -------
+    columns : dict
+        Dictionary of arrays with the concatenated results of the cases
+    """
+    results = [evaluate_case(case, cooling_rates, **kwargs) for case in cases]
+    return {key: np.concatenate([result[key] for result in results]) for key in results[0]}
+
+
+def run_sweep(cases, cooling_rates, workers=None, chunk_size=16, **kwargs):
+    """
+    Evaluates all the cases of the sweep in parallel. The cases are
+    submitted to a ProcessPoolExecutor in chunks of chunk_size, with at
+    most two chunks per process in flight
+
+    Parameters
+    ----------
+    cases : list
+        List of cases (see `build_cases`)
+    cooling_rates : iterable
+        Cooling rates (oC/s)
+    workers : int (optional)
+        Number of processes. If 1, the cases are evaluated in the current
+        process
+        Default: None (number of processors)
+    chunk_size : int (optional)
+        Number of cases in each task
+        Default: 16
+    **kwargs :
+        Optional arguments passed to `evaluate_case`
+
+    Returns
+    -------
+    results : ResultTable object
+        Table with one row per case and cooling rate
+    """
+    cooling_rates = np.atleast_1d(np.asarray(cooling_rates, dtype=float))
+    if 'equations' in kwargs:
+        # Profile files are read once, not by every process
+        kwargs['equations'] = resolve_equations(kwargs['equations'])
+
+    chunks = [cases[i:i + chunk_size] for i in range(0, len(cases), chunk_size)]
+    results = [None]*len(chunks)
+
+    if workers == 1:
+        for i, chunk in enumerate(chunks):
+            results[i] = evaluate_chunk(chunk, cooling_rates, **kwargs)
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            max_pending = 2*workers
+            pending = {}
+            for i, chunk in enumerate(chunks):
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[pending.pop(future)] = future.result()
+                pending[executor.submit(evaluate_chunk, chunk, cooling_rates, **kwargs)] = i
+            for future in wait(pending).done:
+                results[pending[future]] = future.result()
+
+    meta = {key: kwargs[key] for key in ['fs', 'ff', 'Tfin', 'n', 'equations'] if key in kwargs}
+    if len(results) == 0:
+        return ResultTable(meta=meta)
+    return ResultTable(meta=meta, **{key: np.concatenate([result[key] for result in results])
+                                     for key in results[0]})
+
+
+def write_results(results, fname):
+    """
+    Writes the results to a CSV, Parquet, Arrow IPC, .npz (see `export`)
+    or Excel file, according to the extension of fname
+    """
+    if fname.endswith('.xlsx'):
+        results.to_dataframe().to_excel(fname, index=False)
+    else:
+        meta = get_metadata('sweep', [], **results.meta)
+        write_tables(fname, [results], meta=meta)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Script for sweeping composition, grain size, austenitizing '
+                                     'temperature and cooling rate. Values are given as numbers or ranges '
+                                     'start:stop:num',
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument('-g', '--gs', nargs='+', default=['7'], help='ASTM grain size number')
+    parser.add_argument('-Tini', '--Tini', nargs='+', default=['900'], help='Austenitizing temperature (oC)')
+    parser.add_argument('-phi', '--phi', nargs='+', default=['0.1', '1', '10', '100'], help='Cooling rates (oC/s)')
+    for element in elements:
+        parser.add_argument('-' + element, '--' + element, nargs='+', default=None,
+                            help='{} wt.%%'.format(element))
+    parser.add_argument('-n', '--samples', type=int, default=None,
+                        help='Number of cases sampled uniformly between the minimum and maximum values of '
+                        'each parameter. If not given, the full grid is evaluated')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the random sampling')
+    parser.add_argument('-fs', '--fs', type=float, default=1e-2, help='Transformation start phase fraction')
+    parser.add_argument('-ff', '--ff', type=float, default=.99, help='Transformation finish phase fraction')
+    parser.add_argument('-Tfin', '--Tfin', type=float, default=25., help='Final temperature of the cooling (oC)')
+    parser.add_argument('-eq', '--equations', default=None,
+                        help='Equations for Ms, Bs, Ac1 and Ac3: policy (min, max, median) or JSON profile file')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Number of processes')
+    parser.add_argument('-c', '--chunk-size', type=int, default=16, help='Number of cases per task')
+    parser.add_argument('-o', '--output', default='sweep.csv',
+                        help='Output file (.csv, .parquet, .arrow, .npz or .xlsx)')
+
+    args = parser.parse_args()
+
+    grid = dict(gs=parse_values(args.gs), Tini=parse_values(args.Tini))
+    for element in elements:
+        values = getattr(args, element)
+        if values is not None:
+            grid[element] = parse_values(values)
+
+    cases = build_cases(grid, args.samples, args.seed)
+    results = run_sweep(cases, parse_values(args.phi), workers=args.workers, chunk_size=args.chunk_size,
+                        fs=args.fs, ff=args.ff, Tfin=args.Tfin, equations=args.equations)
+    write_results(results, args.output)
+    print('{} cases x {} cooling rates written to {}'.format(len(cases), len(parse_values(args.phi)),
+                                                             args.output))
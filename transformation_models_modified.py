@@ -1,16 +1,45 @@
 #! -*- coding: utf-8 -*-
 
+import os
+import copy
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 from abc import abstractmethod
-from scipy import integrate
-from scipy.interpolate import splrep, splev, interp1d
-from scipy.optimize import root
+from cache import make_key, get_function_fingerprint
+from instrumentation import timed, timer, count, warn
+
+# matplotlib, pandas and scipy are imported by the functions that use them,
+# so that importing this module and computing data stay light
 
 R = 8.314459
 K = 273.15
 
+# Cache of critical temperatures, TTT and CCT data (ResultCache object, see
+# cache.py). None disables caching
+result_cache = None
+
+
+def set_result_cache(cache):
+    """
+    Sets the cache of critical temperatures, TTT and CCT data
+
+    Parameters
+    ----------
+    cache : ResultCache object or None
+        Cache. If None, caching is disabled
+    """
+    global result_cache
+    result_cache = cache
+
+
+def get_cached(kind, compute, **params):
+    """
+    Returns compute() through the result cache, if set, using the hash of
+    kind and params as key
+    """
+    if result_cache is None:
+        return compute()
+    return result_cache.get_or_compute(make_key(kind, **params), compute)
+
 
 def FahrenheitToCelsius(TF):
     """
@@ -230,348 +259,1439 @@ def Hv_ferrite_pearlite(phi700, **comp):
         (10 - 19*Si + 4*Ni + 8*Cr + 130*V)*np.log10(phi700*3600)
 
 
-class Alloy:
+# Registry of empirical equations for the critical temperatures. Each entry
+# maps the equation name to a function of the composition (wt.%) with the
+# same signature as the functions above, so new equations can be plugged in
+# with the `register_equation` decorator
+critical_temperature_equations = dict(Ms={}, Bs={}, Ae1={}, Ae3={})
+
+# Policy used when no equation is specified for a critical temperature.
+# Reproduces the fallback of the former interactive selection
+default_equations = dict(Ms='min', Bs='min', Ae1='min', Ae3='max')
+
+# Aggregating policies accepted in place of an equation name
+selection_policies = dict(min=np.min, max=np.max, median=np.median)
+
+# Fingerprints of the registered equations (see `get_equation_fingerprints`)
+equation_fingerprints = {}
+
+
+def register_equation(kind, name):
     """
-    Alloy properties (composition in wt.% and prior austenite grain size)
+    Decorator that registers an empirical equation for the critical
+    temperature `kind` ('Ms', 'Bs', 'Ae1' or 'Ae3') under `name`
     """
+    if kind not in critical_temperature_equations:
+        raise ValueError('Unknown critical temperature `{}`. Valid options are: {}'.format(
+            kind, ', '.join(critical_temperature_equations)))
 
-    def __init__(self, gs, **w):
-        # Grain size
-        self.gs = gs
-
-        # Alloy composition
-        self.w = w
-        # Main elements
-        self.C = w.get('C', 0)
-        self.Mn = w.get('Mn', 0)
-        self.Si = w.get('Si', 0)
-        self.Ni = w.get('Ni', 0)
-        self.Cr = w.get('Cr', 0)
-        self.Mo = w.get('Mo', 0)
-        self.Co = w.get('Co', 0)
+    def decorator(func):
+        critical_temperature_equations[kind][name] = func
+        return func
+    return decorator
 
 
 # Selección del valor de Ms usando múltiples ecuaciones
-        ms_options = {
-            'Saha': 539 - (423 * self.C) - (30.4 * self.Mn) - (17.7 * self.Ni) - (12.1 * self.Cr) - (7.5 * self.Si) - (7.5 * self.Mo) - (7.5 * w.get('W', 0)),
-            'Andrews_Corrected': 512 - (453 * self.C) - (16.9 * self.Ni) + (15 * self.Cr) - (9.5 * self.Mo) + (217 * (self.C ** 2)) - (71.5 * self.C * self.Mn) - (67.6 * self.C * self.Cr),
-            'Nehenberg': 500 - (300 * self.C) - (33 * self.Mn) - (17 * self.Ni) - (22 * self.Cr) - (11 * self.Si),
-            'Steven_Haynes': 561 - (474 * self.C) - (33 * self.Mn) - (17 * self.Ni) - (17 * self.Cr) - (21 * self.Si),
-            'Payson_Savage': ((930 - 570 * self.C - 60 * self.Mn - 50 * self.Cr - 30 * self.Ni - 20 * self.Si - 20 * self.Mo - 20 * w.get('W', 0)) - 32) / 1.8,
-            'Rowland': ((930 - 600 * self.C - 60 * self.Mn - 50 * self.Cr - 30 * self.Ni - 20 * self.Si - 20 * self.Mo - 20 * w.get('W', 0)) - 32) / 1.8,
-            'Grange_Stewart': ((1000 - 650 * self.C - 70 * self.Mn - 70 * self.Cr - 35 * self.Ni - 50 * self.Mo) - 32) / 1.8,
-            'Andrews_Empirical': 539 - 423 * self.C - 30.4 * self.Mn - 12.1 * self.Cr - 17.7 * self.Ni - 7.5 * self.Mo,
-            'Steven_Haynes2': 561 - 474 * self.C - 33 * self.Ni - 17 * self.Cr - 17 * self.Ni - 21 * self.Mo,
-        }
+@register_equation('Ms', 'Saha')
+def Ms_Saha(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    W = comp.get('W', 0)
+    return 539 - 423*C - 30.4*Mn - 17.7*Ni - 12.1*Cr - 7.5*Si - 7.5*Mo - 7.5*W
 
-        import matplotlib.pyplot as plt
-        plt.figure(figsize=(10, 6))
 
-        bars = plt.bar(ms_options.keys(), ms_options.values(), color='steelblue')
+@register_equation('Ms', 'Andrews_Corrected')
+def Ms_Andrews_Corrected(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return 512 - 453*C - 16.9*Ni + 15*Cr - 9.5*Mo + 217*C**2 - 71.5*C*Mn - 67.6*C*Cr
 
-        # Para cada barra, dibujamos un texto encima con su valor:
-        for bar in bars:
-            height = bar.get_height()
-            plt.annotate(
-                f"{height:.2f}",              # Formato con 2 decimales
-                xy=(bar.get_x() + bar.get_width()/2, height), 
-                xytext=(0, 3),               # Desplaza el texto 3 puntos arriba
-                textcoords="offset points",
-                ha='center', va='bottom'
-            )
 
-        plt.xticks(rotation=45, ha='right')
-        plt.ylabel('Ms Temperature (°C)')
-        plt.title('Seleccione una ecuación para Ms y cierre la ventana')
-        plt.tight_layout()
-        plt.grid(axis='y')
-        plt.show()
+@register_equation('Ms', 'Nehenberg')
+def Ms_Nehenberg(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    return 500 - 300*C - 33*Mn - 17*Ni - 22*Cr - 11*Si
 
-        print("Opciones de ecuaciones para calcular Ms:")
 
-        for i, key in enumerate(ms_options.keys(), 1):
-            print(f"{i}. {key}")
-        choice = input("Ingrese el nombre exacto de la ecuación para usar Ms: ").strip()
-        valid_ms = [v.real if isinstance(v, complex) else v for v in ms_options.values()]
-        self.Ms = ms_options.get(
-            choice,
-            Ms_VanBohemen(**w) if Ms_VanBohemen(**w) in ms_options.values() else min(valid_ms)
-        )
-        print(f"Ms asignado con '{choice}': {self.Ms:.2f} °C")
-
-        # ------------------------------
-        # Selección de Bs
-        bs_options = {
-
-            'Bohemen': 839 - 86 * self.Mn - 23 * self.Si - 67 * self.Cr - 75 * self.Mo - 33 * self.Ni - 270 * (1 - np.exp(-1.33 * self.C)),
-            'Steven_Hyanes': (830 - 270 * self.C - 90 * self.Mn - 37 * self.Ni - 70 * self.Cr - 83 * self.Mo),
-            'Lee_Matt': 745 - 110 * self.C - 59 * self.Mn - 39 * self.Ni - 68 * self.Cr - 106 * self.Mo + 17 * self.Ni * self.Mn + 6 * (self.Cr**2) + 29 * (self.Mo**2),
-            'Zhao1': 630 - 45 * self.Mn - 40 * w.get('V', 0) - 35 * self.Si - 30 * self.Cr - 25 * self.Mo - 20 * self.Ni - 15 * w.get('W', 0),
-            'Bodnaretal': (844 - 597 * self.C - 63 * self.Mn - 16 * self.Ni - 78 * self.Cr),
-            'Kirkaldy_Venugopalan': (656 - 57.7 * self.C - 75 * self.Si - 35 * self.Mn - 15.3 * self.Ni - 34 * self.Cr - 41.2 * self.Mo),
-            'Lee': (732 - 202 * self.C + 216 * self.Si - 85 * self.Mn - 37 * self.Ni - 47 * self.Cr - 39 * self.Mo),
-        }
-
-        plt.figure(figsize=(10, 4))
-        
-        bars = plt.bar(bs_options.keys(), bs_options.values(), color='seagreen')
-        for bar in bars:
-            height = bar.get_height()
-            plt.annotate(
-                f"{height:.2f}",
-                xy=(bar.get_x() + bar.get_width()/2, height),
-                xytext=(0, 3),
-                textcoords="offset points",
-                ha='center', va='bottom'
-            )
+@register_equation('Ms', 'Steven_Haynes')
+def Ms_Steven_Haynes(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    return 561 - 474*C - 33*Mn - 17*Ni - 17*Cr - 21*Si
 
-        plt.xticks(rotation=45, ha='right')
-        plt.ylabel('Bs Temperature (°C)')
-        plt.title('Seleccione una ecuación para Bs y cierre la ventana')
-        plt.tight_layout()
-        plt.grid(axis='y')
-        plt.show()
 
-        print("\nOpciones para Bs:")
-        for i, key in enumerate(bs_options.keys(), 1): print(f"{i}. {key}")
-        choice = input("Ingrese el nombre exacto de la ecuación para usar Bs: ").strip()
-        valid_bs = [v.real if isinstance(v, complex) else v for v in bs_options.values()]
-        self.Bs = bs_options.get(choice, min(valid_bs))
-        print(f"Bs asignado con '{choice}': {self.Bs:.2f} °C")
-
-        # ------------------------------
-        # Selección de Ac1
-        ac1_options = {
-
-            'Grange': (1333 - 25 * self.Mn + 40 * self.Si + 17.9 * self.Cr - 14.2 * self.Ni - 32) / 1.8,
-            'Andrews': 723 - 16.9 * self.Ni + 29.1 * self.Si + 6.38 * w.get('W', 0) - 10.7 * self.Mn + 16.9 * self.Cr,
-            'Eldis': (712 - 17.8 * self.Mn - 19.1 * self.Ni + 20.1 * self.Si + 11.9 * self.Cr + 9.8 * self.Mo),
-            'Hougardy': (739 - 22 * self.C + 2 * self.Si - 7 * self.Mn + 14 * self.Cr + 13 * self.Mo - 13 * self.Ni),
-            'Trzaska': 739 - 22.8 * self.C - 6.8 * self.Mn + 18.2 * self.Si + 11.7 * self.Cr - 15 * self.Ni - 6.4 * self.Mo - 5 * w.get('V', 0) - 28 * w.get('Cu', 0),
-        }
-        plt.figure(figsize=(10, 4))
-        bars = plt.bar(ac1_options.keys(), ac1_options.values(), color='orange')
+@register_equation('Ms', 'Payson_Savage')
+def Ms_Payson_Savage(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    W = comp.get('W', 0)
+    return FahrenheitToCelsius(930 - 570*C - 60*Mn - 50*Cr - 30*Ni - 20*Si - 20*Mo - 20*W)
 
-        
-        for bar in bars:
-            height = bar.get_height()
-            plt.annotate(
-                f"{height:.2f}",
-                xy=(bar.get_x() + bar.get_width()/2, height),
-                xytext=(0, 3),
-                textcoords="offset points",
-                ha='center', va='bottom'
-            )
 
-        plt.xticks(rotation=45, ha='right')
-        plt.ylabel('Ac1 Temperature (°C)')
-        plt.title('Seleccione una ecuación para Ac1 y cierre la ventana')
-        plt.tight_layout()
-        plt.grid(axis='y')
-        plt.show()
-        print("\nOpciones para Ac1:")
-        for i, key in enumerate(ac1_options.keys(), 1): print(f"{i}. {key}")
-        choice = input("Ingrese el nombre exacto de la ecuación para usar Ac1: ").strip()
-        valid_ac1 = [v.real if isinstance(v, complex) else v for v in ac1_options.values()]
-        self.Ae1 = ac1_options.get(choice, min(valid_ac1))
-        print(f"Ac1 asignado con '{choice}': {self.Ae1:.2f} °C")
-
-        # ------------------------------
-        # Selección de Ac3
-        ac3_options = {
-
-            'Kirkaldy_Baganis': (1115 - 150.3 * self.C + 216 * (0.765 - self.C) ** 4.26) - 273,
-            'Kirkaldy_Baganis3': (1127 - 179 * self.C - 14 * self.Mn - 23 * self.Cr - 15 * self.Ni + 22 * self.Si) - 273,
-            'Ouchu_Sampei': 910 - (203 * np.sqrt(abs(self.C))) + (44.7 * self.Si) - (30 * self.Mn) - (11 * self.Cr) + (31.5 * self.Mo) + (104 * w.get('V', 0)) + (400 * w.get('Al', 0)),
-            'Andrews': 910 - (203 * np.sqrt(abs(self.C))) + (44.7 * self.Si) - (30 * self.Mn) + (11 * self.Cr) + (31.5 * self.Mo) + (104 * w.get('V', 0)) - (400 * w.get('Al', 0)) - (15.2 * self.Ni) + (13.1 * w.get('W', 0)) + (20 * w.get('Cu', 0)) - (400 * w.get('Ti', 0)),        
-        }
-        plt.figure(figsize=(10, 4))
-        bars = plt.bar(ac3_options.keys(), ac3_options.values(), color='cornflowerblue')
+@register_equation('Ms', 'Rowland')
+def Ms_Rowland(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    W = comp.get('W', 0)
+    return FahrenheitToCelsius(930 - 600*C - 60*Mn - 50*Cr - 30*Ni - 20*Si - 20*Mo - 20*W)
 
-        
-        for bar in bars:
-            height = bar.get_height()
-            plt.annotate(
-                f"{height:.2f}",
-                xy=(bar.get_x() + bar.get_width()/2, height),
-                xytext=(0, 3),
-                textcoords="offset points",
-                ha='center', va='bottom'
-            )
 
-        plt.xticks(rotation=45, ha='right')
-        plt.ylabel('Ac3 Temperature (°C)')
-        plt.title('Seleccione una ecuación para Ac3 y cierre la ventana')
-        plt.tight_layout()
-        plt.grid(axis='y')
-        plt.show()
-        print("\nOpciones para Ac3:")
-        for i, key in enumerate(ac3_options.keys(), 1): print(f"{i}. {key}")
-        choice = input("Ingrese el nombre exacto de la ecuación para usar Ac3: ").strip()
-        valid_ac3 = [v.real if isinstance(v, complex) else v for v in ac3_options.values()]
-        self.Ae3 = ac3_options.get(choice, max(valid_ac3))
-        print(f"Ac3 asignado con '{choice}': {self.Ae3:.2f} °C")
+@register_equation('Ms', 'Grange_Stewart')
+def Ms_Grange_Stewart(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return FahrenheitToCelsius(1000 - 650*C - 70*Mn - 70*Cr - 35*Ni - 50*Mo)
 
-        self.FC = FC(**w)
-        self.PC = PC(**w)
-        self.BC = BC(**w)
-        # self.Ae3 = Ae3_Andrews(**w)
-        # self.Ae1 = Ae1_Andrews(**w)
-        # self.Ae3 = Ae3_Grange(**w)
-        # self.Ae1 = Ae1_Grange(**w)
-        # self.Bs = Bs_Li(**w)
-        # self.Ms = Ms_Andrews(**w)
-        # self.Bs = Bs_VanBohemen(**w)
-        
-        self.alpha_martensite = alpha_martensite_VanBohemen(**w)
 
-        # Hardness
-        self.Hv_martensite = lambda phi700: Hv_martensite(phi700, **w)
-        self.Hv_bainite = lambda phi700: Hv_bainite(phi700, **w)
-        self.Hv_ferrite_pearlite = lambda phi700: Hv_ferrite_pearlite(phi700, **w)
+@register_equation('Ms', 'Andrews_Empirical')
+def Ms_Andrews_Empirical(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return 539 - 423*C - 30.4*Mn - 12.1*Cr - 17.7*Ni - 7.5*Mo
 
-    def format_composition(self, vmin=0):
-        fmt = []
-        for k, v in self.w.items():
-            if v > vmin:
-                fmt.append('{:g}{:}'.format(v, k))
-        fmt.insert(0, 'Fe')  # assumes it is steel
-        fmt = '-'.join(fmt) + ' (wt.%)'
-        fmt += '\nASTM grain size {:}'.format(self.gs)
-        return fmt
 
+@register_equation('Ms', 'Steven_Haynes2')
+def Ms_Steven_Haynes2(**comp):
+    C = comp.get('C', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return 561 - 474*C - 33*Ni - 17*Cr - 17*Ni - 21*Mo
 
-class SigmoidalFunction(object):
-    """
-    Abstract class for S(X) and I(X) functions. Once initialized,
-    calculates values of the function for a given [xmin, xmax]
-    interval and then creates a spline interpolator. The returned
-    values are calculated by the interpolator. This method has the
-    advantage of being able to process x as an array (or any other
-    kind of iterator)
-    """
-    tck = None  # tck spline knots, coefficients and degree
-    tck_inv = None  # spline parameters of the inverse function
 
-    def __new__(cls, x):
-        """
-        __new__ behaviour is modified to return the interpolated
-        value of the function
-        """
-        if cls is SigmoidalFunction:
-            raise TypeError("Can't instantiate abstract class SigmoidalFunction")
+# Selección de Bs
+@register_equation('Bs', 'Bohemen')
+def Bs_Bohemen(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return 839 - 86*Mn - 23*Si - 67*Cr - 75*Mo - 33*Ni - 270*(1 - np.exp(-1.33*C))
 
-        # Check for compulsory subclass attributes
-        for var in ['xmin', 'xmax', 'ymin', 'ymax', 'n']:
-            if not hasattr(cls, var):
-                raise NotImplementedError(
-                    'Class {} lacks required `{}` class attribute'.format(cls, var))
 
-        # This is were S(X) or I(X) is returned
-        return cls.val(x)
+@register_equation('Bs', 'Steven_Hyanes')
+def Bs_Steven_Haynes(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return 830 - 270*C - 90*Mn - 37*Ni - 70*Cr - 83*Mo
 
-    @staticmethod
-    def f(x):
-        """
-        Function to be integrated
-        """
-        pass
 
-    @classmethod
-    def val(cls, x):
-        """
-        Evaluates SigmoidalFunction(x)
-        """
-        if hasattr(x, '__iter__') and not isinstance(x, str):
-            x = np.array(x)
-            xmin = x[x > 0].min()
-        else:
-            xmin = x
-        xmin = min(cls.xmin, xmin)
+@register_equation('Bs', 'Lee_Matt')
+def Bs_Lee_Matt(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return 745 - 110*C - 59*Mn - 39*Ni - 68*Cr - 106*Mo + 17*Ni*Mn + 6*Cr**2 + 29*Mo**2
 
-        # init spline if not initialized yet or if xmin is lower than lower bound
-        if xmin < cls.xmin or cls.tck is None:
-            cls.xmin = xmin
-            cls.init_spline()
 
-        return splev(x, cls.tck)
+@register_equation('Bs', 'Zhao1')
+def Bs_Zhao(**comp):
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    V = comp.get('V', 0)
+    W = comp.get('W', 0)
+    return 630 - 45*Mn - 40*V - 35*Si - 30*Cr - 25*Mo - 20*Ni - 15*W
 
-    @classmethod
-    def inv(cls, y):
-        """
-        Evaluates inverse function SigmoidalFunction^-1(y)
-        """
-        if hasattr(y, '__iter__') and not isinstance(y, str):
-            y = np.array(y)
-            ymin, ymax = y.min(), y.max()
-        else:
-            ymin, ymax = y, y
 
-        if cls.tck_inv is None:
-            cls.init_spline()
+@register_equation('Bs', 'Bodnaretal')
+def Bs_Bodnar(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    return 844 - 597*C - 63*Mn - 16*Ni - 78*Cr
 
-        if ymin < cls.ymin or ymax > cls.ymax:
-            print('Be careful! y value out of bounds [{:g}:{:g}]. '
-                  'Returned value is an extrapolation'.format(cls.ymin, cls.ymax))
 
-        return splev(y, cls.tck_inv)
+@register_equation('Bs', 'Kirkaldy_Venugopalan')
+def Bs_Kirkaldy_Venugopalan(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return 656 - 57.7*C - 75*Si - 35*Mn - 15.3*Ni - 34*Cr - 41.2*Mo
 
-    @classmethod
-    def init_spline(cls):
-        """
-        Initializes spline
-        """
-        X = np.linspace(cls.xmin, cls.xmax, cls.n)
-        Y = np.array([integrate.quad(cls.f, 0, x)[0] for x in X])
-        cls.ymin = Y.min()
-        cls.ymax = Y.max()
-        cls.tck = splrep(X, Y)
-        cls.tck_inv = splrep(Y, X)
 
+@register_equation('Bs', 'Lee')
+def Bs_Lee(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return 732 - 202*C + 216*Si - 85*Mn - 37*Ni - 47*Cr - 39*Mo
 
-class S(SigmoidalFunction):
-    n = 999
-    xmin = 0.001
-    xmax = 0.999
-    ymin = 0.02638507
-    ymax = 2.02537893
 
-    """
-    S(X) function calculated using numerical integration and
-    spline interpolation
-    """
-    @staticmethod
-    def f(x):
-        return 1./(x**(0.4*(1. - x))*(1. - x)**(0.4*x))
+# Selección de Ac1
+@register_equation('Ae1', 'Grange')
+def Ac1_Grange(**comp):
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    return FahrenheitToCelsius(1333 - 25*Mn + 40*Si + 17.9*Cr - 14.2*Ni)
 
 
-class I(SigmoidalFunction):
-    """
-    I(X) function calculated using numerical integration and
-    spline interpolation
-    """
-    n = 999
-    xmin = 0.001
-    xmax = 0.999
-    ymin = 0.29961765
-    ymax = 4.05928646
+@register_equation('Ae1', 'Andrews')
+def Ac1_Andrews(**comp):
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    W = comp.get('W', 0)
+    return 723 - 16.9*Ni + 29.1*Si + 6.38*W - 10.7*Mn + 16.9*Cr
 
-    @staticmethod
-    def f(x):
-        return 1./(x**(2.*(1. - x)/3.)*(1. - x)**(2.*x/3.))
 
+@register_equation('Ae1', 'Eldis')
+def Ac1_Eldis(**comp):
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return 712 - 17.8*Mn - 19.1*Ni + 20.1*Si + 11.9*Cr + 9.8*Mo
 
-class PhaseTransformation(object):
-    """
-    Abstract class for calculating kinetics of diffusional phase
-    transformations
-    """
 
-    def __init__(self, alloy):
-        self.alloy = alloy
-        self.initialize()
-        # Check for compulsory object attributes
-        for var in ['comp_factor', 'Ts', 'Tf', 'Hv']:
+@register_equation('Ae1', 'Hougardy')
+def Ac1_Hougardy(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    return 739 - 22*C + 2*Si - 7*Mn + 14*Cr + 13*Mo - 13*Ni
+
+
+@register_equation('Ae1', 'Trzaska')
+def Ac1_Trzaska(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    V = comp.get('V', 0)
+    Cu = comp.get('Cu', 0)
+    return 739 - 22.8*C - 6.8*Mn + 18.2*Si + 11.7*Cr - 15*Ni - 6.4*Mo - 5*V - 28*Cu
+
+
+# Selección de Ac3
+@register_equation('Ae3', 'Kirkaldy_Baganis')
+def Ac3_Kirkaldy_Baganis(**comp):
+    C = comp.get('C', 0)
+    # Real part of the power, as the base is negative for C > 0.765
+    return 1115 - 150.3*C + 216*np.real(np.power(0.765 - C + 0j, 4.26)) - 273
+
+
+@register_equation('Ae3', 'Kirkaldy_Baganis3')
+def Ac3_Kirkaldy_Baganis3(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    return 1127 - 179*C - 14*Mn - 23*Cr - 15*Ni + 22*Si - 273
+
+
+@register_equation('Ae3', 'Ouchu_Sampei')
+def Ac3_Ouchu_Sampei(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    V = comp.get('V', 0)
+    Al = comp.get('Al', 0)
+    return 910 - 203*np.sqrt(abs(C)) + 44.7*Si - 30*Mn - 11*Cr + 31.5*Mo + 104*V + 400*Al
+
+
+@register_equation('Ae3', 'Andrews')
+def Ac3_Andrews(**comp):
+    C = comp.get('C', 0)
+    Mn = comp.get('Mn', 0)
+    Si = comp.get('Si', 0)
+    Ni = comp.get('Ni', 0)
+    Cr = comp.get('Cr', 0)
+    Mo = comp.get('Mo', 0)
+    V = comp.get('V', 0)
+    W = comp.get('W', 0)
+    Cu = comp.get('Cu', 0)
+    Al = comp.get('Al', 0)
+    Ti = comp.get('Ti', 0)
+    return 910 - 203*np.sqrt(abs(C)) + 44.7*Si - 30*Mn + 11*Cr + 31.5*Mo + 104*V - \
+        400*Al - 15.2*Ni + 13.1*W + 20*Cu - 400*Ti
+
+
+def load_equation_profile(fname):
+    """
+    Reads a saved selection of critical temperature equations
+
+    Parameters
+    ----------
+    fname : string
+        Path to a JSON file mapping 'Ms', 'Bs', 'Ae1' and 'Ae3' to
+        equation names or to one of the policies 'min', 'max', 'median'
+
+    Returns
+    -------
+    equations : dict
+        Selection of equations
+    """
+    import json
+    with open(fname) as f:
+        return json.load(f)
+
+
+def save_equation_profile(fname, equations):
+    """
+    Saves a selection of critical temperature equations to a JSON file
+    that can be later passed to Alloy(equations=fname)
+    """
+    import json
+    with open(fname, 'w') as f:
+        json.dump(dict(equations), f, indent=2)
+
+
+def resolve_equations(equations=None):
+    """
+    Converts a selection policy into a dictionary with one entry for each
+    critical temperature
+
+    Parameters
+    ----------
+    equations : None, string or dict (optional)
+        If None, `default_equations` is used. If string, it is either a
+        policy ('min', 'max', 'median') applied to all critical
+        temperatures or the path to a profile file saved with
+        `save_equation_profile`. If dict, maps 'Ms', 'Bs', 'Ae1' and 'Ae3'
+        to equation names or policies. Missing entries are taken from
+        `default_equations`
+        Default: None
+
+    Returns
+    -------
+    equations : dict
+        Selected equation name or policy for each critical temperature
+    """
+    selection = dict(default_equations)
+    if isinstance(equations, str):
+        if equations in selection_policies:
+            equations = {kind: equations for kind in critical_temperature_equations}
+        else:
+            equations = load_equation_profile(equations)
+    if equations is not None:
+        selection.update(equations)
+
+    for kind, choice in selection.items():
+        if kind not in critical_temperature_equations:
+            raise ValueError('Unknown critical temperature `{}`. Valid options are: {}'.format(
+                kind, ', '.join(critical_temperature_equations)))
+        if choice not in selection_policies and choice not in critical_temperature_equations[kind]:
+            raise ValueError('Unknown {} equation `{}`. Valid options are: {}'.format(
+                kind, choice, ', '.join(list(critical_temperature_equations[kind]) +
+                                        list(selection_policies))))
+    return selection
+
+
+def get_equation_fingerprints(equations):
+    """
+    Returns the fingerprints (`cache.get_function_fingerprint`) of the
+    registered equations that a selection depends on: the selected
+    equation, or all the equations of the critical temperature if a policy
+    is selected. They are part of the keys of the result cache, so that
+    registering or replacing equations invalidates the cached results
+
+    Parameters
+    ----------
+    equations : dict
+        Selection of equations (see `resolve_equations`)
+
+    Returns
+    -------
+    fingerprints : dict
+        Fingerprint of each equation, by critical temperature and name
+    """
+    fingerprints = {}
+    for kind, choice in equations.items():
+        fingerprints[kind] = {}
+        for name, func in critical_temperature_equations[kind].items():
+            if choice in selection_policies or name == choice:
+                # Registering an equation again stores a new function
+                # object, so the fingerprints are kept by function
+                if func not in equation_fingerprints:
+                    equation_fingerprints[func] = get_function_fingerprint(func)
+                fingerprints[kind][name] = equation_fingerprints[func]
+    return fingerprints
+
+
+def get_critical_temperature_options(kind, **comp):
+    """
+    Evaluates all registered equations for the critical temperature `kind`
+
+    Returns
+    -------
+    options : dict
+        Values of the critical temperature calculated by each equation
+    """
+    return {name: np.real(func(**comp))
+            for name, func in critical_temperature_equations[kind].items()}
+
+
+def select_critical_temperature(kind, choice, **comp):
+    """
+    Calculates the critical temperature `kind` using the equation (or the
+    aggregating policy) `choice`
+    """
+    if choice in selection_policies:
+        options = get_critical_temperature_options(kind, **comp)
+        return selection_policies[choice](list(options.values()), axis=0)
+    return np.real(critical_temperature_equations[kind][choice](**comp))
+
+
+def select_equations_interactively(**comp):
+    """
+    Plots the values of all registered equations for Ms, Bs, Ac1 and Ac3
+    as bar charts and asks the user to choose one equation for each
+    critical temperature. The returned selection can be passed to
+    Alloy(equations=...) or saved with `save_equation_profile`
+    """
+    import matplotlib.pyplot as plt
+
+    labels = dict(Ms='Ms', Bs='Bs', Ae1='Ac1', Ae3='Ac3')
+    colors = dict(Ms='steelblue', Bs='seagreen', Ae1='orange', Ae3='cornflowerblue')
+    selection = {}
+
+    for kind in critical_temperature_equations:
+        options = get_critical_temperature_options(kind, **comp)
+
+        plt.figure(figsize=(10, 6 if kind == 'Ms' else 4))
+        bars = plt.bar(options.keys(), options.values(), color=colors[kind])
+
+        # Para cada barra, dibujamos un texto encima con su valor:
+        for bar in bars:
+            height = bar.get_height()
+            plt.annotate(
+                f"{height:.2f}",              # Formato con 2 decimales
+                xy=(bar.get_x() + bar.get_width()/2, height),
+                xytext=(0, 3),               # Desplaza el texto 3 puntos arriba
+                textcoords="offset points",
+                ha='center', va='bottom'
+            )
+
+        plt.xticks(rotation=45, ha='right')
+        plt.ylabel(f'{labels[kind]} Temperature (°C)')
+        plt.title(f'Seleccione una ecuación para {labels[kind]} y cierre la ventana')
+        plt.tight_layout()
+        plt.grid(axis='y')
+        plt.show()
+
+        print(f"\nOpciones de ecuaciones para calcular {labels[kind]}:")
+        for i, key in enumerate(options.keys(), 1):
+            print(f"{i}. {key}")
+        choice = input(f"Ingrese el nombre exacto de la ecuación para usar {labels[kind]}: ").strip()
+        if choice not in options:
+            choice = default_equations[kind]
+        selection[kind] = choice
+
+        value = select_critical_temperature(kind, choice, **comp)
+        print(f"{labels[kind]} asignado con '{choice}': {value:.2f} °C")
+
+    return selection
+
+
+class Alloy:
+    """
+    Alloy properties (composition in wt.% and prior austenite grain size)
+
+    Parameters
+    ----------
+    gs : float
+        ASTM grain size number
+    equations : None, string or dict (optional)
+        Selection of the equations used for calculating the critical
+        temperatures Ms, Bs, Ae1 (Ac1), and Ae3 (Ac3). See
+        `resolve_equations` for the accepted values. Use
+        `select_equations_interactively` to choose them from bar charts
+        Default: None (`default_equations`)
+    **w :
+        Composition in wt.%
+    """
+
+    def __init__(self, gs, equations=None, **w):
+        # Grain size
+        self.gs = gs
+
+        # Alloy composition
+        self.w = w
+        # Main elements
+        self.C = w.get('C', 0)
+        self.Mn = w.get('Mn', 0)
+        self.Si = w.get('Si', 0)
+        self.Ni = w.get('Ni', 0)
+        self.Cr = w.get('Cr', 0)
+        self.Mo = w.get('Mo', 0)
+        self.Co = w.get('Co', 0)
+
+        # Critical temperatures
+        self.equations = resolve_equations(equations)
+        temperatures = get_cached('critical_temperatures',
+                                  lambda: {kind: float(select_critical_temperature(kind, choice, **w))
+                                           for kind, choice in self.equations.items()},
+                                  composition=self.get_composition(), equations=self.equations,
+                                  equation_code=get_equation_fingerprints(self.equations))
+        self.Ms = temperatures['Ms']
+        self.Bs = temperatures['Bs']
+        self.Ae1 = temperatures['Ae1']
+        self.Ae3 = temperatures['Ae3']
+
+        self.FC = FC(**w)
+        self.PC = PC(**w)
+        self.BC = BC(**w)
+        # self.Ae3 = Ae3_Andrews(**w)
+        # self.Ae1 = Ae1_Andrews(**w)
+        # self.Ae3 = Ae3_Grange(**w)
+        # self.Ae1 = Ae1_Grange(**w)
+        # self.Bs = Bs_Li(**w)
+        # self.Ms = Ms_Andrews(**w)
+        # self.Bs = Bs_VanBohemen(**w)
+        
+        self.alpha_martensite = alpha_martensite_VanBohemen(**w)
+
+        # Hardness
+        self.Hv_martensite = lambda phi700: Hv_martensite(phi700, **w)
+        self.Hv_bainite = lambda phi700: Hv_bainite(phi700, **w)
+        self.Hv_ferrite_pearlite = lambda phi700: Hv_ferrite_pearlite(phi700, **w)
+
+    def get_composition(self):
+        """
+        Returns the composition as a dictionary without the elements with
+        zero content
+        """
+        return {k: v for k, v in self.w.items() if v != 0}
+
+    def format_composition(self, vmin=0):
+        fmt = []
+        for k, v in self.w.items():
+            if v > vmin:
+                fmt.append('{:g}{:}'.format(v, k))
+        fmt.insert(0, 'Fe')  # assumes it is steel
+        fmt = '-'.join(fmt) + ' (wt.%)'
+        fmt += '\nASTM grain size {:}'.format(self.gs)
+        return fmt
+
+
+class AlloyBatch:
+    """
+    Properties of N alloys stored as arrays (struct of arrays). All the
+    composition dependent quantities of Alloy (critical temperatures,
+    composition factors, martensite rate constant, and hardness) are
+    evaluated at once for all alloys
+
+    Parameters
+    ----------
+    gs : float or iterable
+        ASTM grain size number. Either one value shared by all alloys or
+        one value per alloy
+    comp : 2-D array
+        Composition in wt.% with shape (N, len(elements))
+    elements : iterable
+        Chemical symbols corresponding to the columns of comp
+    equations : None, string or dict (optional)
+        Selection of the equations used for calculating the critical
+        temperatures. Same as in Alloy
+        Default: None (`default_equations`)
+    """
+
+    properties = ['C', 'Mn', 'Si', 'Ni', 'Cr', 'Mo', 'Co', 'Ms', 'Bs', 'Ae1', 'Ae3',
+                  'FC', 'PC', 'BC', 'alpha_martensite']
+
+    def __init__(self, gs, comp, elements, equations=None):
+        comp = np.atleast_2d(np.asarray(comp, dtype=float))
+        elements = list(elements)
+        if comp.shape[1] != len(elements):
+            raise ValueError('comp has {} columns, but {} elements were given'.format(
+                comp.shape[1], len(elements)))
+
+        # Grain size
+        self.gs = np.broadcast_to(np.asarray(gs, dtype=float), comp.shape[:1]).copy()
+
+        # Alloy composition
+        self.elements = elements
+        self.comp = comp
+        self.w = {el: comp[:, i] for i, el in enumerate(elements)}
+        w = self.w
+        # Main elements
+        zeros = np.zeros(len(comp))
+        self.C = w.get('C', zeros)
+        self.Mn = w.get('Mn', zeros)
+        self.Si = w.get('Si', zeros)
+        self.Ni = w.get('Ni', zeros)
+        self.Cr = w.get('Cr', zeros)
+        self.Mo = w.get('Mo', zeros)
+        self.Co = w.get('Co', zeros)
+
+        # Critical temperatures calculated by every registered equation
+        # (N x number of equations matrices)
+        self.critical_temperature_options = {}
+        for kind in critical_temperature_equations:
+            options = get_critical_temperature_options(kind, **w)
+            self.critical_temperature_options[kind] = (
+                list(options), np.column_stack([np.broadcast_to(v, zeros.shape) for v in options.values()]))
+
+        self.equations = resolve_equations(equations)
+        self.Ms = self.select_critical_temperature('Ms', self.equations['Ms'])
+        self.Bs = self.select_critical_temperature('Bs', self.equations['Bs'])
+        self.Ae1 = self.select_critical_temperature('Ae1', self.equations['Ae1'])
+        self.Ae3 = self.select_critical_temperature('Ae3', self.equations['Ae3'])
+
+        self.FC = FC(**w) + zeros
+        self.PC = PC(**w) + zeros
+        self.BC = BC(**w) + zeros
+
+        self.alpha_martensite = alpha_martensite_VanBohemen(**w) + zeros
+
+    @classmethod
+    def from_compositions(cls, comps, gs=7, equations=None):
+        """
+        Creates an AlloyBatch from a list of compositions given as
+        dictionaries (e.g., [dict(C=0.4, Mn=1.2), dict(C=0.2)])
+        """
+        elements = []
+        for comp in comps:
+            elements += [el for el in comp if el not in elements]
+        comp = [[comp.get(el, 0) for el in elements] for comp in comps]
+        return cls(gs, comp, elements, equations)
+
+    def __len__(self):
+        return len(self.comp)
+
+    def select_critical_temperature(self, kind, choice):
+        """
+        Selects the critical temperature `kind` of all alloys using the
+        equation (or the aggregating policy) `choice`
+        """
+        names, values = self.critical_temperature_options[kind]
+        if choice in selection_policies:
+            return selection_policies[choice](values, axis=1)
+        return values[:, names.index(choice)].copy()
+
+    def Hv_martensite(self, phi700):
+        return Hv_martensite(phi700, **self.w)
+
+    def Hv_bainite(self, phi700):
+        return Hv_bainite(phi700, **self.w)
+
+    def Hv_ferrite_pearlite(self, phi700):
+        return Hv_ferrite_pearlite(phi700, **self.w)
+
+    def column_view(self):
+        """
+        Returns a shallow copy of the batch in which all the properties
+        are (N, 1) arrays, so that they broadcast against arrays whose
+        last axis is time or temperature. Phase transformation objects
+        (Ferrite, Pearlite, Bainite, Martensite) created with the column
+        view evaluate all alloys at once
+        """
+        view = copy.copy(self)
+        view.gs = self.gs[:, None]
+        view.w = {el: v[:, None] for el, v in self.w.items()}
+        for attr in self.properties:
+            setattr(view, attr, getattr(self, attr)[:, None])
+        return view
+
+    def get_phase_transformations(self):
+        """
+        Returns dictionary with the Ferrite, Pearlite, Bainite, and
+        Martensite objects of the batch (see `column_view`)
+        """
+        view = self.column_view()
+        return dict(ferrite=Ferrite(view), pearlite=Pearlite(view),
+                    bainite=Bainite(view), martensite=Martensite(view))
+
+    def get_TTT(self, T, fs=1e-2, ff=.99):
+        """
+        Calculates TTT transformation start and finish times of all alloys
+        on a shared temperature grid
+
+        Parameters
+        ----------
+        T : iterable
+            Temperatures
+        fs : float (optional)
+            Transformation start phase fraction
+            Default: 1e-2 (1%)
+        ff : float (optional)
+            Transformation finish phase fraction
+            Default: .99 (99%)
+
+        Returns
+        -------
+        TTT : dict
+            Dictionary with the temperatures `T` and the (N, len(T))
+            arrays `ts_ferrite`, `tf_ferrite`, `ts_pearlite`, etc. Times
+            are NaN outside the temperature range of each transformation
+        """
+        T = np.asarray(T, dtype=float)
+        TTT = dict(T=T)
+        phases = self.get_phase_transformations()
+        for name in ['ferrite', 'pearlite', 'bainite']:
+            phase = phases[name]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                F = phase.get_transformation_factor(T)
+            F = np.where((T >= phase.Tf) & (T < phase.Ts), F, np.nan)
+            TTT['ts_' + name] = S(fs)*F
+            TTT['tf_' + name] = S(ff)*F
+        return TTT
+
+    def get_critical_cooling_rates(self, fractions=1e-2, Tini=900, Tfin=25, n=500, martensite=True,
+                                   chunk_size=256):
+        """
+        Calculates the critical cooling rates of all alloys (see
+        `TransformationDiagrams.get_critical_cooling_rates`)
+
+        Parameters
+        ----------
+        fractions : float or iterable (optional)
+            Threshold phase fraction(s)
+            Default: 1e-2 (1%)
+        Tini : float (optional)
+            Initial temperature
+            Default: 900
+        Tfin : float (optional)
+            Final temperature (only used for martensite)
+            Default: 25
+        n : int (optional)
+            Number of points of the temperature grid of the martensite
+            fractions
+            Default: 500
+        martensite : bool (optional)
+            If False, the critical cooling rates of martensite (which
+            require evaluating the coupled model) are not calculated
+            Default: True
+        chunk_size : int (optional)
+            Maximum number of alloys whose martensite fractions are
+            evaluated at once
+            Default: 256
+
+        Returns
+        -------
+        rates : dict
+            Dictionary with the fractions `f` and the (len(f), N) arrays
+            `ferrite`, `pearlite`, `bainite` (and `martensite`)
+        """
+        fractions = np.atleast_1d(np.asarray(fractions, dtype=float))
+        phases = self.get_phase_transformations()
+        rates = dict(f=fractions)
+        for name in ['ferrite', 'pearlite', 'bainite']:
+            rates[name] = phases[name].get_critical_cooling_rate(fractions, Tini)
+        if martensite:
+            rates['martensite'] = np.concatenate([
+                get_martensite_critical_cooling_rate(
+                    AlloyBatch(self.gs[i:i + chunk_size], self.comp[i:i + chunk_size], self.elements,
+                               self.equations).get_phase_transformations(), fractions, Tini, Tfin, n)
+                for i in range(0, len(self), chunk_size)], axis=-1)
+        return rates
+
+
+class SigmoidalFunction(object):
+    """
+    S(X) and I(X) functions. Once initialized, calculates values of the
+    integral of f for n values of x in the [xmin, xmax] interval and
+    then creates spline interpolators of the function and of its
+    inverse. The returned values are calculated by the interpolators.
+    This method has the advantage of being able to process x as an
+    array (or any other kind of iterator)
+
+    The x values are evenly spaced in logit(x), so that they are
+    clustered near 0 and 1, where the transformation start and finish
+    fractions are. The objects are immutable: the whole domain is
+    covered at initialization and the splines, fitted on first use, are
+    never refitted, therefore they can be safely shared between threads.
+    The tabulated values are read from `sigmoidal_tables_file` when
+    available, so that no numerical integration is performed
+
+    Parameters
+    ----------
+    f : callable
+        Function to be integrated
+    name : string
+        Name of the function (used for looking up the precomputed table)
+    xmin : float (optional)
+        Lower bound of the domain
+        Default: 1e-6
+    xmax : float (optional)
+        Upper bound of the domain
+        Default: 1 - 1e-6
+    n : int (optional)
+        Number of tabulated values
+        Default: 999
+    """
+
+    def __init__(self, f, name, xmin=1e-6, xmax=1 - 1e-6, n=999):
+        self.f = f
+        self.name = name
+        self.xmin = xmin
+        self.xmax = xmax
+        self.n = n
+
+        X, Y = self.load_table()
+        if X is None:
+            X, Y = self.integrate()
+        self.X, self.Y = X, Y
+        self.ymin = Y.min()
+        self.ymax = Y.max()
+        self._tck = None
+        self._tck_inv = None
+
+    def __call__(self, x):
+        """
+        Returns the interpolated value of the function
+        """
+        return self.val(x)
+
+    def __repr__(self):
+        return '{}({}, xmin={:g}, xmax={:g}, n={})'.format(
+            self.__class__.__name__, self.name, self.xmin, self.xmax, self.n)
+
+    @property
+    def tck(self):
+        """
+        Spline knots, coefficients and degree of the function
+        """
+        if self._tck is None:
+            from scipy.interpolate import splrep
+            with timer('spline init'):
+                self._tck = splrep(self.X, self.Y)
+        return self._tck
+
+    @property
+    def tck_inv(self):
+        """
+        Spline parameters of the inverse function
+        """
+        if self._tck_inv is None:
+            from scipy.interpolate import splrep
+            with timer('spline init'):
+                self._tck_inv = splrep(self.Y, self.X)
+        return self._tck_inv
+
+    def get_knots(self):
+        """
+        Values of x at which the function is tabulated, evenly spaced in
+        logit(x) between xmin and xmax
+        """
+        u = np.linspace(np.log(self.xmin/(1 - self.xmin)), np.log(self.xmax/(1 - self.xmax)), self.n)
+        return 1./(1. + np.exp(-u))
+
+    def val(self, x):
+        """
+        Evaluates SigmoidalFunction(x)
+        """
+        if hasattr(x, '__iter__') and not isinstance(x, str):
+            x = np.array(x)
+            xmin, xmax = x[x > 0].min(), x.max()
+        else:
+            xmin, xmax = x, x
+
+        if xmin < self.xmin or xmax > self.xmax:
+            warn(self.name + '.val out of bounds', 'Be careful! x value out of bounds [{:g}:{:g}]. '
+                 'Returned value is an extrapolation'.format(self.xmin, self.xmax))
+
+        count(self.name + '.val values', np.size(x))
+        from scipy.interpolate import splev
+        return splev(x, self.tck)
+
+    def inv(self, y):
+        """
+        Evaluates inverse function SigmoidalFunction^-1(y)
+        """
+        if hasattr(y, '__iter__') and not isinstance(y, str):
+            y = np.array(y)
+            ymin, ymax = y.min(), y.max()
+        else:
+            ymin, ymax = y, y
+
+        if ymin < self.ymin or ymax > self.ymax:
+            warn(self.name + '.inv out of bounds', 'Be careful! y value out of bounds [{:g}:{:g}]. '
+                 'Returned value is an extrapolation'.format(self.ymin, self.ymax))
+
+        count(self.name + '.inv values', np.size(y))
+        from scipy.interpolate import splev
+        return splev(y, self.tck_inv)
+
+    def integrate(self):
+        """
+        Calculates the tabulated values of the function by numerical
+        integration
+
+        Returns
+        -------
+        X, Y : tuple
+            Arrays with the n values of x returned by `get_knots` and
+            the corresponding values of the function
+        """
+        from scipy import integrate
+
+        X = self.get_knots()
+        # Integral calculated piecewise between consecutive knots
+        Y = np.array([integrate.quad(self.f, 0, X[0])[0]] +
+                     [integrate.quad(self.f, a, b)[0] for a, b in zip(X[:-1], X[1:])]).cumsum()
+        return X, Y
+
+    def load_table(self, fname=None):
+        """
+        Reads the tabulated values of the function from a file created by
+        `build_sigmoidal_tables`
+
+        Returns
+        -------
+        X, Y : tuple
+            Tabulated values, or (None, None) if the file does not exist
+            or if it was created for a different version or domain
+        """
+        table = load_sigmoidal_tables(fname)
+        if table is None or self.name + '_x' not in table:
+            return None, None
+        X, Y = table[self.name + '_x'], table[self.name + '_y']
+        if len(X) != self.n or not np.isclose(X[0], self.xmin) or not np.isclose(X[-1], self.xmax):
+            return None, None
+        return X, Y
+
+
+def get_first_crossing(values, thresholds):
+    """
+    Finds the first index along the last axis of values (non-decreasing
+    along that axis, e.g., cumulative sums) at which each threshold is
+    reached
+
+    Parameters
+    ----------
+    values : array
+        Array with shape (m, n)
+    thresholds : iterable
+        Threshold values
+
+    Returns
+    -------
+    idx : array
+        Integer array with shape (len(thresholds), m). Rows that never
+        reach the threshold are assigned -1
+    """
+    rows = np.arange(values.shape[0])
+    idx = np.empty((len(thresholds), values.shape[0]), dtype=int)
+    for i, threshold in enumerate(thresholds):
+        crossed = values >= threshold
+        first = crossed.argmax(axis=1)
+        idx[i] = np.where(crossed[rows, first], first, -1)
+    return idx
+
+
+def get_cooling_rate(t, T, Tref=700.):
+    """
+    Calculates the cooling rate at the temperature Tref (the first time
+    it is crossed while cooling) of sampled thermal cycles
+
+    Parameters
+    ----------
+    t : array
+        Time, with the time steps along the last axis
+    T : array
+        Temperatures at the instants of time t. Leading axes (e.g.,
+        several thermal cycles) are evaluated at once
+    Tref : float (optional)
+        Reference temperature
+        Default: 700.
+
+    Returns
+    -------
+    phi : float or array
+        Cooling rate (positive when cooling) with the shape of the
+        leading axes. NaN for cycles that never cool below Tref
+    """
+    t, T = np.broadcast_arrays(np.asarray(t, dtype=float), np.asarray(T, dtype=float))
+    crossed = (T[..., :-1] > Tref) & (T[..., 1:] <= Tref)
+    idx = crossed.argmax(axis=-1)[..., None]
+    dT = np.take_along_axis(T[..., :-1] - T[..., 1:], idx, axis=-1)[..., 0]
+    dt = np.take_along_axis(np.diff(t, axis=-1), idx, axis=-1)[..., 0]
+    phi = np.where(crossed.any(axis=-1), dT/dt, np.nan)
+    return float(phi) if phi.ndim == 0 else phi
+
+
+# Precomputed tables of the sigmoidal functions. Increase the version
+# whenever the tabulated functions or their knots change
+sigmoidal_tables_version = 2
+sigmoidal_tables_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sigmoidal_tables.npz')
+_sigmoidal_tables = {}
+
+
+def load_sigmoidal_tables(fname=None):
+    """
+    Reads the precomputed tables of the sigmoidal functions. Returns
+    None if the file does not exist or was created for a different
+    version of the tables
+    """
+    fname = sigmoidal_tables_file if fname is None else fname
+    if fname not in _sigmoidal_tables:
+        table = None
+        if os.path.exists(fname):
+            with np.load(fname) as data:
+                table = {key: data[key] for key in data.files}
+            if table.get('version') != sigmoidal_tables_version:
+                table = None
+        _sigmoidal_tables[fname] = table
+    return _sigmoidal_tables[fname]
+
+
+def build_sigmoidal_tables(fname=None):
+    """
+    Calculates the tables of all sigmoidal functions by numerical
+    integration and saves them to fname (`sigmoidal_tables_file` by
+    default)
+    """
+    fname = sigmoidal_tables_file if fname is None else fname
+    table = dict(version=sigmoidal_tables_version)
+    for func in sigmoidal_functions:
+        table[func.name + '_x'], table[func.name + '_y'] = func.integrate()
+    np.savez_compressed(fname, **table)
+    _sigmoidal_tables.pop(fname, None)
+
+
+def verify_sigmoidal_tables(fname=None):
+    """
+    Rebuilds the tables of all sigmoidal functions by numerical
+    integration and compares them with the saved ones
+
+    Returns
+    -------
+    deviations : dict
+        Maximum relative deviation between saved and rebuilt values for
+        each function (NaN if the saved table is missing or outdated)
+    """
+    deviations = {}
+    for func in sigmoidal_functions:
+        X, Y = func.load_table(fname)
+        if X is None:
+            deviations[func.name] = np.nan
+            continue
+        X_, Y_ = func.integrate()
+        deviations[func.name] = max(np.abs(X - X_).max(), np.abs((Y - Y_)/Y_).max())
+    return deviations
+
+
+def S_integrand(x):
+    return 1./(x**(0.4*(1. - x))*(1. - x)**(0.4*x))
+
+
+def I_integrand(x):
+    return 1./(x**(2.*(1. - x)/3.)*(1. - x)**(2.*x/3.))
+
+
+# S(X) and I(X) functions calculated using numerical integration and
+# spline interpolation
+S = SigmoidalFunction(S_integrand, 'S')
+I = SigmoidalFunction(I_integrand, 'I')
+sigmoidal_functions = [S, I]
+
+
+class KineticIntegral(object):
+    """
+    Cumulative kinetic integral of a phase transformation
+
+        G(T) = integral from T to Ts of dT'/F(T')
+
+    calculated once on a fine temperature grid from the transformation
+    start temperature Ts down to Tfin. For linear cooling at a rate phi,
+    the nucleation time at the temperature T is (G(T) - G(Tini))/phi,
+    therefore the transformation temperatures for any number of cooling
+    rates and initial temperatures are obtained by scaling and inverse
+    lookup of G(T), without integrating again
+
+    Parameters
+    ----------
+    phase : PhaseTransformation object
+        Phase transformation
+    Tfin : float
+        Final temperature
+    dT : float (optional)
+        Temperature step of the grid
+        Default: 0.1
+    """
+
+    @timed('kinetic integral')
+    def __init__(self, phase, Tfin, dT=.1):
+        self.phase = phase
+        self.Ts = phase.Ts
+        self.Tfin = Tfin
+        self.dT = dT
+
+        # Temperature grid in descending order; the integrand 1/F is
+        # zero at Ts
+        self.T = np.append(np.arange(self.Ts, Tfin, -dT), Tfin)
+        inv_factor = np.zeros(self.T.shape)
+        inv_factor[1:] = 1./phase.get_transformation_factor(self.T[1:])
+        # Cumulative trapezoidal rule
+        self.G = np.zeros(self.T.shape)
+        self.G[1:] = (.5*(inv_factor[1:] + inv_factor[:-1])*(self.T[:-1] - self.T[1:])).cumsum()
+
+    def get_integral(self, T):
+        """
+        Evaluates G(T). G is zero above Ts and constant below Tfin
+        """
+        return np.interp(T, self.T[::-1], self.G[::-1])
+
+    @timed('kinetics')
+    def get_transformation_temperature(self, cooling_rate, f, Tini=None):
+        """
+        Calculates the temperature for the material to transform to a
+        fraction f during linear cooling from Tini at a cooling rate
+        cooling_rate
+
+        Parameters
+        ----------
+        cooling_rate : float or iterable
+            Cooling rate(s). It can be provided as an array
+        f : float or iterable
+            Transformed fraction(s)
+        Tini : float (optional)
+            Initial temperature. Only matters if lower than Ts
+            Default: None (Ts)
+
+        Returns
+        -------
+        T : float or iterable
+            Transformation temperature with same shape as cooling_rate.
+            If f is iterable, the shape is (len(f), len(cooling_rate)).
+            NaN if the fraction is not reached above Tfin
+        """
+        G0 = 0 if Tini is None else self.get_integral(Tini)
+        target = np.multiply.outer(S(f), cooling_rate) + G0
+        return np.interp(target, self.G, self.T, right=np.nan)
+
+
+class ThermalCycle(object):
+    """
+    Thermal cycle T(t). The (t, T) points are fitted once (by spline if
+    there are more than 3 points, otherwise by linear interpolation) and
+    resampled at n evenly spaced instants of time, which are shared by
+    all phase transformations. The cooling rate at 700 oC and the
+    temperature windows in which each transformation is active are
+    calculated once and cached
+
+    Parameters
+    ----------
+    t : iterable
+        Time
+    T : iterable
+        Temperatures at the instants of time t
+    n : int (optional)
+        Number of points at which the thermal cycle is resampled
+        Default: 1000
+    """
+
+    def __init__(self, t, T, n=1000):
+        self.t_data = np.asarray(t, dtype=float)
+        self.T_data = np.asarray(T, dtype=float)
+        self.n = n
+
+        if len(self.t_data) > 3:
+            from scipy.interpolate import splrep
+            # Fits T(t) by spline
+            with timer('spline init'):
+                self.tck = splrep(self.t_data, self.T_data)
+        else:
+            # Uses linear interpolator
+            self.tck = None
+
+        self.t = np.linspace(self.t_data.min(), self.t_data.max(), n)
+        self.T = self.get_temperature(self.t)
+        self.windows = {}
+        self._phi700 = False
+
+    @classmethod
+    def create(cls, t, T=None, n=1000):
+        """
+        Returns t if it is already a ThermalCycle object, otherwise
+        creates a new ThermalCycle from the (t, T) points
+        """
+        if isinstance(t, cls):
+            return t
+        return cls(t, T, n)
+
+    def get_temperature(self, t):
+        """
+        Evaluates the fitted T(t) at the instants of time t
+        """
+        if self.tck is not None:
+            from scipy.interpolate import splev
+            return splev(t, self.tck)
+        return np.interp(t, self.t_data, self.T_data)
+
+    def get_cooling_rate(self, t):
+        """
+        Evaluates the cooling rate -dT/dt at the instants of time t
+        """
+        if self.tck is not None:
+            from scipy.interpolate import splev
+            return -splev(t, self.tck, der=1)
+        slopes = np.diff(self.T_data)/np.diff(self.t_data)
+        seg = np.clip(np.searchsorted(self.t_data, t, side='right') - 1, 0, len(slopes) - 1)
+        return -slopes[seg]
+
+    @property
+    def phi700(self):
+        """
+        Cooling rate at 700 oC, evaluated at the first time the cycle
+        cools below 700 oC. None if it never does (e.g., isothermal heat
+        treatments)
+        """
+        if self._phi700 is False:
+            self._phi700 = None
+            T = self.T
+            crossed, = np.where((T[:-1] > 700.) & (T[1:] <= 700.))
+            if len(crossed) > 0:
+                i = crossed[0]
+                # Instant of time at which T = 700 oC
+                t700 = self.t[i] + (T[i] - 700.)*(self.t[i+1] - self.t[i])/(T[i] - T[i+1])
+                phi700 = float(self.get_cooling_rate(t700))
+                if phi700 > 0:
+                    self._phi700 = phi700
+        return self._phi700
+
+    def get_window(self, Ts, Tf=None):
+        """
+        Returns boolean array marking the resampled points at which the
+        temperature is lower than Ts and higher than Tf (if not None)
+        """
+        if (Ts, Tf) not in self.windows:
+            window = self.T < Ts
+            if Tf is not None:
+                window &= self.T > Tf
+            self.windows[Ts, Tf] = window
+        return self.windows[Ts, Tf]
+
+
+class CoolingLaw(object):
+    """
+    Base class of families of cooling laws. Every member of the family
+    cools monotonically from Tini and is described by the time t(T) at
+    which it reaches the temperature T, so all members can be evaluated
+    on a shared temperature grid
+
+    Parameters
+    ----------
+    parameters : float or iterable
+        Parameter of each member of the family
+    Tini : float
+        Initial temperature
+    """
+    # Name of the parameter of the family
+    parameter_name = 'parameter'
+
+    def __init__(self, parameters, Tini):
+        self.parameters = np.atleast_1d(np.asarray(parameters, dtype=float))
+        self.Tini = Tini
+
+    def __len__(self):
+        return len(self.parameters)
+
+    def __repr__(self):
+        return '{}({}={}, Tini={})'.format(self.__class__.__name__, self.parameter_name,
+                                           self.parameters.tolist(), self.Tini)
+
+    @abstractmethod
+    def get_time(self, T):
+        """
+        Returns the times at which each member reaches the temperatures T
+        as an array with shape (len(self), len(T)). Times are inf for
+        temperatures that are never reached
+        """
+        pass
+
+    @abstractmethod
+    def get_temperature(self, t):
+        """
+        Returns the temperatures of each member at the instants of time t
+        as an array with shape (len(self), len(t))
+        """
+        pass
+
+    def get_cooling_rate(self, T, dT=.5):
+        """
+        Returns the cooling rates -dT/dt of each member at the temperatures
+        T as an array with shape (len(self), len(T)). NaN for temperatures
+        that are never reached
+        """
+        T = np.atleast_1d(np.asarray(T, dtype=float))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            phi = 2*dT/(self.get_time(T - dT) - self.get_time(T + dT))
+        return np.where(np.isfinite(phi) & (phi > 0), phi, np.nan)
+
+
+class LinearCooling(CoolingLaw):
+    """
+    Linear cooling T(t) = Tini - phi*t for each cooling rate phi
+    """
+    parameter_name = 'cooling_rate'
+
+    def __init__(self, cooling_rates, Tini=900):
+        super(LinearCooling, self).__init__(cooling_rates, Tini)
+
+    def get_time(self, T):
+        return np.maximum(self.Tini - np.asarray(T, dtype=float), 0)/self.parameters[:, None]
+
+    def get_temperature(self, t):
+        return self.Tini - self.parameters[:, None]*np.asarray(t, dtype=float)
+
+    def get_cooling_rate(self, T, dT=.5):
+        return np.broadcast_to(self.parameters[:, None], (len(self), np.size(T))).copy()
+
+
+class NewtonianCooling(CoolingLaw):
+    """
+    Newtonian (exponential) cooling towards the temperature of the
+    quenchant Tenv
+
+        T(t) = Tenv + (Tini - Tenv)*exp(-h*t)
+
+    for each heat transfer coefficient h (1/s, i.e., the heat transfer
+    coefficient times the area divided by the heat capacity). The families
+    parameterized by t8/5 (cooling time from 800 to 500 oC) or by lambda
+    (t8/5 in hundreds of seconds), which are common in CCT diagrams of
+    welding and quenching, are created by `from_t85` and `from_lambda`
+    """
+    parameter_name = 'h'
+
+    def __init__(self, h, Tini=900, Tenv=25):
+        super(NewtonianCooling, self).__init__(h, Tini)
+        self.Tenv = Tenv
+
+    @classmethod
+    def from_t85(cls, t85, Tini=900, Tenv=25):
+        """
+        Creates the family from the cooling times from 800 to 500 oC
+        """
+        h = np.log((800. - Tenv)/(500. - Tenv))/np.asarray(t85, dtype=float)
+        return cls(h, Tini, Tenv)
+
+    @classmethod
+    def from_lambda(cls, lambdas, Tini=900, Tenv=25):
+        """
+        Creates the family from the lambda parameters (cooling time from
+        800 to 500 oC in hundreds of seconds)
+        """
+        return cls.from_t85(100.*np.asarray(lambdas, dtype=float), Tini, Tenv)
+
+    def get_time(self, T):
+        T = np.minimum(np.asarray(T, dtype=float), self.Tini)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = np.log((self.Tini - self.Tenv)/(T - self.Tenv))/self.parameters[:, None]
+        return np.where(T > self.Tenv, t, np.inf)
+
+    def get_temperature(self, t):
+        return self.Tenv + (self.Tini - self.Tenv)*np.exp(-self.parameters[:, None]*np.asarray(t, dtype=float))
+
+    def get_cooling_rate(self, T, dT=.5):
+        T = np.asarray(T, dtype=float)
+        return np.where((T > self.Tenv) & (T <= self.Tini), self.parameters[:, None]*(T - self.Tenv), np.nan)
+
+
+class MeasuredCooling(CoolingLaw):
+    """
+    Family of measured cooling curves (e.g., thermocouple readings of
+    several quenches). Each curve is described by the time at which it
+    first reaches each temperature, so reheating and noise after the
+    first crossing are ignored
+
+    Parameters
+    ----------
+    curves : iterable
+        List of (t, T) arrays, one for each measured curve
+    labels : iterable (optional)
+        Parameter of each curve (e.g., the distance to the quenched end)
+        Default: None (index of the curve)
+    """
+
+    def __init__(self, curves, labels=None):
+        self.curves = []
+        for t, T in curves:
+            t = np.asarray(t, dtype=float)
+            T = np.asarray(T, dtype=float)
+            # Keeps only the points at which a new minimum temperature is
+            # reached
+            new = np.append(True, T[1:] < np.minimum.accumulate(T)[:-1])
+            self.curves.append((t[new] - t[0], T[new]))
+        super(MeasuredCooling, self).__init__(np.arange(len(self.curves)) if labels is None else labels,
+                                              max(T[0] for _, T in self.curves))
+
+    def get_time(self, T):
+        T = np.asarray(T, dtype=float)
+        t = np.empty((len(self), T.size))
+        for i, (t_k, T_k) in enumerate(self.curves):
+            t[i] = np.interp(T, T_k[::-1], t_k[::-1], left=np.inf, right=0.)
+        return t
+
+    def get_temperature(self, t):
+        t = np.asarray(t, dtype=float)
+        return np.array([np.interp(t, t_k, T_k, right=np.nan) for t_k, T_k in self.curves])
+
+    def get_cooling_rate(self, T, dT=10.):
+        # Average cooling rate between T + dT and T - dT, which filters
+        # the noise of the measurements
+        return super(MeasuredCooling, self).get_cooling_rate(T, dT)
+
+
+class PhaseTransformation(object):
+    """
+    Abstract class for calculating kinetics of diffusional phase
+    transformations
+    """
+
+    def __init__(self, alloy):
+        self.alloy = alloy
+        self.initialize()
+        # Check for compulsory object attributes
+        for var in ['comp_factor', 'Ts', 'Tf', 'Hv']:
             if not hasattr(self, var):
                 raise NotImplementedError(
                     'Object {} lacks required `{}` attribute'.format(self, var))
@@ -604,6 +1724,30 @@ class PhaseTransformation(object):
         """
         return self.comp_factor/(2**(self.n1*self.alloy.gs)*(self.Ts - T)**self.n2*np.exp(-self.Q/(R*(T + K))))
 
+    def get_kinetic_integral(self, Tfin, dT=.1):
+        """
+        Returns the KineticIntegral object of the transformation from Ts
+        down to Tfin. The object is created once and reused
+
+        Parameters
+        ----------
+        Tfin : float
+            Final temperature
+        dT : float (optional)
+            Temperature step of the grid
+            Default: 0.1
+
+        Returns
+        -------
+        integral : KineticIntegral object
+        """
+        if not hasattr(self, 'kinetic_integrals'):
+            self.kinetic_integrals = {}
+        if (Tfin, dT) not in self.kinetic_integrals:
+            self.kinetic_integrals[Tfin, dT] = KineticIntegral(self, Tfin, dT)
+        return self.kinetic_integrals[Tfin, dT]
+
+    @timed('kinetics')
     def get_transformation_time(self, T, f):
         """
         Calculates the time necessary for the material to transform to a
@@ -624,7 +1768,8 @@ class PhaseTransformation(object):
         """
         return S(f)*self.get_transformation_factor(T)
 
-    def get_transformation_temperature(self, Tini, Tfin, cooling_rate, f, dT=1.0):
+    @timed('kinetics')
+    def get_transformation_temperature(self, Tini, Tfin, cooling_rate, f, dT=1.0, chunk_size=256):
         """
         Calculates the temperature for the material to transform to a
         fraction f during the cooling from Tini to Tfin at a cooling rate
@@ -639,43 +1784,100 @@ class PhaseTransformation(object):
         cooling_rate : float or iterable
             Cooling rate(s). It can be provided as an array
         f : float or iterable
-            Transformed fraction. If iterable, has to have the same shape
-            as cooling_rate
+            Transformed fraction(s). If iterable, the transformation
+            temperatures of all fractions are calculated in the same pass
+        dT : float (optional)
+            Temperature step
+            Default: 1.0
+        chunk_size : int (optional)
+            Maximum number of cooling rates evaluated at once. Limits the
+            memory usage to chunk_size x (Tini - Tfin)/dT values
+            Default: 256
 
         Returns
         -------
         T : float or iterable
-            Transformation temperature with same shape as cooling_rate
+            Transformation temperature with same shape as cooling_rate.
+            If f is iterable, the shape is (len(f), len(cooling_rate))
         """
-        dt = dT/np.array(cooling_rate)
-        nt = len(dt) if hasattr(dt, '__len__') else 1
+        dt = np.atleast_1d(dT/np.array(cooling_rate, dtype=float))
+        nt = len(dt)
         T = np.arange(Tini, Tfin, -dT)
-        nucleation_time = np.full((nt, len(T)), 0, dtype=float)
 
+        # Reciprocal of the transformation factor (zero above Ts)
+        inv_factor = np.zeros(T.shape)
         filtr = T < self.Ts
-        nucleation_time[:, filtr] = np.outer(dt, 1./self.get_transformation_factor(T[filtr]))
-        nucleation_time = nucleation_time.cumsum(axis=1)
+        inv_factor[filtr] = 1./self.get_transformation_factor(T[filtr])
+
+        Sf = np.atleast_1d(S(f))
+        Tt = np.full((len(Sf), nt), np.nan)  # Transformation temperature for a given fraction f
+
+        for start in range(0, nt, chunk_size):
+            chunk = slice(start, start + chunk_size)
+            nucleation_time = np.outer(dt[chunk], inv_factor).cumsum(axis=1)
+            # First index of nucleation_time larger than threshold S(f)
+            # is the transformation temperature
+            for i, idx in enumerate(get_first_crossing(nucleation_time, Sf)):
+                Tt[i, chunk][idx >= 0] = T[idx[idx >= 0]]
+
+        if np.ndim(f) == 0:
+            Tt = Tt[0]
+            return float(Tt[0]) if nt == 1 else Tt
+        return Tt[:, 0] if nt == 1 else Tt
+
+    @timed('kinetics')
+    def get_critical_cooling_rate(self, f=1e-2, Tini=None, n=501):
+        """
+        Calculates the critical cooling rate of the transformation, i.e.,
+        the cooling rate above which the fraction f is not reached during
+        linear cooling from Tini. The nucleation time reached at Tf is
+        G/phi, where G is the kinetic integral of dT/F(T) from min(Tini, Ts)
+        down to Tf, therefore the critical cooling rate is G/S(f) and no
+        root finding is needed. The properties of the alloy can be (N, 1)
+        arrays (see `AlloyBatch.column_view`), in which case the critical
+        cooling rates of all alloys are calculated at once
+
+        Parameters
+        ----------
+        f : float or iterable (optional)
+            Transformed fraction(s)
+            Default: 1e-2 (1%)
+        Tini : float (optional)
+            Initial temperature. Only matters if lower than Ts
+            Default: None (Ts)
+        n : int (optional)
+            Number of points of the temperature grid between min(Tini, Ts)
+            and Tf
+            Default: 501
 
-        Tt = np.full(nt, np.nan, dtype=float)  # Transformation temperature for a given fraction f
+        Returns
+        -------
+        cooling_rate : float or array
+            Critical cooling rate, with the shape of the alloy properties
+            ((N,) for batches). If f is iterable, the shape is
+            (len(f), N). Zero if Tf is not lower than min(Tini, Ts)
+        """
+        T0 = self.Ts if Tini is None else np.minimum(Tini, self.Ts)
+        # Temperature grid from T0 to Tf along the last axis
+        T = T0 + (self.Tf - T0)*np.linspace(0, 1, n)
 
-        # Check for indices of nucleation_time larger than threshold S(f)
-        # First occurrence is the transformation temperature
-        Sf = S(f)
-        for i, n_time in enumerate(nucleation_time):
-            idx, = np.where(n_time >= Sf)
-            if len(idx) > 0:
-                Tt[i] = T[idx[0]]
+        # Trapezoidal rule; the integrand 1/F is zero at Ts
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            inv_factor = np.where(T < self.Ts, 1./self.get_transformation_factor(T), 0.)
+        G = (.5*(inv_factor[..., 1:] + inv_factor[..., :-1])*(T[..., :-1] - T[..., 1:])).sum(axis=-1)
+        G = np.where(T[..., 0] > T[..., -1], G, 0.)
 
-        return float(Tt) if nt == 1 else Tt
+        return np.multiply.outer(1./S(f), G)
 
-    def get_transformed_fraction(self, t, T, n=1000):
+    def get_transformed_fraction(self, t, T=None, n=1000):
         """
         Calculates the transformed fraction for a given thermal cycle T(t)
 
         Parameters
         ----------
-        t : iterable
-            Time
+        t : iterable or ThermalCycle object
+            Time, or thermal cycle already fitted and resampled (then T
+            and n are ignored)
         T : iterable
             Temperatures at the instants of time t
         n : int (optional)
@@ -689,41 +1891,104 @@ class PhaseTransformation(object):
             Tuple with arrays time, temperature, phase fraction evaluated
             at n points
         """
-        if len(t) > 3:
-            # Fits T(t) by spline
-            def t2T(t_): return splev(t_, splrep(t, T))
-        else:
-            # Uses linear interpolator
-            t2T = interp1d(t, T)
-
         # To ensure convergence of the algorithm, the T(t) thermal cycle is
         # adjusted by a spline and the nucleation time is calculated by
         # increments dt = (max(t) - min(t))/n
-        dt = (max(t) - min(t))/(n - 1)
-        t = np.linspace(min(t), max(t), n)
-        T = t2T(t)
-        nucleation_time = np.full(t.shape, 0, dtype=float)
-        f = np.full(T.shape, 0, dtype=float)
+        cycle = ThermalCycle.create(t, T, n)
+        return cycle.t, cycle.T, self.get_sampled_fraction(cycle.t, cycle.T, cycle.get_window(self.Ts, self.Tf))
+
+    def get_sampled_fraction(self, t, T, active=None):
+        """
+        Calculates the transformed fraction for a thermal cycle already
+        sampled at the instants of time t
+
+        Parameters
+        ----------
+        t : array
+            Time, with at least two points along the last axis
+        T : array
+            Temperatures at the instants of time t. t and T can have
+            leading axes (e.g., several thermal cycles or alloys), which
+            are evaluated at once
+        active : array (optional)
+            Boolean array marking the points at which Tf < T < Ts, if
+            already known
+            Default: None
+
+        Returns
+        -------
+        f : array
+            Phase fraction with the broadcast shape of t and T
+        """
+        return self.get_fraction(self.get_nucleation_time(t, T, active))
+
+    @timed('kinetics')
+    def get_nucleation_time(self, t, T, active=None):
+        """
+        Calculates the cumulative sum of dt/F(T) (the argument of S.inv)
+        for a thermal cycle already sampled at the instants of time t
+
+        Parameters
+        ----------
+        t : array
+            Time, with at least two points along the last axis. The time
+            steps do not need to be uniform
+        T : array
+            Temperatures at the instants of time t
+        active : array (optional)
+            Boolean array marking the points at which Tf < T < Ts, if
+            already known
+            Default: None
+
+        Returns
+        -------
+        nucleation_time : array
+            Array with the broadcast shape of t and T
+        """
+        t, T = np.broadcast_arrays(np.asarray(t, dtype=float), np.asarray(T, dtype=float))
+        # Time increments; the first point takes the increment of the
+        # second one
+        dt = np.diff(t, axis=-1)
+        dt = np.concatenate([dt[..., :1], dt], axis=-1)
 
         # Calculates nucleation time only for T lower than transformation
         # start temperature and higher than Tf
-        filtr = (T < self.Ts) & (T > self.Tf)
-        if np.any(filtr):
-            nucleation_time[filtr] = dt/self.get_transformation_factor(T[filtr])
-            nucleation_time = nucleation_time.cumsum()
-            if T[0] < self.Ts:
-                # This is the factor corresponding to the transformed fraction at t[0]
-                nucleation_time += min(t)/self.get_transformation_factor(T[0])
+        filtr = (T < self.Ts) & (T > self.Tf) if active is None else active
+        if not np.any(filtr):
+            return np.zeros(filtr.shape)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            nucleation_time = np.where(filtr, dt/self.get_transformation_factor(T), 0).cumsum(axis=-1)
+            # This is the factor corresponding to the transformed fraction at t[0]
+            t0, T0 = t[..., :1], T[..., :1]
+            nucleation_time += np.where((T0 < self.Ts) & filtr.any(axis=-1, keepdims=True),
+                                        t0/self.get_transformation_factor(T0), 0)
+
+        return nucleation_time
+
+    def get_fraction(self, nucleation_time):
+        """
+        Converts the nucleation time (see get_nucleation_time) into the
+        transformed fraction
+
+        Parameters
+        ----------
+        nucleation_time : array
+            Cumulative sum of dt/F(T)
 
-            # New filter: calculates f only for nucleation_time inside the bounds
-            # of S.inv(y)
-            filtr = (nucleation_time >= S.ymin) & (nucleation_time <= S.ymax)
-            if np.any(filtr):
-                f[filtr] = S.inv(nucleation_time[filtr])
-                f[nucleation_time < S.ymin] = 0
-                f[nucleation_time > S.ymax] = 1
+        Returns
+        -------
+        f : array
+            Phase fraction with the same shape as nucleation_time
+        """
+        f = np.zeros(np.shape(nucleation_time))
+        # Calculates f only for nucleation_time inside the bounds of S.inv(y)
+        filtr = (nucleation_time >= S.ymin) & (nucleation_time <= S.ymax)
+        if np.any(filtr):
+            f[filtr] = S.inv(nucleation_time[filtr])
+        f[nucleation_time > S.ymax] = 1
 
-        return t, T, f
+        return f
 
 
 class Ferrite(PhaseTransformation):
@@ -781,15 +2046,16 @@ class Martensite:
         self.Ts = self.alloy.Ms
         self.Hv = self.alloy.Hv_martensite
 
-    def get_transformed_fraction(self, t, T, n=1000):
+    def get_transformed_fraction(self, t, T=None, n=1000):
         """
         Calculates the transformed martensite fraction for a given thermal
         cycle T(t) using the Koistinen-Marburger equation
 
         Parameters
         ----------
-        t : iterable
-            Time
+        t : iterable or ThermalCycle object
+            Time, or thermal cycle already fitted and resampled (then T
+            and n are ignored)
         T : iterable
             Temperatures at the instants of time t
         n : int (optional)
@@ -803,21 +2069,259 @@ class Martensite:
             Tuple with arrays time, temperature, phase fraction evaluated
             at n points
         """
-        if len(t) > 3:
-            # Fits T(t) by spline
-            def t2T(t_): return splev(t_, splrep(t, T))
-        else:
-            # Uses linear interpolator
-            t2T = interp1d(t, T)
+        cycle = ThermalCycle.create(t, T, n)
+        return cycle.t, cycle.T, self.get_sampled_fraction(cycle.t, cycle.T, cycle.get_window(self.Ts))
 
-        t = np.linspace(min(t), max(t), n)
-        T = t2T(t)
-        f = np.full(T.shape, 0, dtype=float)
+    @timed('kinetics')
+    def get_sampled_fraction(self, t, T, active=None):
+        """
+        Calculates the transformed martensite fraction for a thermal cycle
+        already sampled at the instants of time t
+
+        Parameters
+        ----------
+        t : array
+            Time
+        T : array
+            Temperatures at the instants of time t. Leading axes are
+            evaluated at once
+        active : array (optional)
+            Boolean array marking the points at which T < Ms, if already
+            known
+            Default: None
+
+        Returns
+        -------
+        f : array
+            Phase fraction with the broadcast shape of t and T
+        """
+        t, T = np.broadcast_arrays(np.asarray(t, dtype=float), np.asarray(T, dtype=float))
+        active = T < self.alloy.Ms if active is None else active
+        return np.where(active, 1 - np.exp(-self.alloy.alpha_martensite*(self.alloy.Ms - T)), 0.)
+
+
+class ResultTable(object):
+    """
+    Table of results stored as NumPy arrays of the same length (one per
+    column). Columns are accessed by name, e.g., table['ferrite'], and a
+    pandas DataFrame is only created when requested by to_dataframe()
+
+    Parameters
+    ----------
+    meta : dict (optional)
+        Metadata describing the results (e.g., alloy composition)
+        Default: None
+    **columns :
+        Columns of the table
+    """
+
+    def __init__(self, meta=None, **columns):
+        self.data = {key: np.asarray(value) for key, value in columns.items()}
+        self.meta = dict(meta or {})
+        if len(set(len(value) for value in self.data.values())) > 1:
+            raise ValueError('All columns must have the same length')
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = np.broadcast_to(value, (len(self),)).copy()
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(next(iter(self.data.values()), ()))
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __repr__(self):
+        return '{}({} rows; columns: {})'.format(self.__class__.__name__, len(self), ', '.join(self.columns))
+
+    @property
+    def columns(self):
+        return list(self.data)
+
+    def row(self, i):
+        """
+        Returns dictionary with the values of the row i
+        """
+        return {key: value[i] for key, value in self.data.items()}
+
+    def to_records(self):
+        """
+        Returns the table as a list of dictionaries (one per row) of
+        Python scalars, e.g., for JSON serialization without pandas
+        """
+        columns = {key: value.tolist() for key, value in self.data.items()}
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def round(self, decimals=0):
+        """
+        Returns a copy of the table with the numeric columns rounded to
+        the given number of decimals
+        """
+        return ResultTable(self.meta, **{key: np.round(value, decimals) if value.dtype.kind == 'f' else value
+                                         for key, value in self.data.items()})
+
+    def to_dataframe(self):
+        """
+        Returns the table as a pandas DataFrame
+        """
+        import pandas as pd
+
+        df = pd.DataFrame(self.data)
+        df.attrs.update(self.meta)
+        return df
 
-        filtr = T < self.alloy.Ms
-        if np.any(filtr):
-            f[filtr] = 1 - np.exp(-self.alloy.alpha_martensite*(self.alloy.Ms - T[filtr]))
-        return t, T, f
+
+@timed('coupling')
+def couple_phase_fractions(f_ferr, f_pear, f_bain, f_mart, x0=None):
+    """
+    Corrects the uncoupled phase fractions of ferrite, pearlite, bainite,
+    and martensite for the competition between phases, i.e., each phase
+    only grows in the fraction of austenite not yet consumed by the
+    others. At every time step i the corrected fractions x, y, z, w
+    satisfy the system
+
+        x = x[i-1] + df_ferr[i]*(1 - x - y - z - w)/(1 - f_ferr[i])
+        y = y[i-1] + df_pear[i]*(1 - x - y - z - w)/(1 - f_pear[i])
+        z = z[i-1] + df_bain[i]*(1 - x - y - w)
+        w = w[i-1] + df_mart[i]*(1 - x - y - z)
+
+    (for f_ferr[i] = 1 the first equation becomes
+    x = x[i-1] + df_ferr[i]*(1 - y - z - w), and likewise for pearlite),
+    which is linear in x, y, z, w. The matrix of the system is a diagonal
+    matrix plus a rank-one update, so it is solved in closed form
+    (Sherman-Morrison formula) with a few vectorized operations per time
+    step
+
+    Parameters
+    ----------
+    f_ferr, f_pear, f_bain, f_mart : arrays
+        Uncoupled phase fractions, with the time steps along the last
+        axis. Any leading axes (e.g., multiple thermal cycles) are
+        evaluated in the same pass
+    x0 : array (optional)
+        Corrected phase fractions at the first time step (shape (..., 4)),
+        e.g., to continue a previous evaluation
+        Default: None (uncoupled fractions at the first time step)
+
+    Returns
+    -------
+    x : array
+        Corrected phase fractions of ferrite, pearlite, bainite, and
+        martensite along the last axis (shape (..., n, 4))
+    """
+    # Time steps along the first axis and phases along the second one, so
+    # that the loop operates on contiguous rows of thermal cycles
+    f = np.stack([np.moveaxis(a, -1, 0) for a in np.broadcast_arrays(f_ferr, f_pear, f_bain, f_mart)],
+                 axis=1).astype(float)
+    inc = np.diff(f, axis=0)
+
+    # Coefficients of ferrite and pearlite increments
+    partial = f[1:, :2] < 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = inc.copy()
+        k[:, :2] = np.where(partial, inc[:, :2]/(1 - f[1:, :2]), inc[:, :2])
+
+    # A u[i] = u[i-1] + k[i], with A = D + k 1^T and D diagonal (the
+    # increment of each phase is proportional to the sum of the fractions,
+    # except for its own fraction if it is not divided by 1 - f)
+    d = 1 - np.where(np.concatenate([partial, np.zeros(partial.shape, dtype=bool)], axis=1), 0, k)
+
+    x = np.empty(f.shape)
+    x[0] = f[0] if x0 is None else np.moveaxis(x0, -1, 0)
+
+    if np.all(np.abs(d) > 1e-6):
+        # Sherman-Morrison formula: A^-1 v = D^-1 v - D^-1 k (1^T D^-1 v)/(1 + 1^T D^-1 k)
+        g = k/d
+        h = g/(1 + g.sum(axis=1, keepdims=True))
+        for i in range(1, len(f)):
+            u = (x[i-1] + k[i-1])/d[i-1]
+            x[i] = u - h[i-1]*u.sum(axis=0)
+    else:
+        # Some phase is fully formed in a single time step
+        k, partial = np.moveaxis(k, 1, -1), np.moveaxis(partial, 1, -1)
+        A = np.repeat(k[..., :, None], 4, axis=-1)
+        A[..., 2, 2] = 1
+        A[..., 3, 3] = 1
+        A[..., 0, 0] = 1 + np.where(partial[..., 0], k[..., 0], 0)
+        A[..., 1, 1] = 1 + np.where(partial[..., 1], k[..., 1], 0)
+        A_inv = np.linalg.inv(A)
+        c = np.matmul(A_inv, k[..., None])[..., 0]
+        for i in range(1, len(f)):
+            x[i] = np.moveaxis(np.matmul(A_inv[i-1], np.moveaxis(x[i-1], 0, -1)[..., None])[..., 0] + c[i-1], -1, 0)
+    return np.moveaxis(x, (0, 1), (-2, -1))
+
+
+@timed('kinetics')
+def get_martensite_critical_cooling_rate(phases, f=.5, Tini=900, Tfin=25, n=500, phi_min=1e-3, phi_max=1e4,
+                                         rtol=1e-3):
+    """
+    Calculates the slowest linear cooling rate from Tini to Tfin for which
+    the final (coupled) martensite fraction reaches f. The final martensite
+    fraction increases with the cooling rate, so the critical cooling rate
+    is bracketed between phi_min and phi_max and found by bisection in
+    log(phi), for all fractions and alloys at once
+
+    Parameters
+    ----------
+    phases : dict
+        Dictionary with the ferrite, pearlite, bainite, and martensite
+        objects (e.g., from `AlloyBatch.get_phase_transformations`)
+    f : float or iterable (optional)
+        Martensite fraction(s)
+        Default: .5 (50%)
+    Tini : float (optional)
+        Initial temperature
+        Default: 900
+    Tfin : float (optional)
+        Final temperature
+        Default: 25
+    n : int (optional)
+        Number of points of the temperature grid
+        Default: 500
+    phi_min, phi_max : float (optional)
+        Bracket of cooling rates
+        Default: 1e-3, 1e4
+    rtol : float (optional)
+        Relative tolerance of the critical cooling rate
+        Default: 1e-3
+
+    Returns
+    -------
+    cooling_rate : float or array
+        Critical cooling rate, with the shape of the alloy properties
+        ((N,) for batches). If f is iterable, the shape is (len(f), N).
+        phi_min if the fraction is reached at phi_min and NaN if it is not
+        reached at phi_max
+    """
+    shape = np.shape(np.atleast_1d(f)) + np.shape(phases['martensite'].Ts)[:-1]
+    target = np.broadcast_to(np.reshape(f, np.shape(f) + (1,)*(len(shape) - np.ndim(f))), shape)
+    T = np.linspace(Tini, Tfin, n)
+
+    def get_final_martensite(log_phi):
+        t = (Tini - T)/np.exp(log_phi)[..., None]
+        x = couple_phase_fractions(*[phases[name].get_sampled_fraction(t, T)
+                                     for name in ['ferrite', 'pearlite', 'bainite', 'martensite']])
+        return x[..., -1, 3]
+
+    lo = np.full(shape, np.log(phi_min))
+    hi = np.full(shape, np.log(phi_max))
+    reached_min = get_final_martensite(lo) >= target
+    reached_max = get_final_martensite(hi) >= target
+
+    for _ in range(int(np.ceil(np.log2(np.log(phi_max/phi_min)/np.log1p(rtol))))):
+        mid = .5*(lo + hi)
+        reached = get_final_martensite(mid) >= target
+        hi = np.where(reached, mid, hi)
+        lo = np.where(reached, lo, mid)
+
+    cooling_rate = np.where(reached_max, np.exp(hi), np.nan)
+    cooling_rate = np.where(reached_min, phi_min, cooling_rate)
+    return cooling_rate if np.ndim(f) > 0 else cooling_rate[0]
 
 
 class TransformationDiagrams:
@@ -831,115 +2335,380 @@ class TransformationDiagrams:
                               ferrite='Ferrite', pearlite='Pearlite', bainite='Bainite',
                               martensite='Martensite', austenite='Austenite')
 
-    def __init__(self, alloy):
-        self.alloy = alloy
+    def __init__(self, alloy):
+        self.alloy = alloy
+
+        self.ferrite = Ferrite(self.alloy)
+        self.pearlite = Pearlite(self.alloy)
+        self.bainite = Bainite(self.alloy)
+        self.martensite = Martensite(self.alloy)
+
+        self.df_TTT = None
+        self.df_CCT = None
+
+    def get_cache_params(self):
+        """
+        Returns the parameters that determine the results of the alloy,
+        used as part of the keys of the result cache: composition, grain
+        size, equations of the critical temperatures (names and
+        fingerprints), and constants of the phase transformations
+        """
+        constants = {}
+        for name in ['ferrite', 'pearlite', 'bainite']:
+            phase = getattr(self, name)
+            constants[name] = dict(Q=phase.Q, n1=phase.n1, n2=phase.n2, Ts=phase.Ts, Tf=phase.Tf,
+                                   comp_factor=phase.comp_factor)
+        constants['martensite'] = dict(Ms=self.alloy.Ms, alpha=self.alloy.alpha_martensite)
+        return dict(composition=self.alloy.get_composition(), gs=self.alloy.gs,
+                    equations=self.alloy.equations,
+                    equation_code=get_equation_fingerprints(self.alloy.equations), constants=constants)
+
+    def get_transformed_fraction(self, t, T=None, n=1000):
+        """
+        Calculates transformation curves for a given T(t) thermal cycle
+
+        Parameters
+        ----------
+        t : iterable or ThermalCycle object
+            Time, or thermal cycle already fitted and resampled (then T
+            and n are ignored)
+        T : iterable
+            Temperatures at the instants of time t
+        n : int (optional)
+            Number of points at which the transformed fractions are
+            calculated
+            Default: 1000
+
+        Returns
+        -------
+        f : ResultTable object
+            Table containing the time, temperature, and phase fractions
+            of ferrite, pearlite, bainite, martensite, and austenite at n
+            points, and also the Vickers hardness for each data point.
+            Call f.to_dataframe() to get a pandas DataFrame
+        """
+        # T(t) is fitted and resampled once and shared by all phases
+        cycle = ThermalCycle.create(t, T, n)
+
+        f_ferr = self.ferrite.get_transformed_fraction(cycle)[2]
+        f_pear = self.pearlite.get_transformed_fraction(cycle)[2]
+        f_bain = self.bainite.get_transformed_fraction(cycle)[2]
+        f_mart = self.martensite.get_transformed_fraction(cycle)[2]
+
+        f = self.get_coupled_fraction(f_ferr, f_pear, f_bain, f_mart, cycle.phi700)
+        return ResultTable(t=cycle.t, T=cycle.T, **f).round(12)
+
+    def get_transformed_fraction_adaptive(self, t, T=None, tol=1e-3, tol_Hv=1., n_init=65, n_max=20001):
+        """
+        Calculates transformation curves for a given T(t) thermal cycle
+        with adaptive time steps. At each iteration, the phase fractions
+        are calculated on the current grid and on the grid with all its
+        time steps bisected. The difference between both solutions gives
+        the error introduced by each time step, and the time steps that
+        account for half of the total error are bisected. The refinement
+        stops when the final phase fractions and hardness of both
+        solutions differ by less than tol and tol_Hv
+
+        Parameters
+        ----------
+        t : iterable or ThermalCycle object
+            Time, or thermal cycle already fitted (then T is ignored)
+        T : iterable
+            Temperatures at the instants of time t
+        tol : float (optional)
+            Tolerance of the final phase fractions
+            Default: 1e-3
+        tol_Hv : float (optional)
+            Tolerance of the final Vickers hardness (HV)
+            Default: 1
+        n_init : int (optional)
+            Number of evenly spaced points of the initial grid. The (t, T)
+            points are also included if they are not more than n_init
+            Default: 65
+        n_max : int (optional)
+            Maximum number of points
+            Default: 20001
+
+        Returns
+        -------
+        f : ResultTable object
+            Table containing the time, temperature, phase fractions, and
+            Vickers hardness at the points of the adapted grid. f.meta
+            reports the number of time steps used ('steps'), the number of
+            iterations ('iterations'), the estimated errors of the final
+            phase fractions ('error') and hardness ('error_Hv'), and
+            whether the tolerances were met ('converged')
+        """
+        cycle = ThermalCycle.create(t, T)
+        fields = ['ferrite', 'pearlite', 'bainite', 'martensite']
+
+        def bisect(t, idx):
+            return np.sort(np.append(t, (t[idx] + t[idx + 1])/2))
+
+        t = np.linspace(cycle.t[0], cycle.t[-1], n_init)
+        if len(cycle.t_data) <= n_init:
+            t = np.union1d(t, cycle.t_data)
+        f = self.get_sampled_fraction(t, cycle.get_temperature(t), cycle.phi700)
+
+        iterations = 0
+        while True:
+            iterations += 1
+            t_fine = bisect(t, np.arange(len(t) - 1))
+            T_fine = cycle.get_temperature(t_fine)
+            f_fine = self.get_sampled_fraction(t_fine, T_fine, cycle.phi700)
+
+            # Difference between both solutions at the points of the current
+            # grid relative to the tolerances
+            diff = [(f_fine[field][::2] - f[field])/tol for field in fields]
+            error = np.abs(diff)[:, -1].max()*tol
+            error_Hv = 0.
+            if cycle.phi700 is not None:
+                diff.append((f_fine['Hv'][::2] - f['Hv'])/tol_Hv)
+                error_Hv = abs(diff[-1][-1])*tol_Hv
+
+            converged = error <= tol and error_Hv <= tol_Hv
+            if converged:
+                break
+
+            # Error introduced by each time step. The largest ones accounting
+            # for half of the total are bisected
+            local = np.abs(np.diff(diff, axis=-1)).max(axis=0)
+            order = np.argsort(local)[::-1]
+            n = np.searchsorted(np.cumsum(local[order]), .5*local.sum()) + 1
+            n = min(n, (n_max + 1)//2 - len(t))
+            if n <= 0:
+                break
+
+            t = bisect(t, order[:n])
+            f = self.get_sampled_fraction(t, cycle.get_temperature(t), cycle.phi700)
+
+        meta = dict(steps=len(t_fine) - 1, iterations=iterations, error=error, error_Hv=error_Hv,
+                    converged=converged)
+        return ResultTable(meta=meta, t=t_fine, T=T_fine, **f_fine).round(12)
+
+    def get_sampled_fraction(self, t, T, phi700=None):
+        """
+        Calculates the coupled phase fractions and hardness for thermal
+        cycles already sampled at the instants of time t
+
+        Parameters
+        ----------
+        t : array
+            Time, with the time steps along the last axis
+        T : array
+            Temperatures at the instants of time t. t and T can have
+            leading axes (e.g., several cooling rates), which are evaluated
+            at once
+        phi700 : float or array (optional)
+            Cooling rate at 700 oC of each thermal cycle (shape of the
+            leading axes). If None, the hardness is not calculated
+            Default: None
+
+        Returns
+        -------
+        f : dict
+            Dictionary with the arrays of phase fractions of ferrite,
+            pearlite, bainite, martensite, and austenite, and the Vickers
+            hardness, all with the broadcast shape of t and T
+        """
+        # Uncorrected phase fractions
+        f_ferr = self.ferrite.get_sampled_fraction(t, T)
+        f_pear = self.pearlite.get_sampled_fraction(t, T)
+        f_bain = self.bainite.get_sampled_fraction(t, T)
+        f_mart = self.martensite.get_sampled_fraction(t, T)
+
+        return self.get_coupled_fraction(f_ferr, f_pear, f_bain, f_mart, phi700)
+
+    def get_coupled_fraction(self, f_ferr, f_pear, f_bain, f_mart, phi700=None):
+        """
+        Couples the uncorrected phase fractions and calculates the
+        hardness
 
-        self.ferrite = Ferrite(self.alloy)
-        self.pearlite = Pearlite(self.alloy)
-        self.bainite = Bainite(self.alloy)
-        self.martensite = Martensite(self.alloy)
+        Parameters
+        ----------
+        f_ferr, f_pear, f_bain, f_mart : array
+            Uncorrected phase fractions of ferrite, pearlite, bainite, and
+            martensite, with the time steps along the last axis
+        phi700 : float or array (optional)
+            Cooling rate at 700 oC of each thermal cycle (shape of the
+            leading axes). If None, the hardness is not calculated
+            Default: None
 
-        self.df_TTT = None
-        self.df_CCT = None
+        Returns
+        -------
+        f : dict
+            Dictionary with the arrays of phase fractions of ferrite,
+            pearlite, bainite, martensite, and austenite, and the Vickers
+            hardness
+        """
+        x = couple_phase_fractions(f_ferr, f_pear, f_bain, f_mart)
+        f = dict(ferrite=x[..., 0], pearlite=x[..., 1], bainite=x[..., 2],
+                 martensite=x[..., 3], austenite=1. - x.sum(axis=-1))
+
+        with timer('hardness'):
+            if phi700 is not None:
+                phi700 = np.asarray(phi700, dtype=float)[..., None]
+                f['Hv'] = f['martensite']*self.martensite.Hv(phi700) + f['bainite']*self.bainite.Hv(phi700) + \
+                    (f['ferrite'] + f['pearlite'])*self.ferrite.Hv(phi700)
+            else:
+                f['Hv'] = np.full(f['austenite'].shape, np.nan)
 
-    def get_transformed_fraction(self, t, T, n=1000):
+        return f
+
+    def get_CCT_fractions(self, cooling_rates, Tini=900, Tfin=25, n=1000, chunk_size=64):
         """
-        Calculates transformation curves for a given T(t) thermal cycle
+        Calculates the final phase fractions and hardness after linear
+        cooling from Tini to Tfin for several cooling rates. The coupled
+        phase fraction model is evaluated for all cooling rates at once on
+        a shared temperature grid
 
         Parameters
         ----------
-        t : iterable
-            Time
-        T : iterable
-            Temperatures at the instants of time t
+        cooling_rates : float or iterable
+            Cooling rates
+        Tini : float (optional)
+            Initial temperature
+            Default: 900
+        Tfin : float (optional)
+            Final temperature
+            Default: 25
         n : int (optional)
-            Number of points at which the transformed fractions are
-            calculated
+            Number of points of the temperature grid
             Default: 1000
+        chunk_size : int (optional)
+            Maximum number of cooling rates evaluated at once
+            Default: 64
 
         Returns
         -------
-        f : pandas DataFrame
-            DataFrame containing the time, temperature, and phase fractions
-            of ferrite, pearlite, bainite, martensite, and austenite at n
-            points, and also the Vickers hardness for each data point
+        f : ResultTable object
+            Table with the cooling rates and the final phase fractions of
+            ferrite, pearlite, bainite, martensite, austenite, and the
+            Vickers hardness for each one of them
         """
-        # Uncorrected phase fractions
-        _, _, f_ferr = self.ferrite.get_transformed_fraction(t, T, n)
-        _, _, f_pear = self.pearlite.get_transformed_fraction(t, T, n)
-        _, _, f_bain = self.bainite.get_transformed_fraction(t, T, n)
-        t, T, f_mart = self.martensite.get_transformed_fraction(t, T, n)
-
-        f_ferr_inc = np.zeros(f_ferr.shape)
-        f_pear_inc = np.zeros(f_pear.shape)
-        f_bain_inc = np.zeros(f_bain.shape)
-        f_mart_inc = np.zeros(f_mart.shape)
-        f_ferr_inc[1:] = np.diff(f_ferr)
-        f_pear_inc[1:] = np.diff(f_pear)
-        f_bain_inc[1:] = np.diff(f_bain)
-        f_mart_inc[1:] = np.diff(f_mart)
-
-        f = pd.DataFrame(columns=['t', 'T', 'ferrite', 'pearlite',
-                                  'bainite', 'martensite', 'austenite'])
-        f['t'] = t
-        f['T'] = T
-        f.fillna(0, inplace=True)
-        f.loc[0, 'ferrite'] = f_ferr[0]
-        f.loc[0, 'pearlite'] = f_pear[0]
-        f.loc[0, 'bainite'] = f_bain[0]
-        f.loc[0, 'martensite'] = f_mart[0]
-        f.loc[0, 'austenite'] = 1. - f_ferr[0] - f_pear[0] - f_bain[0] - f_mart[0]
-
-        def f1(i, x, y, z, w):
-            if f_ferr[i] < 1:
-                return f.loc[i-1, 'ferrite'] + f_ferr_inc[i]*(1 - x - y - z - w)/(1 - f_ferr[i]) - x
-            else:
-                return f.loc[i-1, 'ferrite'] + f_ferr_inc[i]*(1 - y - z - w) - x
+        cooling_rates = np.atleast_1d(np.asarray(cooling_rates, dtype=float))
 
-        def f2(i, x, y, z, w):
-            if f_pear[i] < 1:
-                return f.loc[i-1, 'pearlite'] + f_pear_inc[i]*(1 - x - y - z - w)/(1 - f_pear[i]) - y
-            else:
-                return f.loc[i-1, 'pearlite'] + f_pear_inc[i]*(1 - x - z - w) - y
-
-        def f3(i, x, y, z, w): return f.loc[i-1, 'bainite'] + f_bain_inc[i]*(1 - x - y - w) - z
+        def compute():
+            f = self.get_family_fractions(LinearCooling(cooling_rates, Tini), Tfin, n, chunk_size)
+            return ResultTable(meta=dict(Tini=Tini, Tfin=Tfin), cooling_rate=cooling_rates,
+                               **{key: f[key] for key in ['ferrite', 'pearlite', 'bainite', 'martensite',
+                                                          'austenite', 'Hv']})
 
-        def f4(i, x, y, z, w): return f.loc[i-1, 'martensite'] + f_mart_inc[i]*(1 - x - y - z) - w
+        return get_cached('CCT_fractions', compute, cooling_rates=cooling_rates, Tini=Tini, Tfin=Tfin, n=n,
+                          **self.get_cache_params())
 
-        for i in range(len(f))[1:]:
-            x0 = [f.loc[i-1, 'ferrite'], f.loc[i-1, 'pearlite'],
-                  f.loc[i-1, 'bainite'], f.loc[i-1, 'martensite']]
-
-            # Solves system of non-linear equations to get corrected phase fractions
-            res = root(lambda x: [f1(i, *x), f2(i, *x), f3(i, *x), f4(i, *x)], x0=x0)
+    def get_family_fractions(self, law, Tfin=25, n=1000, chunk_size=64):
+        """
+        Calculates the final phase fractions and hardness for a family of
+        cooling laws (see `CoolingLaw`). All members are sampled on a
+        shared temperature grid from law.Tini to Tfin and evaluated at
+        once; the cooling rate at 700 oC of each member is given by the
+        cooling law, so the sampled cycles are not inverted
 
-            f.loc[i, 'ferrite'] = res.x[0]
-            f.loc[i, 'pearlite'] = res.x[1]
-            f.loc[i, 'bainite'] = res.x[2]
-            f.loc[i, 'martensite'] = res.x[3]
-            f.loc[i, 'austenite'] = 1. - res.x.sum()
+        Parameters
+        ----------
+        law : CoolingLaw object
+            Family of cooling laws
+        Tfin : float (optional)
+            Final temperature
+            Default: 25
+        n : int (optional)
+            Number of points of the temperature grid
+            Default: 1000
+        chunk_size : int (optional)
+            Maximum number of members evaluated at once
+            Default: 64
 
-        phi700 = None
+        Returns
+        -------
+        f : ResultTable object
+            Table with the parameter of each member (law.parameter_name),
+            its cooling rate at 700 oC (phi700), and the final phase
+            fractions of ferrite, pearlite, bainite, martensite,
+            austenite, and the Vickers hardness. Members that do not reach
+            Tfin (e.g., Newtonian cooling towards Tenv = Tfin) are
+            evaluated at the lowest temperature they reach
+        """
+        T = np.linspace(law.Tini, Tfin, n)
+        times = law.get_time(T)
+        phi700 = law.get_cooling_rate([700.])[:, 0]
+
+        final = {}
+        for start in range(0, len(law), chunk_size):
+            t = times[start:start + chunk_size]
+            # Temperatures that are not reached take the time and
+            # temperature of the closest reached point, so they add
+            # nothing to the transformed fractions
+            reached = np.isfinite(t)
+            idx = np.maximum.accumulate(np.where(reached, np.arange(n), -1), axis=-1)
+            idx = np.where(idx < 0, np.argmax(reached, axis=-1)[:, None], idx)
+            f = self.get_sampled_fraction(np.take_along_axis(t, idx, axis=-1), T[idx],
+                                          phi700[start:start + chunk_size])
+            for key, value in f.items():
+                final.setdefault(key, []).append(value[:, -1])
+
+        # Phase fractions are rounded like in get_transformed_fraction, so
+        # that the round-off errors of the coupling do not take them out
+        # of [0, 1] (adding 0. turns -0. into 0.)
+        return ResultTable(meta=dict(Tini=law.Tini, Tfin=Tfin, law=repr(law)),
+                           **{law.parameter_name: law.parameters, 'phi700': phi700},
+                           **{key: np.concatenate(value) if key == 'Hv' else np.concatenate(value).round(12) + 0.
+                              for key, value in final.items()})
+
+    def get_hardness_curve(self, cooling_rates=None, Tini=900, Tfin=25, n=1000, law=None):
+        """
+        Calculates the final phase fractions and Vickers hardness as a
+        function of the cooling rate, for hundreds of cooling rates at
+        once (see `get_CCT_fractions` and `get_family_fractions`)
 
-        try:
-            T2t = interp1d(T, t)
-            # Gets cooling rate at 700 oC
-            phi700 = 2./(T2t(699.) - T2t(701.))
-            if phi700 == 0:
-                phi700 = None
-        except ValueError:
-            # This might happen for isothermal heat treatments
-            pass
+        Parameters
+        ----------
+        cooling_rates : iterable (optional)
+            Cooling rates of linear cooling from Tini to Tfin. Ignored if
+            law is given
+            Default: None (201 cooling rates from 1e-2 to 1e3 oC/s, evenly
+            spaced in log scale)
+        Tini : float (optional)
+            Initial temperature of linear cooling
+            Default: 900
+        Tfin : float (optional)
+            Final temperature
+            Default: 25
+        n : int (optional)
+            Number of points of the temperature grid
+            Default: 1000
+        law : CoolingLaw object (optional)
+            Family of non-linear cooling laws (e.g., NewtonianCooling)
+            Default: None (linear cooling)
 
-        if phi700 is not None:
-            f['Hv'] = f['martensite']*self.martensite.Hv(phi700) + f['bainite']*self.bainite.Hv(phi700) + \
-                (f['ferrite'] + f['pearlite'])*self.ferrite.Hv(phi700)
+        Returns
+        -------
+        curve : ResultTable object
+            Table with the parameter of the family (cooling_rate for
+            linear cooling), the cooling rate at 700 oC (phi700), the final
+            phase fractions, the hardness Hv, and the hardness of each
+            constituent at phi700 (Hv_martensite, Hv_bainite, and
+            Hv_ferrite_pearlite)
+        """
+        if law is None:
+            if cooling_rates is None:
+                cooling_rates = 10**np.linspace(-2, 3, 201)
+            law = LinearCooling(cooling_rates, Tini)
+            f = self.get_CCT_fractions(law.parameters, Tini, Tfin, n)
+            curve = ResultTable(meta=f.meta, cooling_rate=f['cooling_rate'], phi700=f['cooling_rate'])
+            for key in f.columns[1:]:
+                curve[key] = f[key]
         else:
-            f['Hv'] = np.nan
+            curve = self.get_family_fractions(law, Tfin, n)
 
-        return f.round(12)
+        with timer('hardness'):
+            curve['Hv_martensite'] = self.martensite.Hv(curve['phi700'])
+            curve['Hv_bainite'] = self.bainite.Hv(curve['phi700'])
+            curve['Hv_ferrite_pearlite'] = self.ferrite.Hv(curve['phi700'])
+        return curve
 
-    def draw_thermal_cycle(self, ax, t, T, n=100, **kwargs):
+    @timed('plotting')
+    def draw_thermal_cycle(self, ax, t, T=None, n=100, **kwargs):
         """
         Draw thermal cycle (cooling curve) over AxesSubplot object
 
@@ -947,8 +2716,8 @@ class TransformationDiagrams:
         ----------
         ax : AxesSubplot object
             Axis where to draw the thermal cycle curve
-        t : iterable
-            Time
+        t : iterable or ThermalCycle object
+            Time, or thermal cycle already fitted (then T is ignored)
         T : iterable
             Temperatures at the instants of time t
         n : int (optional)
@@ -962,89 +2731,350 @@ class TransformationDiagrams:
             Line2D object corresponding to drawn curve
         """
 
-        if len(t) > 3:
-            # Fits T(t) by spline
-            def t2T(t_): return splev(t_, splrep(t, T))
+        cycle = ThermalCycle.create(t, T, n)
+        if cycle.n != n:
+            t = np.linspace(cycle.t[0], cycle.t[-1], n)
+            T = cycle.get_temperature(t)
         else:
-            # Uses linear interpolator
-            t2T = interp1d(t, T)
-
-        t = np.linspace(min(t), max(t), n)
-        T = t2T(t)
+            t, T = cycle.t, cycle.T
 
         kw = dict(color='k', ls='--')
         kw.update(kwargs)
 
         return ax.plot(t, T, **kw)
 
-    def TTT(self, fs=1e-2, ff=.99, ax=None, **kwargs):
+    def get_TTT_temperatures(self):
         """
-        Plot TTT diagram
+        Returns dictionary with the temperatures (1 oC apart) at which the
+        TTT curves of ferrite, pearlite, and bainite are calculated
+        """
+        return dict(ferrite=np.arange(self.alloy.Bs, self.alloy.Ae3),
+                    pearlite=np.arange(self.alloy.Bs, self.alloy.Ae1),
+                    bainite=np.arange(self.alloy.Ms, self.alloy.Bs))
+
+    def get_TTT_data(self, fs=1e-2, ff=.99):
+        """
+        Calculates the TTT curves (isothermal transformation start and
+        finish times) of ferrite, pearlite, and bainite
 
         Parameters
         ----------
         fs : float (optional)
             Transformation start phase fraction
             Default: 1e-2 (1%)
+        ff : float (optional)
+            Transformation finish phase fraction
+            Default: .99 (99%)
+
+        Returns
+        -------
+        data : dict
+            Dictionary with a ResultTable object for ferrite, pearlite, and
+            bainite, containing the temperatures (T), and the start (ts)
+            and finish (tf) times
+        """
+        def compute():
+            data = {}
+            for name, T in self.get_TTT_temperatures().items():
+                phase = getattr(self, name)
+                data[name] = ResultTable(T=T, ts=phase.get_transformation_time(T, fs),
+                                         tf=phase.get_transformation_time(T, ff))
+            return data
+
+        return get_cached('TTT', compute, fs=fs, ff=ff, **self.get_cache_params())
+
+    def get_CCT_data(self, Tini=900, fs=1e-2, ff=.99, phi_min=1e-4, phi_max=1e4, phi_steps=420):
+        """
+        Calculates the CCT curves (transformation start and finish
+        temperatures and times during linear cooling) of ferrite, pearlite,
+        and bainite
+
+        Parameters
+        ----------
+        Tini : float (optional)
+            Initial temperature
+            Default: 900
         fs : float (optional)
+            Transformation start phase fraction
+            Default: 1e-2 (1%)
+        ff : float (optional)
             Transformation finish phase fraction
             Default: .99 (99%)
-        ax : AxesSubplot object (optional)
-            Axis where to plot the TTT curve. If None, then a new axis is
-            created
-            Default: None
-        **kwargs :
-            Optional arguments passed to ax.plot(*args, **kwargs)
+        phi_min, phi_max : float (optional)
+            Minimum and maximum cooling rates
+            Default: 1e-4, 1e4
+        phi_steps : int (optional)
+            Number of cooling rates, logarithmically spaced
+            Default: 420
 
         Returns
         -------
-        ax : AxesSubplot object
+        data : ResultTable object
+            Table with the cooling rates and the start (Ts_ferrite, ...)
+            and finish (Tf_ferrite, ...) temperatures and times (ts_ferrite,
+            tf_ferrite, ...) of each phase. The temperatures are NaN if the
+            fraction is not reached
         """
-        if ax is None:
-            fig, ax = plt.subplots(figsize=(6, 6))
-        else:
-            fig = ax.get_figure()
+        def compute():
+            cooling_rates = 10**np.linspace(np.log10(phi_min), np.log10(phi_max), phi_steps)
+            data = ResultTable(meta=dict(Tini=Tini, fs=fs, ff=ff), cooling_rate=cooling_rates)
+            for name in ['ferrite', 'pearlite', 'bainite']:
+                phase = getattr(self, name)
+                # Start and finish temperatures
+                Ts, Tf = phase.get_kinetic_integral(phase.Tf).get_transformation_temperature(
+                    cooling_rates, [fs, ff], Tini)
+                data['Ts_' + name] = Ts
+                data['Tf_' + name] = Tf
+                data['ts_' + name] = (Tini - Ts)/cooling_rates
+                data['tf_' + name] = (Tini - Tf)/cooling_rates
+            return data
+
+        return get_cached('CCT', compute, Tini=Tini, fs=fs, ff=ff, phi_min=phi_min, phi_max=phi_max,
+                          phi_steps=phi_steps, **self.get_cache_params())
+
+    def get_TTT_table(self, fs=1e-2, ff=.99):
+        """
+        Returns the TTT curves (see `get_TTT_data`) as a single table in
+        long format, with one row per phase and temperature
+
+        Returns
+        -------
+        table : ResultTable object
+            Table with the columns phase, T, ts, and tf
+        """
+        data = self.get_TTT_data(fs, ff)
+        return ResultTable(meta=dict(fs=fs, ff=ff),
+                           phase=np.concatenate([np.full(len(data[name]), name) for name in data]),
+                           **{key: np.concatenate([data[name][key] for name in data]) for key in ['T', 'ts', 'tf']})
+
+    def get_CCT_table(self, Tini=900, fs=1e-2, ff=.99, phi_min=1e-4, phi_max=1e4, phi_steps=420):
+        """
+        Returns the CCT curves (see `get_CCT_data`) as a single table in
+        long format, with one row per phase and cooling rate
+
+        Returns
+        -------
+        table : ResultTable object
+            Table with the columns phase, cooling_rate, Ts, Tf, ts, and tf
+        """
+        data = self.get_CCT_data(Tini, fs, ff, phi_min, phi_max, phi_steps)
+        names = ['ferrite', 'pearlite', 'bainite']
+        table = ResultTable(meta=data.meta, phase=np.repeat(names, len(data)),
+                            cooling_rate=np.tile(data['cooling_rate'], len(names)))
+        for key in ['Ts', 'Tf', 'ts', 'tf']:
+            table[key] = np.concatenate([data[key + '_' + name] for name in names])
+        return table
+
+    def get_TTT_isopleths(self, fractions=(1e-2, .1, .5, .9, .99)):
+        """
+        Calculates the TTT isopleths (isothermal times to reach each
+        fraction) of ferrite, pearlite, and bainite. The transformation
+        factor of each phase is evaluated once and scaled by S(f) for all
+        fractions at once
+
+        Parameters
+        ----------
+        fractions : iterable (optional)
+            Transformed fractions
+            Default: (1e-2, .1, .5, .9, .99)
+
+        Returns
+        -------
+        table : ResultTable object
+            Table in long format with the columns phase, f, T, and t (one
+            row per phase, fraction, and temperature)
+        """
+        fractions = np.atleast_1d(np.asarray(fractions, dtype=float))
+
+        def compute():
+            columns = dict(phase=[], f=[], T=[], t=[])
+            for name, T in self.get_TTT_temperatures().items():
+                F = getattr(self, name).get_transformation_factor(T)
+                columns['phase'].append(np.full(len(fractions)*len(T), name))
+                columns['f'].append(np.repeat(fractions, len(T)))
+                columns['T'].append(np.tile(T, len(fractions)))
+                columns['t'].append(np.multiply.outer(S(fractions), F).ravel())
+            return ResultTable(meta=dict(fractions=fractions),
+                               **{key: np.concatenate(value) for key, value in columns.items()})
+
+        return get_cached('TTT_isopleths', compute, fractions=fractions, **self.get_cache_params())
+
+    def get_CCT_isopleths(self, fractions=(1e-2, .1, .5, .9, .99), Tini=900, phi_min=1e-4, phi_max=1e4,
+                          phi_steps=420):
+        """
+        Calculates the CCT isopleths (temperatures and times to reach each
+        fraction during linear cooling) of ferrite, pearlite, and bainite.
+        All fractions and cooling rates are obtained from the same kinetic
+        integral of each phase
+
+        Parameters
+        ----------
+        fractions : iterable (optional)
+            Transformed fractions
+            Default: (1e-2, .1, .5, .9, .99)
+        Tini : float (optional)
+            Initial temperature
+            Default: 900
+        phi_min, phi_max : float (optional)
+            Minimum and maximum cooling rates
+            Default: 1e-4, 1e4
+        phi_steps : int (optional)
+            Number of cooling rates, logarithmically spaced
+            Default: 420
+
+        Returns
+        -------
+        table : ResultTable object
+            Table in long format with the columns phase, f, cooling_rate,
+            T, and t (one row per phase, fraction, and cooling rate). T and
+            t are NaN if the fraction is not reached
+        """
+        fractions = np.atleast_1d(np.asarray(fractions, dtype=float))
+
+        def compute():
+            cooling_rates = 10**np.linspace(np.log10(phi_min), np.log10(phi_max), phi_steps)
+            columns = dict(phase=[], f=[], cooling_rate=[], T=[], t=[])
+            for name in ['ferrite', 'pearlite', 'bainite']:
+                phase = getattr(self, name)
+                T = phase.get_kinetic_integral(phase.Tf).get_transformation_temperature(
+                    cooling_rates, fractions, Tini)
+                columns['phase'].append(np.full(T.size, name))
+                columns['f'].append(np.repeat(fractions, phi_steps))
+                columns['cooling_rate'].append(np.tile(cooling_rates, len(fractions)))
+                columns['T'].append(T.ravel())
+                columns['t'].append(((Tini - T)/cooling_rates).ravel())
+            return ResultTable(meta=dict(fractions=fractions, Tini=Tini),
+                               **{key: np.concatenate(value) for key, value in columns.items()})
+
+        return get_cached('CCT_isopleths', compute, fractions=fractions, Tini=Tini, phi_min=phi_min,
+                          phi_max=phi_max, phi_steps=phi_steps, **self.get_cache_params())
+
+    def get_CCT_family(self, law, fractions=(1e-2, .99), Tfin=25, dT=1.):
+        """
+        Calculates the CCT isopleths of ferrite, pearlite, and bainite for
+        a family of cooling laws (see `CoolingLaw`), e.g., Newtonian
+        cooling for several heat transfer coefficients or a stack of
+        measured curves. All members are evaluated on a shared temperature
+        grid: the time spent around each temperature by each member is
+        multiplied by the reciprocal of the transformation factor 1/F(T) of
+        each phase, which is calculated once
 
-        # Ferrite
-        T = np.arange(self.alloy.Bs, self.alloy.Ae3)
-        ts = self.ferrite.get_transformation_time(T, fs)  # start
-        tf = self.ferrite.get_transformation_time(T, ff)  # finish
-        ax.plot(ts, T, color=self.colors_dict['ferrite'],
-                label='Ferrite {:g}%'.format(100*fs), **kwargs)
-        ax.plot(tf, T, color=self.colors_dict['ferrite'], ls='--',
-                label='Ferrite {:g}%'.format(100*ff), **kwargs)
-        df_ferrite = pd.DataFrame(dict(T_ferrite=T, ts_ferrite=ts, tf_ferrite=tf))
-
-        # Pearlite
-        T = np.arange(self.alloy.Bs, self.alloy.Ae1)
-        ts = self.pearlite.get_transformation_time(T, fs)
-        tf = self.pearlite.get_transformation_time(T, ff)
-        ax.plot(ts, T, color=self.colors_dict['pearlite'],
-                label='Pearlite {:g}%'.format(100*fs), **kwargs)
-        ax.plot(tf, T, color=self.colors_dict['pearlite'], ls='--',
-                label='Pearlite {:g}%'.format(100*ff), **kwargs)
-        df_pearlite = pd.DataFrame(dict(T_pearlite=T, ts_pearlite=ts, tf_pearlite=tf))
-
-        # Bainite
-        T = np.arange(self.alloy.Ms, self.alloy.Bs)
-        ts = self.bainite.get_transformation_time(T, fs)
-        tf = self.bainite.get_transformation_time(T, ff)
-        ax.plot(ts, T, color=self.colors_dict['bainite'],
-                label='Bainite {:g}%'.format(100*fs), **kwargs)
-        ax.plot(tf, T, color=self.colors_dict['bainite'], ls='--',
-                label='Bainite {:g}%'.format(100*ff), **kwargs)
-        df_bainite = pd.DataFrame(dict(T_bainite=T, ts_bainite=ts, tf_bainite=tf))
-
-        self.df_TTT = pd.concat([df_ferrite, df_pearlite, df_bainite], axis=1)
-
-        # Draws Ae1 and Ae3 lines
+        Parameters
+        ----------
+        law : CoolingLaw object
+            Family of cooling laws
+        fractions : iterable (optional)
+            Transformed fractions
+            Default: (1e-2, .99)
+        Tfin : float (optional)
+            Final temperature
+            Default: 25
+        dT : float (optional)
+            Temperature step of the grid
+            Default: 1.0
+
+        Returns
+        -------
+        table : ResultTable object
+            Table in long format with one row per phase, fraction, and
+            member of the family. Columns: phase, f, the parameter of the
+            family (law.parameter_name), cooling rate at 700 oC (phi700),
+            and the temperature T and time t at which the fraction is
+            reached (NaN if it is not reached above Tfin)
+        """
+        fractions = np.atleast_1d(np.asarray(fractions, dtype=float))
+        T = np.arange(law.Tini, Tfin, -dT)
+        t = law.get_time(T)
+        # Time spent around each temperature; zero where the temperature is
+        # never reached
+        with np.errstate(invalid='ignore'):
+            dt = np.diff(t, axis=-1, prepend=0.)
+        dt = np.where(np.isfinite(dt), dt, 0.)
+        phi700 = law.get_cooling_rate([700.])[:, 0]
+
+        m = len(law)
+        members = np.arange(m)
+        columns = dict(phase=[], f=[], T=[], t=[])
+        for name in ['ferrite', 'pearlite', 'bainite']:
+            phase = getattr(self, name)
+            inv_factor = np.zeros(T.shape)
+            filtr = (T < phase.Ts) & (T > phase.Tf)
+            inv_factor[filtr] = 1./phase.get_transformation_factor(T[filtr])
+            idx = get_first_crossing((dt*inv_factor).cumsum(axis=-1), S(fractions))
+            reached = idx >= 0
+            columns['phase'].append(np.full(idx.size, name))
+            columns['f'].append(np.repeat(fractions, m))
+            columns['T'].append(np.where(reached, T[idx], np.nan).ravel())
+            columns['t'].append(np.where(reached, t[members, idx], np.nan).ravel())
+
+        table = ResultTable(meta=dict(fractions=fractions, Tini=law.Tini, law=repr(law)),
+                            **{key: np.concatenate(value) for key, value in columns.items()})
+        n = len(table)
+        table[law.parameter_name] = np.resize(law.parameters, n)
+        table['phi700'] = np.resize(phi700, n)
+        return table
+
+    def get_critical_cooling_rates(self, fractions=1e-2, Tini=900, Tfin=25, n=500, martensite=True):
+        """
+        Calculates the critical cooling rates of linear cooling from Tini:
+        for ferrite, pearlite, and bainite, the cooling rate above which
+        the fraction is not reached (i.e., the slowest cooling rate that
+        avoids the phase, as read from the CCT diagram); for martensite,
+        the slowest cooling rate for which the final martensite fraction
+        reaches the fraction (see `get_martensite_critical_cooling_rate`)
+
+        Parameters
+        ----------
+        fractions : float or iterable (optional)
+            Threshold phase fraction(s)
+            Default: 1e-2 (1%)
+        Tini : float (optional)
+            Initial temperature
+            Default: 900
+        Tfin : float (optional)
+            Final temperature (only used for martensite)
+            Default: 25
+        n : int (optional)
+            Number of points of the temperature grid of the martensite
+            fractions
+            Default: 500
+        martensite : bool (optional)
+            If False, the critical cooling rates of martensite (which
+            require evaluating the coupled model) are not calculated
+            Default: True
+
+        Returns
+        -------
+        rates : ResultTable object
+            Table with the fractions (f) and the critical cooling rates of
+            ferrite, pearlite, bainite, and martensite for each one of them
+        """
+        fractions = np.atleast_1d(np.asarray(fractions, dtype=float))
+        rates = ResultTable(meta=dict(Tini=Tini, Tfin=Tfin), f=fractions)
+        for name in ['ferrite', 'pearlite', 'bainite']:
+            rates[name] = getattr(self, name).get_critical_cooling_rate(fractions, Tini)
+        if martensite:
+            phases = dict(ferrite=self.ferrite, pearlite=self.pearlite, bainite=self.bainite,
+                          martensite=self.martensite)
+            rates['martensite'] = get_martensite_critical_cooling_rate(phases, fractions, Tini, Tfin, n)
+        return rates
+
+    def draw_critical_temperatures(self, ax):
+        """
+        Draws the Ae3, Ae1 (short lines at the left), Bs, and Ms lines over
+        AxesSubplot object
+        """
         ax.axhline(self.alloy.Ae3, xmax=.1, color=self.colors_dict['ferrite'], ls=':')
         ax.axhline(self.alloy.Ae1, xmax=.1, color=self.colors_dict['pearlite'], ls=':')
 
-        # Draws Bs and Ms lines
         ax.axhline(self.alloy.Bs, color=self.colors_dict['bainite'], ls=':')
         ax.axhline(self.alloy.Ms, color=self.colors_dict['martensite'])
 
+    def format_diagram(self, ax, nfractions=2):
+        """
+        Sets the log time axis, labels, title, critical temperature names,
+        and legend (with nfractions rows) of TTT and CCT diagrams
+        """
         ax.set_xscale('log')
         ax.set_xlabel('Time (s)')
         ax.set_ylabel(u'Temperature (°C)')
@@ -1061,16 +3091,78 @@ class TransformationDiagrams:
                 color=self.colors_dict['martensite'], ha='left', va='bottom')
 
         ax.legend(loc='upper center', ncol=3, bbox_to_anchor=(0.5, -.15))
-        fig.subplots_adjust(bottom=.2)
+        # The legend has one row per fraction
+        ax.get_figure().subplots_adjust(bottom=.2 + .035*max(0, nfractions - 2))
+
+    def draw_isopleths(self, ax, isopleths, **kwargs):
+        """
+        Draws the isopleths (see `get_TTT_isopleths` and
+        `get_CCT_isopleths`) over AxesSubplot object. The first fraction is
+        drawn with solid lines, the last one with dashed lines, and the
+        others with dash-dotted lines
+        """
+        fractions = isopleths.meta['fractions']
+        for name in ['ferrite', 'pearlite', 'bainite']:
+            for i, f in enumerate(fractions):
+                sel = (isopleths['phase'] == name) & (isopleths['f'] == f)
+                ls = '-' if i == 0 else '--' if i == len(fractions) - 1 else '-.'
+                ax.plot(isopleths['t'][sel], isopleths['T'][sel], color=self.colors_dict[name], ls=ls,
+                        label='{} {:g}%'.format(name.capitalize(), 100*f), **kwargs)
+
+    @timed('plotting')
+    def TTT(self, fs=1e-2, ff=.99, ax=None, fractions=None, **kwargs):
+        """
+        Plot TTT diagram
+
+        Parameters
+        ----------
+        fs : float (optional)
+            Transformation start phase fraction
+            Default: 1e-2 (1%)
+        fs : float (optional)
+            Transformation finish phase fraction
+            Default: .99 (99%)
+        ax : AxesSubplot object (optional)
+            Axis where to plot the TTT curve. If None, then a new axis is
+            created
+            Default: None
+        fractions : iterable (optional)
+            Transformed fractions of the isopleths drawn for each phase
+            (see `get_TTT_isopleths`)
+            Default: None ([fs, ff])
+        **kwargs :
+            Optional arguments passed to ax.plot(*args, **kwargs)
+
+        Returns
+        -------
+        ax : AxesSubplot object
+        """
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            fig, ax = plt.subplots(figsize=(6, 6))
+
+        isopleths = self.get_TTT_isopleths([fs, ff] if fractions is None else fractions)
+        self.draw_isopleths(ax, isopleths, **kwargs)
+
+        self.df_TTT = self.get_TTT_table(fs, ff).to_dataframe()
+
+        self.draw_critical_temperatures(ax)
+        self.format_diagram(ax, len(isopleths.meta['fractions']))
 
         return ax
 
-    def CCT(self, Tini=900, fs=1e-2, ff=.99, phi_min=1e-4, phi_max=1e4, phi_steps=420, ax=None, **kwargs):
+    @timed('plotting')
+    def CCT(self, Tini=900, fs=1e-2, ff=.99, phi_min=1e-4, phi_max=1e4, phi_steps=420, ax=None,
+            coupled=False, fractions=None, **kwargs):
         """
         Plot CCT diagram
 
         Parameters
         ----------
+        Tini : float (optional)
+            Initial temperature
+            Default: 900
         fs : float (optional)
             Transformation start phase fraction
             Default: 1e-2 (1%)
@@ -1081,52 +3173,41 @@ class TransformationDiagrams:
             Axis where to plot the TTT curve. If None, then a new axis is
             created
             Default: None
+        coupled : boolean (optional)
+            If True, the coupled phase fraction model is evaluated for
+            the drawn cooling curves (see `get_CCT_fractions`), and each
+            curve is annotated with the final phase fractions (%) and
+            the Vickers hardness
+            Default: False
+        fractions : iterable (optional)
+            Transformed fractions of the isopleths drawn for each phase
+            (see `get_CCT_isopleths`)
+            Default: None ([fs, ff])
         **kwargs :
-            Optional arguments passed to ax.plot(*args, **kwargs)
+            Optional arguments passed to ax.plot(*args, **kwargs). The
+            keyword draw_cooling (default True) controls whether the
+            cooling curves are drawn
 
         Returns
         -------
         ax : AxesSubplot object
         """
+        import matplotlib.pyplot as plt
+
         if ax is None:
             fig, ax = plt.subplots(figsize=(6, 6))
-        else:
-            fig = ax.get_figure()
 
-        cooling_rates = 10**np.linspace(np.log10(phi_min), np.log10(phi_max), phi_steps)
-        draw_cooling = kwargs.get('draw_cooling', True)
-
-        # Ferrite
-        Ts = self.ferrite.get_transformation_temperature(
-            Tini, self.alloy.Bs, cooling_rates, fs)  # start
-        Tf = self.ferrite.get_transformation_temperature(
-            Tini, self.alloy.Bs, cooling_rates, ff)  # finish
-        ax.plot(Ts/cooling_rates, Ts,
-                color=self.colors_dict['ferrite'], label='Ferrite {:g}%'.format(100*fs), **kwargs)
-        ax.plot(Tf/cooling_rates, Tf, color=self.colors_dict['ferrite'],
-                ls='--', label='Ferrite {:g}%'.format(100*ff), **kwargs)
-
-        # Pearlite
-        Ts = self.pearlite.get_transformation_temperature(Tini, self.alloy.Bs, cooling_rates, fs)
-        Tf = self.pearlite.get_transformation_temperature(Tini, self.alloy.Bs, cooling_rates, ff)
-        ax.plot(Ts/cooling_rates, Ts, color=self.colors_dict['pearlite'],
-                label='Pearlite {:g}%'.format(100*fs), **kwargs)
-        ax.plot(Tf/cooling_rates, Tf, color=self.colors_dict['pearlite'],
-                ls='--', label='Pearlite {:g}%'.format(100*ff), **kwargs)
-
-        # Bainite
-        Ts = self.bainite.get_transformation_temperature(Tini, self.alloy.Ms, cooling_rates, fs)
-        Tf = self.bainite.get_transformation_temperature(Tini, self.alloy.Ms, cooling_rates, ff)
-        ax.plot(Ts/cooling_rates, Ts,
-                color=self.colors_dict['bainite'], label='Bainite {:g}%'.format(100*fs), **kwargs)
-        ax.plot(Tf/cooling_rates, Tf, color=self.colors_dict['bainite'],
-                ls='--', label='Bainite {:g}%'.format(100*ff), **kwargs)
+        data = self.get_CCT_data(Tini, fs, ff, phi_min, phi_max, phi_steps)
+        cooling_rates = data['cooling_rate']
+        draw_cooling = kwargs.pop('draw_cooling', True)
 
-        ax.axhline(self.alloy.Ae3, xmax=.1, color=self.colors_dict['ferrite'], ls=':')
-        ax.axhline(self.alloy.Ae1, xmax=.1, color=self.colors_dict['pearlite'], ls=':')
+        isopleths = self.get_CCT_isopleths([fs, ff] if fractions is None else fractions, Tini,
+                                           phi_min, phi_max, phi_steps)
+        self.draw_isopleths(ax, isopleths, **kwargs)
 
-        ax.axhline(self.alloy.Bs, color=self.colors_dict['bainite'], ls=':')
-        ax.axhline(self.alloy.Ms, color=self.colors_dict['martensite'])
+        self.df_CCT = self.get_CCT_table(Tini, fs, ff, phi_min, phi_max, phi_steps).to_dataframe()
+
+        self.draw_critical_temperatures(ax)
 
         # Draw cooling curves
         if draw_cooling:
@@ -1137,34 +3218,89 @@ class TransformationDiagrams:
                 kw.update(kwargs)
                 ax.plot(t, T, 'k:', **kw)
 
-        ax.set_xscale('log')
-        ax.set_xlabel('Time (s)')
-        ax.set_ylabel(u'Temperature (°C)')
-        ax.set_title(self.alloy.format_composition())
+        # Annotates cooling curves with final phase fractions and hardness
+        if coupled:
+            f = self.get_CCT_fractions(cooling_rates[::10], Tini, 25)
+            for i, cooling_rate in enumerate(f['cooling_rate']):
+                label = ['{}{:.0f}'.format(phase[0].upper(), 100*f[phase][i])
+                         for phase in ['ferrite', 'pearlite', 'bainite', 'martensite']
+                         if f[phase][i] >= .005]
+                if not np.isnan(f['Hv'][i]):
+                    label.append('{:.0f} HV'.format(f['Hv'][i]))
+                ax.text((Tini - 25)/cooling_rate, 25, ' '.join(label), rotation=90,
+                        ha='right', va='bottom', fontsize=6)
 
-        xmin = ax.get_xlim()[0]
-        ax.text(xmin*1.5, self.alloy.Ae3, 'Ae3',
-                color=self.colors_dict['ferrite'], ha='left', va='bottom')
-        ax.text(xmin*1.5, self.alloy.Ae1, 'Ae1',
-                color=self.colors_dict['pearlite'], ha='left', va='bottom')
-        ax.text(xmin*1.5, self.alloy.Bs, 'Bs',
-                color=self.colors_dict['bainite'], ha='left', va='bottom')
-        ax.text(xmin*1.5, self.alloy.Ms, 'Ms',
-                color=self.colors_dict['martensite'], ha='left', va='bottom')
+        self.format_diagram(ax, len(isopleths.meta['fractions']))
 
-        ax.legend(loc='upper center', ncol=3, bbox_to_anchor=(0.5, -.15))
-        fig.subplots_adjust(bottom=.2)
+        return ax
+
+    @timed('plotting')
+    def CCT_family(self, law, fs=1e-2, ff=.99, Tfin=25, ax=None, fractions=None, draw_cooling=True, **kwargs):
+        """
+        Plot CCT diagram for a family of cooling laws (see
+        `get_CCT_family`)
+
+        Parameters
+        ----------
+        law : CoolingLaw object
+            Family of cooling laws (e.g., NewtonianCooling.from_lambda(...)
+            or MeasuredCooling(curves))
+        fs : float (optional)
+            Transformation start phase fraction
+            Default: 1e-2 (1%)
+        ff : float (optional)
+            Transformation finish phase fraction
+            Default: .99 (99%)
+        Tfin : float (optional)
+            Final temperature
+            Default: 25
+        ax : AxesSubplot object (optional)
+            Axis where to plot the CCT curves. If None, then a new axis is
+            created
+            Default: None
+        fractions : iterable (optional)
+            Transformed fractions of the isopleths drawn for each phase
+            Default: None ([fs, ff])
+        draw_cooling : boolean (optional)
+            Whether the cooling curves are drawn
+            Default: True
+        **kwargs :
+            Optional arguments passed to ax.plot(*args, **kwargs)
+
+        Returns
+        -------
+        ax : AxesSubplot object
+        """
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            fig, ax = plt.subplots(figsize=(6, 6))
+
+        isopleths = self.get_CCT_family(law, [fs, ff] if fractions is None else fractions, Tfin)
+        self.draw_isopleths(ax, isopleths, **kwargs)
+        self.draw_critical_temperatures(ax)
+
+        if draw_cooling:
+            T = np.linspace(law.Tini, Tfin, 100)
+            kw = dict(lw=.5)
+            kw.update(kwargs)
+            for t in law.get_time(T):
+                ax.plot(np.where(np.isfinite(t), t, np.nan), T, 'k:', **kw)
+
+        self.format_diagram(ax, len(isopleths.meta['fractions']))
 
         return ax
 
-    def plot_phase_fraction(self, t, T, n=1000, xaxis='t', ax=None, **kwargs):
+    @timed('plotting')
+    def plot_phase_fraction(self, t, T=None, n=1000, xaxis='t', ax=None, **kwargs):
         """
         Plot phase fractions for a given thermal cycle T(t)
 
         Parameters
         ----------
-        t : iterable
-            Time
+        t : iterable or ThermalCycle object
+            Time, or thermal cycle already fitted and resampled (then T
+            and n are ignored)
         T : iterable
             Temperatures at the instants of time t
         n : int (optional)
@@ -1185,21 +3321,14 @@ class TransformationDiagrams:
         -------
         ax : AxesSubplot object
         """
+        import matplotlib.pyplot as plt
+        from scipy.interpolate import interp1d
+
         if ax is None:
             fig, ax = plt.subplots()
         else:
             fig = ax.get_figure()
 
-        if len(t) > 3:
-            # Fits T(t) by spline
-            def t2T(t_): return splev(t_, splrep(t, T))
-        else:
-            # Uses linear interpolator
-            t2T = interp1d(t, T)
-
-        t = np.linspace(min(t), max(t), n)
-        T = t2T(t)
-
         f = self.get_transformed_fraction(t, T, n)
         if f['ferrite'].max() > 0:
             ax.plot(f[xaxis], f['ferrite'], color=self.colors_dict['ferrite'], label='Ferrite')
@@ -1213,12 +3342,12 @@ class TransformationDiagrams:
         if f['austenite'].max() > 0:
             ax.plot(f[xaxis], f['austenite'], color=self.colors_dict['austenite'], label='Austenite')
 
-        if not np.isnan(f.iloc[-1]['Hv']):
+        if not np.isnan(f['Hv'][-1]):
             T_ref = 25
             try:
                 Hv_ref = interp1d(f['T'], f['Hv'])(T_ref)
             except ValueError:
-                T_ref, Hv_ref = f.iloc[-1]['T'], f.iloc[-1]['Hv']
+                T_ref, Hv_ref = f['T'][-1], f['Hv'][-1]
 
             ax.text(.95, .95, u'Hardness for phase fractions at {:.1f} °C: {:.0f} HV'.format(T_ref, Hv_ref),
                     transform=ax.transAxes, ha='right', va='top',
@@ -1229,3 +3358,63 @@ class TransformationDiagrams:
         ax.legend()
 
         return ax
+
+    @timed('plotting')
+    def plot_hardness_curve(self, cooling_rates=None, Tini=900, Tfin=25, n=1000, law=None, ax=None, **kwargs):
+        """
+        Plot the final hardness and phase fractions as a function of the
+        cooling rate at 700 oC (see `get_hardness_curve`)
+
+        Parameters
+        ----------
+        cooling_rates : iterable (optional)
+            Cooling rates of linear cooling from Tini to Tfin
+            Default: None (201 cooling rates from 1e-2 to 1e3 oC/s)
+        Tini : float (optional)
+            Initial temperature of linear cooling
+            Default: 900
+        Tfin : float (optional)
+            Final temperature
+            Default: 25
+        n : int (optional)
+            Number of points of the temperature grid
+            Default: 1000
+        law : CoolingLaw object (optional)
+            Family of non-linear cooling laws
+            Default: None (linear cooling)
+        ax : AxesSubplot object (optional)
+            Axis where to plot the hardness curve. The phase fractions are
+            plotted on a twin axis. If None, then a new axis is created
+            Default: None
+        **kwargs :
+            Optional arguments passed to ax.plot(*args, **kwargs) of the
+            hardness curve
+
+        Returns
+        -------
+        ax : AxesSubplot object
+        """
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            fig, ax = plt.subplots()
+
+        curve = self.get_hardness_curve(cooling_rates, Tini, Tfin, n, law)
+        kw = dict(color='k', label='Hardness')
+        kw.update(kwargs)
+        lines = ax.plot(curve['phi700'], curve['Hv'], **kw)
+
+        ax2 = ax.twinx()
+        for name in ['ferrite', 'pearlite', 'bainite', 'martensite', 'austenite']:
+            if curve[name].max() > 0:
+                lines += ax2.plot(curve['phi700'], curve[name], color=self.colors_dict[name], ls='--', lw=1,
+                                  label=self.columns_label_dict[name])
+
+        ax.set_xscale('log')
+        ax.set_xlabel(u'Cooling rate at 700 °C (°C/s)')
+        ax.set_ylabel('Vickers hardness (HV)')
+        ax2.set_ylabel('Phase fraction')
+        ax2.set_ylim(0, 1)
+        ax.legend(lines, [line.get_label() for line in lines], loc='best')
+
+        return ax